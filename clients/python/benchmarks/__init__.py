@@ -0,0 +1,4 @@
+"""
+Performance benchmarks for the MHN reader, writer, schema and utilities, with the
+standard library `csv` and `json` modules as baselines. Run with `python -m benchmarks`.
+"""
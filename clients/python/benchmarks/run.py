@@ -0,0 +1,334 @@
+"""
+Runs the benchmark suite and reports rows/sec, MB/s and peak memory per operation.
+
+Example:
+    cd clients/python
+    python -m benchmarks --size 1m --output results.json
+    python -m benchmarks --rows 50000 --workload flat --workload escapes --no-memory
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from mhn import DictReader, DictWriter, MmapDictReader, generate_schema
+from mhn.dialect import default_dialect
+from mhn.utilities import escape, escape_control_chars, parse_array, unescape
+
+from .workloads import WORKLOADS, Workload, flat_pool, get_workload
+
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+BLOCK_SIZE = 1024 * 1024
+
+
+class Context:
+    """
+    The state shared by the benchmarks of one workload. Writer benchmarks leave their
+    output behind for the reader benchmarks that follow them.
+    """
+    def __init__(self, workload: Workload, rows: int, directory: str) -> None:
+        self.workload = workload
+        self.rows = rows
+        self.directory = directory
+        self.flat_pool = flat_pool(workload)
+        self.values = [list(row.values()) for row in self.flat_pool]
+        self.escaped = [[escape(value, default_dialect) for value in values] for values in self.values]
+        self.arrays = [
+            default_dialect.array_separator.join(escape_control_chars(values, default_dialect))
+            for values in self.values
+        ]
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{self.workload.name}.{name}")
+
+    def cycle(self, pool: list) -> Iterable:
+        full, rest = divmod(self.rows, len(pool))
+        for _ in range(full):
+            yield from pool
+        yield from pool[:rest]
+
+
+# Every benchmark returns the number of items it processed and the number of bytes it
+# read or wrote, or None when bytes are not meaningful for it
+Benchmark = Callable[[Context], Tuple[int, Optional[int]]]
+
+
+def write_mhn_writerow(ctx: Context):
+    path = ctx.path("mhn")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = DictWriter(f, ctx.workload.schema)
+        writer.writeheader()
+        writerow = writer.writerow
+        for row in ctx.workload.rows(ctx.rows):
+            writerow(row)
+    return ctx.rows, os.path.getsize(path)
+
+
+def write_mhn_writerows(ctx: Context):
+    path = ctx.path("mhn")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = DictWriter(f, ctx.workload.schema)
+        writer.writeheader()
+        writer.writerows(ctx.workload.rows(ctx.rows))
+    return ctx.rows, os.path.getsize(path)
+
+
+def write_csv(ctx: Context):
+    path = ctx.path("csv")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, list(ctx.flat_pool[0]))
+        writer.writeheader()
+        writer.writerows(ctx.cycle(ctx.flat_pool))
+    return ctx.rows, os.path.getsize(path)
+
+
+def write_json(ctx: Context):
+    path = ctx.path("jsonl")
+    dumps = json.dumps
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        write = f.write
+        for row in ctx.workload.rows(ctx.rows):
+            write(dumps(row))
+            write("\n")
+    return ctx.rows, os.path.getsize(path)
+
+
+def _count(rows: Iterable) -> int:
+    count = 0
+    for _ in rows:
+        count += 1
+    return count
+
+
+def read_mhn_readline(ctx: Context):
+    path = ctx.path("mhn")
+    with open(path, encoding="utf-8", newline="") as f:
+        count = _count(DictReader(f, read_schema_from_first_row=True))
+    return count, os.path.getsize(path)
+
+
+def read_mhn_blocks(ctx: Context):
+    path = ctx.path("mhn")
+    with open(path, encoding="utf-8", newline="") as f:
+        count = _count(DictReader(f, read_schema_from_first_row=True, block_size=BLOCK_SIZE))
+    return count, os.path.getsize(path)
+
+
+def read_mhn_mmap(ctx: Context):
+    path = ctx.path("mhn")
+    with MmapDictReader(path, read_schema_from_first_row=True) as reader:
+        count = _count(reader)
+    return count, os.path.getsize(path)
+
+
+def read_csv(ctx: Context):
+    path = ctx.path("csv")
+    with open(path, encoding="utf-8", newline="") as f:
+        count = _count(csv.DictReader(f))
+    return count, os.path.getsize(path)
+
+
+def read_json(ctx: Context):
+    path = ctx.path("jsonl")
+    loads = json.loads
+    with open(path, encoding="utf-8") as f:
+        count = _count(loads(line) for line in f)
+    return count, os.path.getsize(path)
+
+
+def schema_generate(ctx: Context):
+    for row in ctx.workload.rows(ctx.rows):
+        generate_schema(row)
+    return ctx.rows, None
+
+
+def utilities_escape(ctx: Context):
+    count = size = 0
+    dialect = default_dialect
+    for values in ctx.cycle(ctx.values):
+        for value in values:
+            size += len(escape(value, dialect))
+        count += len(values)
+    return count, size
+
+
+def utilities_unescape(ctx: Context):
+    count = size = 0
+    dialect = default_dialect
+    for values in ctx.cycle(ctx.escaped):
+        for value in values:
+            size += len(value)
+            unescape(value, dialect)
+        count += len(values)
+    return count, size
+
+
+def utilities_parse_array(ctx: Context):
+    size = 0
+    dialect = default_dialect
+    for array_str in ctx.cycle(ctx.arrays):
+        size += len(array_str)
+        parse_array(array_str, dialect)
+    return ctx.rows, size
+
+
+# Writers come before the readers of the files they write
+BENCHMARKS: Dict[str, Tuple[str, Benchmark]] = {
+    "write.writerow": ("mhn", write_mhn_writerow),
+    "write.writerows": ("mhn", write_mhn_writerows),
+    "write.csv": ("csv", write_csv),
+    "write.json": ("json", write_json),
+    "read.readline": ("mhn", read_mhn_readline),
+    "read.blocks": ("mhn", read_mhn_blocks),
+    "read.mmap": ("mhn", read_mhn_mmap),
+    "read.csv": ("csv", read_csv),
+    "read.json": ("json", read_json),
+    "schema.generate_schema": ("mhn", schema_generate),
+    "utilities.escape": ("mhn", utilities_escape),
+    "utilities.unescape": ("mhn", utilities_unescape),
+    "utilities.parse_array": ("mhn", utilities_parse_array),
+}
+
+
+# The file each reader benchmark reads, and the writer that writes it
+_SOURCES = {
+    "read.readline": "mhn",
+    "read.blocks": "mhn",
+    "read.mmap": "mhn",
+    "read.csv": "csv",
+    "read.json": "jsonl",
+}
+_WRITERS = {"mhn": write_mhn_writerows, "csv": write_csv, "jsonl": write_json}
+
+
+class Result(NamedTuple):
+    workload: str
+    operation: str
+    library: str
+    rows: int
+    items: int
+    seconds: float
+    bytes: Optional[int]
+    peak_memory: Optional[int]
+
+    def to_dict(self) -> dict:
+        result = self._asdict()
+        result["items_per_sec"] = self.items / self.seconds if self.seconds else None
+        result["mb_per_sec"] = (
+            self.bytes / self.seconds / 1e6 if self.bytes is not None and self.seconds else None
+        )
+        return result
+
+
+def run_benchmark(ctx: Context, operation: str, memory: bool) -> Result:
+    library, benchmark = BENCHMARKS[operation]
+    start = time.perf_counter()
+    items, size = benchmark(ctx)
+    seconds = time.perf_counter() - start
+
+    peak_memory = None
+    if memory:
+        # Measured in a second run, as tracing allocations slows everything down
+        tracemalloc.start()
+        try:
+            benchmark(ctx)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return Result(ctx.workload.name, operation, library, ctx.rows, items, seconds, size, peak_memory)
+
+
+def run(
+    rows: int,
+    workloads: Iterable[str] = WORKLOADS,
+    operations: Iterable[str] = tuple(BENCHMARKS),
+    memory: bool = True,
+    seed: int = 0,
+    report: Callable[[Result], None] = None,
+) -> List[Result]:
+    """
+    Runs the selected benchmarks on every selected workload.
+
+    Reader benchmarks read the file of the matching writer benchmark, which is written
+    up front without being measured when that writer is not selected.
+    """
+    operations = [name for name in BENCHMARKS if name in set(operations)]
+    results = []
+    directory = tempfile.mkdtemp(prefix="mhn-benchmarks-")
+    try:
+        for name in workloads:
+            ctx = Context(get_workload(name, seed), rows, directory)
+            for operation in operations:
+                source = _SOURCES.get(operation)
+                if source is not None and not os.path.exists(ctx.path(source)):
+                    _WRITERS[source](ctx)
+                result = run_benchmark(ctx, operation, memory)
+                results.append(result)
+                if report is not None:
+                    report(result)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def _format_row(result: Result) -> str:
+    data = result.to_dict()
+    mb_per_sec = f"{data['mb_per_sec']:10.1f}" if data["mb_per_sec"] is not None else f"{'-':>10}"
+    peak = f"{result.peak_memory / 1e6:10.1f}" if result.peak_memory is not None else f"{'-':>10}"
+    return (
+        f"{result.workload:<8} {result.operation:<24} {result.library:<5} "
+        f"{data['items_per_sec']:14,.0f} {mb_per_sec} {result.seconds:9.3f} {peak}"
+    )
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="10k", help="the number of rows per workload")
+    parser.add_argument("--rows", type=int, help="an exact number of rows, overriding --size")
+    parser.add_argument("--workload", action="append", choices=WORKLOADS, help="repeat to select several")
+    parser.add_argument(
+        "--operation", action="append", choices=list(BENCHMARKS), help="repeat to select several"
+    )
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory runs")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the synthetic data")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    rows = args.rows if args.rows is not None else SIZES[args.size]
+    print(
+        f"{'workload':<8} {'operation':<24} {'lib':<5} {'items/s':>14} {'MB/s':>10} {'seconds':>9} {'peak MB':>10}",
+        file=sys.stderr,
+    )
+    results = run(
+        rows,
+        args.workload or WORKLOADS,
+        args.operation or tuple(BENCHMARKS),
+        memory=not args.no_memory,
+        seed=args.seed,
+        report=lambda result: print(_format_row(result), file=sys.stderr, flush=True),
+    )
+
+    document = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "rows": rows,
+        "seed": args.seed,
+        "results": [result.to_dict() for result in results],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        print()
@@ -0,0 +1,144 @@
+"""
+Synthetic MHN workloads.
+
+Every workload is a schema and a deterministic pool of distinct rows. Benchmarks cycle
+through the pool to reach the requested row count, so generating the data costs next to
+nothing next to the code being measured and memory does not grow with the row count.
+"""
+import random
+from itertools import cycle, islice
+from typing import Dict, Iterator, List, NamedTuple
+
+POOL_SIZE = 1000
+
+_WORDS = (
+    "alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel", "india",
+    "juliet", "kilo", "lima", "mike", "november", "oscar", "papa", "quebec", "romeo",
+)
+_COUNTRIES = ("USA", "France", "Germany", "Japan", "Brazil", "India", "Kenya", "Canada")
+# Every control character of the default dialect, plus the escape character and newlines
+_SPECIALS = ("|", ">", "<", "[", "]", "^", "~", "\\", "\n")
+
+
+class Workload(NamedTuple):
+    name: str
+    description: str
+    schema: str
+    pool: List[dict]
+
+    def rows(self, count: int) -> Iterator[dict]:
+        return islice(cycle(self.pool), count)
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def _flat(rng: random.Random, i: int) -> dict:
+    return {
+        "Id": str(i),
+        "Name": _text(rng, 2).title(),
+        "Email": f"{rng.choice(_WORDS)}.{i}@example.com",
+        "Age": str(rng.randint(18, 90)),
+        "Score": f"{rng.uniform(0, 100):.3f}",
+        "Country": rng.choice(_COUNTRIES),
+        "Active": rng.choice(("true", "false")),
+        "Created": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+    }
+
+
+def _nested(rng: random.Random, i: int) -> dict:
+    return {
+        "Id": str(i),
+        "User": {
+            "Name": _text(rng, 2).title(),
+            "Profile": {
+                "Age": str(rng.randint(18, 90)),
+                "Address": {
+                    "City": rng.choice(_WORDS).title(),
+                    "Geo": {"Lat": f"{rng.uniform(-90, 90):.5f}", "Lng": f"{rng.uniform(-180, 180):.5f}"},
+                },
+            },
+        },
+        "Country": rng.choice(_COUNTRIES),
+    }
+
+
+def _arrays(rng: random.Random, i: int) -> dict:
+    return {
+        "Id": str(i),
+        "Tags": [rng.choice(_WORDS) for _ in range(rng.randint(0, 10))],
+        "Scores": [str(rng.randint(0, 1000)) for _ in range(rng.randint(5, 20))],
+        "Items": [
+            {"Sku": f"SKU-{rng.randint(0, 99999):05d}", "Qty": str(rng.randint(1, 9))}
+            for _ in range(rng.randint(1, 5))
+        ],
+    }
+
+
+def _escaped_text(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(2, 6)):
+        parts.append(rng.choice(_WORDS))
+        parts.append(rng.choice(_SPECIALS))
+    return "".join(parts)
+
+
+def _escapes(rng: random.Random, i: int) -> dict:
+    return {
+        "Id": str(i),
+        "Title": _escaped_text(rng),
+        "Body": _escaped_text(rng),
+        "Path": "\\".join(rng.choice(_WORDS) for _ in range(3)),
+        "Tags": [_escaped_text(rng) for _ in range(3)],
+    }
+
+
+_BUILDERS: Dict[str, tuple] = {
+    "flat": ("8 scalar fields", "Id|Name|Email|Age|Score|Country|Active|Created", _flat),
+    "nested": (
+        "scalars nested 4 levels deep",
+        "Id|User>Name|Profile>Age|Address>City|Geo>Lat|Lng<<<<|Country",
+        _nested,
+    ),
+    "arrays": ("arrays and arrays of objects", "Id|Tags[]|Scores[]|Items[Sku|Qty]", _arrays),
+    "escapes": ("values full of control characters", "Id|Title|Body|Path|Tags[]", _escapes),
+}
+
+WORKLOADS = tuple(_BUILDERS)
+
+
+def get_workload(name: str, seed: int = 0) -> Workload:
+    """
+    Builds the row pool of a workload.
+
+    Args:
+        name (str): One of `WORKLOADS`.
+        seed (int, optional): The seed of the pool, so runs compare like for like.
+    """
+    description, schema, build = _BUILDERS[name]
+    rng = random.Random(f"{name}-{seed}")
+    return Workload(name, description, schema, [build(rng, i) for i in range(POOL_SIZE)])
+
+
+def flatten(row: dict, prefix: str = "") -> Dict[str, str]:
+    """
+    Flattens a row for `csv`: nested objects become dotted columns and arrays are joined
+    with `;`, arrays of objects after joining the values of each item with `,`.
+    """
+    flat = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{name}."))
+        elif isinstance(value, list):
+            flat[name] = ";".join(
+                ",".join(item.values()) if isinstance(item, dict) else item for item in value
+            )
+        else:
+            flat[name] = value
+    return flat
+
+
+def flat_pool(workload: Workload) -> List[Dict[str, str]]:
+    return [flatten(row) for row in workload.pool]
@@ -0,0 +1,41 @@
+from .aio import AsyncDictReader, AsyncDictWriter
+from .dialect import Dialect, default_dialect
+from .files import detect_compression, open  # noqa: F401 (public as mhn.open only)
+from .index import KeyIndex, RowIndex
+from .parallel import ParallelDictReader, ParallelDictWriter
+from .reader import BytesDictReader, DictionaryColumn, DictReader, MmapDictReader, read_columns
+from .records import record_type
+from .rows import LazyRow
+from .schema import CompiledSchema, Interner, SchemaInferrer, compile_schema, generate_schema, infer_schema
+from .stats import Stats
+from .writer import BytesDictWriter, DictWriter, write_rows
+
+# `open` is left out so star imports do not shadow the built-in, call it as `mhn.open`
+__all__ = [
+    "AsyncDictReader",
+    "AsyncDictWriter",
+    "BytesDictReader",
+    "BytesDictWriter",
+    "CompiledSchema",
+    "Dialect",
+    "DictReader",
+    "DictWriter",
+    "DictionaryColumn",
+    "Interner",
+    "KeyIndex",
+    "LazyRow",
+    "MmapDictReader",
+    "ParallelDictReader",
+    "ParallelDictWriter",
+    "RowIndex",
+    "SchemaInferrer",
+    "Stats",
+    "compile_schema",
+    "default_dialect",
+    "detect_compression",
+    "generate_schema",
+    "infer_schema",
+    "read_columns",
+    "record_type",
+    "write_rows",
+]
@@ -0,0 +1,247 @@
+import asyncio
+import codecs
+from collections import deque
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, List, Union
+from .dialect import Dialect, default_dialect
+from .reader import DictReader
+from .schema import CompiledSchema
+from .writer import DictWriter
+
+
+class AsyncDictReader:
+    """
+    Reads MHN rows from an `asyncio.StreamReader`, such as a socket or subprocess pipe.
+
+    The stream is read in blocks. Every complete line of a block is parsed in one go with
+    the same scanner `DictReader` uses, so the event loop is only ever held for the time it
+    takes to parse a single block. Blank lines are skipped.
+
+    When `read_schema_from_first_row` is set, `schema` and `compiled_schema` are None until
+    the first block has been read.
+
+    Example:
+        reader = AsyncDictReader(stream, read_schema_from_first_row=True)
+        async for row in reader:
+            print(row)
+
+        async for batch in reader.iter_batches(10000):
+            await process(batch)
+
+    Args:
+        stream (asyncio.StreamReader): The stream to read bytes from.
+        schema (Union[str, CompiledSchema], optional): The schema of the rows.
+        dialect (Dialect, optional): The dialect the data is written in.
+        read_schema_from_first_row (bool, optional): Read the schema from the first row of `stream`.
+        block_size (int, optional): The number of bytes to read at a time. Defaults to 64 KiB.
+        lazy (bool, optional): Return `LazyRow` mappings, see `DictReader`.
+        columns (Iterable[str], optional): Only read these field paths, see `DictReader`.
+        where (Dict[str, Any], optional): Only return rows matching these conditions, see
+            `compile_filter`.
+        encoding (str, optional): The encoding of the stream. Defaults to UTF-8.
+    """
+    def __init__(
+        self,
+        stream: asyncio.StreamReader,
+        schema: Union[str, CompiledSchema] = None,
+        dialect: Dialect = default_dialect,
+        read_schema_from_first_row: bool = False,
+        block_size: int = 64 * 1024,
+        lazy: bool = False,
+        columns: Iterable[str] = None,
+        where: Dict[str, Any] = None,
+        encoding: str = "utf-8",
+    ) -> None:
+        if block_size < 1:
+            raise ValueError("block_size must be positive")
+        if not read_schema_from_first_row and not schema:
+            raise ValueError("A schema must be provided or read from the first row")
+
+        self.stream = stream
+        self.dialect = dialect
+        self.block_size = block_size
+        self._options = {"lazy": lazy, "columns": columns, "where": where}
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._tail = ""
+        self._eof = False
+        self._rows = deque()
+
+        self._reader = None
+        self.compiled_schema = None
+        self.schema = None
+        if not read_schema_from_first_row:
+            self._open(schema)
+
+    def _open(self, schema: Union[str, CompiledSchema]) -> None:
+        # Parsing and filtering are delegated to a DictReader that never reads itself
+        self._reader = DictReader(None, schema, self.dialect, **self._options)
+        self.compiled_schema = self._reader.compiled_schema
+        self.schema = self._reader.schema
+
+    def __aiter__(self) -> "AsyncDictReader":
+        return self
+
+    async def __anext__(self) -> Dict[str, Union[str, List[str]]]:
+        if not self._rows and not await self._fill():
+            raise StopAsyncIteration
+        return self._rows.popleft()
+
+    async def iter_batches(self, size: int) -> AsyncIterator[List[Dict[str, Union[str, List[str]]]]]:
+        """
+        Yields the remaining rows in lists of up to `size` parsed rows.
+
+        Args:
+            size (int): The number of rows per batch.
+        """
+        if size < 1:
+            raise ValueError("size must be positive")
+
+        rows = self._rows
+        while True:
+            while len(rows) < size and await self._fill():
+                pass
+            if not rows:
+                return
+            popleft = rows.popleft
+            yield [popleft() for _ in range(min(size, len(rows)))]
+
+    async def _fill(self) -> bool:
+        # Parses the lines of the next block into the row buffer. Returns False once the
+        # stream is exhausted.
+        while True:
+            lines = await self._read_lines()
+            if not lines:
+                return False
+
+            if self._reader is None:
+                self._open(lines.pop(0).rstrip())
+            matches = self._reader._matches
+            if matches is not None:
+                lines = filter(matches, lines)
+            parse_row = self._reader._parse_row
+            count = len(self._rows)
+            self._rows.extend([parse_row(line) for line in lines])
+            if len(self._rows) > count:
+                return True
+
+    async def _read_lines(self) -> List[str]:
+        # Returns the complete, non-blank lines of the next block that holds any, or an
+        # empty list at the end of the stream
+        line_break = self.dialect.line_break
+        while not self._eof:
+            block = await self.stream.read(self.block_size)
+            if block:
+                text = self._decoder.decode(block)
+            else:
+                text = self._decoder.decode(b"", True)
+                self._eof = True
+
+            text = self._tail + text if self._tail else text
+            lines = text.split(line_break)
+            # The last line of a block is incomplete until the next block is read
+            self._tail = "" if self._eof else lines.pop()
+            if "\r" in text:
+                lines = [line.rstrip("\r") for line in lines]
+            lines = [line for line in lines if line]
+            if lines:
+                return lines
+        return []
+
+
+class _StreamOutput:
+    # Lets a DictWriter write text to an asyncio.StreamWriter, which takes bytes
+    __slots__ = ("write",)
+
+    def __init__(self, stream: asyncio.StreamWriter, encoding: str) -> None:
+        write = stream.write
+        self.write = lambda text: write(text.encode(encoding))
+
+
+class AsyncDictWriter:
+    """
+    Writes MHN rows to an `asyncio.StreamWriter`.
+
+    Rows are serialized with the same code as `DictWriter`, in batches of `batch_rows`
+    rows. The stream is drained after every batch, so a slow reader on the other end
+    pauses the writer instead of letting the stream's buffer grow.
+
+    Example:
+        writer = AsyncDictWriter(stream, schema)
+        await writer.writeheader()
+        await writer.writerows(rows)
+
+    Args:
+        stream (asyncio.StreamWriter): The stream to write bytes to.
+        schema (Union[str, CompiledSchema]): The schema of the rows.
+        dialect (Dialect, optional): The dialect to write the data in.
+        batch_rows (int, optional): The number of rows `writerows` serializes between
+            drains. Defaults to 1000.
+        encoding (str, optional): The encoding to write. Defaults to UTF-8.
+    """
+    def __init__(
+        self,
+        stream: asyncio.StreamWriter,
+        schema: Union[str, CompiledSchema],
+        dialect: Dialect = default_dialect,
+        batch_rows: int = 1000,
+        encoding: str = "utf-8",
+    ) -> None:
+        if batch_rows < 1:
+            raise ValueError("batch_rows must be positive")
+
+        self.stream = stream
+        self.dialect = dialect
+        self.batch_rows = batch_rows
+        self._writer = DictWriter(_StreamOutput(stream, encoding), schema, dialect)
+        self.compiled_schema = self._writer.compiled_schema
+        self.schema = self._writer.schema
+
+    async def writeheader(self) -> None:
+        """
+        Write the schema to the stream.
+        """
+        self._writer.writeheader()
+        await self.stream.drain()
+
+    async def writerow(self, row: dict) -> None:
+        """
+        Write a row of data to the stream.
+
+        Args:
+            row (dict): A dictionary of key/value pairs to write.
+        """
+        self._writer.writerow(row)
+        await self.stream.drain()
+
+    async def writerows(self, rows: Union[Iterable[dict], AsyncIterator[dict]]) -> None:
+        """
+        Write rows of data to the stream, draining it after every batch.
+
+        Args:
+            rows (Union[Iterable[dict], AsyncIterator[dict]]): The rows to write. Either a
+                regular or an asynchronous iterable.
+        """
+        writerows = self._writer.writerows
+        drain = self.stream.drain
+        batch_rows = self.batch_rows
+
+        if hasattr(rows, "__aiter__"):
+            batch = []
+            async for row in rows:
+                batch.append(row)
+                if len(batch) == batch_rows:
+                    writerows(batch)
+                    batch.clear()
+                    await drain()
+            if batch:
+                writerows(batch)
+                await drain()
+            return
+
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, batch_rows))
+            if not batch:
+                return
+            writerows(batch)
+            await drain()
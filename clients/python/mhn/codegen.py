@@ -0,0 +1,292 @@
+"""
+Generates parsers and serializers specialized to one schema and dialect.
+
+Like `collections.namedtuple`, the functions are written out as Python source and
+compiled with `exec`. Every field of the schema becomes its own few lines of straight-line
+code, with the dialect characters inlined as constants, so rows are handled without
+looping over the fields or branching on their kind. Nested objects are unrolled into the
+row function and arrays of objects get an item function of their own.
+
+The generated functions behave exactly like `Scanner.record` and
+`DictWriter.convert_dict_to_mhn`. When a schema or scanner is not supported, the
+generators return None and callers keep the generic path.
+"""
+from typing import Callable, Dict, List, Union
+from .dialect import Dialect
+from .schema import CompiledSchema, FieldKind
+from .scanner import Scanner
+
+
+class _Source:
+    # Collects the lines of the generated functions and the objects they refer to
+    def __init__(self, namespace: Dict[str, object]) -> None:
+        self.namespace = namespace
+        self.functions: List[str] = []
+        self._names = 0
+
+    def name(self, prefix: str) -> str:
+        self._names += 1
+        return f"{prefix}{self._names}"
+
+    def constant(self, value, prefix: str = "_c") -> str:
+        name = self.name(prefix)
+        self.namespace[name] = value
+        return name
+
+    def compile(self, entry: str) -> Callable:
+        source = "\n\n".join(self.functions)
+        exec(compile(source, f"<mhn codegen {entry}>", "exec"), self.namespace)
+        function = self.namespace[entry]
+        function._source = source
+        return function
+
+
+def _fstring_literal(text: str) -> str:
+    # Escapes text for the literal part of a single quoted f-string
+    parts = []
+    for char in text:
+        if char in "{}":
+            parts.append(char * 2)
+        elif char in "\\'":
+            parts.append(f"\\{char}")
+        elif char.isprintable():
+            parts.append(char)
+        else:
+            parts.append(repr(char)[1:-1])
+    return "".join(parts)
+
+
+class _ParserGenerator:
+    def __init__(self, scanner: Scanner) -> None:
+        self.scanner = scanner
+        self.source = _Source({
+            "_field": scanner._field,
+            "_element": scanner._element,
+            "_unescape": scanner._unescape,
+            "_unescape_match": scanner._unescape_match,
+            "_array": scanner.array,
+            "_skip": scanner.skip,
+            "_is_empty_array": scanner._is_empty_array,
+            "_malformed": scanner.malformed,
+            "_end_level": scanner.end_level,
+            "_end_array": scanner.end_array,
+            "_end_row": scanner.end_row,
+        })
+
+    def function(self, name: str, schema: CompiledSchema, in_array: bool) -> None:
+        body: List[str] = []
+        value = self.level(schema, in_array, body, "    ")
+        if in_array:
+            header = f"def {name}(line, pos):"
+            body.append(f"    return {value}, pos")
+        else:
+            header = f"def {name}(line):"
+            body.insert(0, "    pos = 0")
+            body.append("    if pos != len(line):")
+            body.append(f"        _end_row(line, pos, {self.source.constant(schema, '_s')})")
+            body.append(f"    return {value}")
+        self.source.functions.append("\n".join([header, *body]))
+
+    def level(self, schema: CompiledSchema, in_array: bool, body: List[str], indent: str) -> str:
+        # Emits the code scanning the fields of one level and returns a dict display of them
+        scanner = self.scanner
+        source = self.source
+        items = []
+
+        for index, field in enumerate(schema.fields if in_array else schema.scan_fields):
+            if index:
+                expected = f"{scanner.dialect.delimiter!r} before {field.name!r}"
+                body.append(f"{indent}if not line.startswith({scanner.delimiter!r}, pos):")
+                body.append(f"{indent}    raise _malformed(line, pos, {expected!r})")
+                body.append(f"{indent}pos += 1")
+
+            if not field.selected:
+                body.append(
+                    f"{indent}pos = _skip(line, pos, {source.constant(field, '_f')}, {in_array})"
+                )
+                continue
+
+            kind = field.kind
+            if kind is FieldKind.OBJECT:
+                expected = f"{scanner.dialect.level_start!r} opening {field.name!r}"
+                body.append(f"{indent}if not line.startswith({scanner.level_start!r}, pos):")
+                body.append(f"{indent}    raise _malformed(line, pos, {expected!r})")
+                body.append(f"{indent}pos += 1")
+                value = self.level(field.schema, False, body, indent)
+                nested = source.constant(field.schema, "_s")
+                body.append(f"{indent}if line.startswith({scanner.level_end!r}, pos):")
+                body.append(f"{indent}    pos += 1")
+                body.append(f"{indent}else:")
+                body.append(f"{indent}    pos = _end_level(line, pos, {nested})")
+                items.append(f"{field.name!r}: {value}")
+                continue
+
+            value = source.name("v")
+            if kind is FieldKind.SCALAR:
+                match = "_element" if in_array else "_field"
+                body.append(f"{indent}end = {match}(line, pos).end()")
+                body.append(f"{indent}{value} = line[pos:end]")
+                body.append(f"{indent}if {scanner.escape_char!r} in {value}:")
+                body.append(f"{indent}    {value} = _unescape(_unescape_match, {value})")
+                body.append(f"{indent}pos = end")
+                if field.convert is not None:
+                    body.append(f"{indent}{value} = {source.constant(field.convert)}({value})")
+            elif kind is FieldKind.ARRAY:
+                body.append(f"{indent}{value}, pos = _array(line, pos)")
+                if field.convert is not None:
+                    convert = source.constant(field.convert)
+                    body.append(f"{indent}{value} = list(map({convert}, {value}))")
+            else:
+                self.object_array(field.schema, value, body, indent)
+            items.append(f"{field.name!r}: {value}")
+
+        return "{" + ", ".join(items) + "}"
+
+    def object_array(self, schema: CompiledSchema, value: str, body: List[str], indent: str) -> None:
+        scanner = self.scanner
+        item = self.source.name("_item")
+        self.function(item, schema, True)
+        bracketed = self.source.name("b")
+        body.extend([
+            f"{indent}{bracketed} = line.startswith({scanner.array_start!r}, pos)",
+            f"{indent}if {bracketed}:",
+            f"{indent}    pos += 1",
+            f"{indent}{value} = []",
+            f"{indent}if _is_empty_array(line, pos):",
+            f"{indent}    pos += {len(scanner.empty_array)}",
+            f"{indent}else:",
+            f"{indent}    while True:",
+            f"{indent}        item, pos = {item}(line, pos)",
+            f"{indent}        {value}.append(item)",
+            f"{indent}        if not line.startswith({scanner.array_separator!r}, pos):",
+            f"{indent}            break",
+            f"{indent}        pos += 1",
+            f"{indent}if {bracketed}:",
+            f"{indent}    pos = _end_array(line, pos)",
+        ])
+
+
+def compile_parser(schema: CompiledSchema, scanner: Scanner) -> Union[Callable[[str], dict], None]:
+    """
+    Generates a function that parses a raw MHN line into a dictionary, specialized to
+    `schema` and the dialect of `scanner`. It returns the same rows as `Scanner.record`.
+
+    Args:
+        schema (CompiledSchema): The schema of the rows, which may be projected.
+        scanner (Scanner): The scanner whose dialect the rows are written in.
+
+    Returns:
+        Callable[[str], dict]: The parser, or None when the scanner is not supported, in
+        which case `scanner.record` should be used.
+    """
+    # Subclasses such as BytesScanner change how values are produced
+    if type(scanner) is not Scanner:
+        return None
+    generator = _ParserGenerator(scanner)
+    generator.function("parse_row", schema, False)
+    try:
+        return generator.source.compile("parse_row")
+    except (SyntaxError, RecursionError, MemoryError):
+        return None
+
+
+class _SerializerGenerator:
+    def __init__(self, dialect: Dialect, escape: Callable[[str], str], generic: Callable) -> None:
+        self.dialect = dialect
+        self.source = _Source({"_escape": escape, "_generic": generic, "_empty": {}})
+
+    def function(self, name: str, schema: CompiledSchema, entry: bool) -> None:
+        body: List[str] = []
+        if entry:
+            header = f"def {name}(data, sub_schema=None):"
+            body.append("    if sub_schema is not None:")
+            body.append("        return _generic(data, sub_schema)")
+        else:
+            header = f"def {name}(data):"
+        body.append("    if data is None:")
+        body.append("        data = _empty")
+        template = self.level(schema, "data", body, not entry)
+        body.append(f"    return f'{template}'")
+        self.source.functions.append("\n".join([header, *body]))
+
+    def level(self, schema: CompiledSchema, data: str, body: List[str], in_array: bool) -> str:
+        # Emits the code formatting the fields of one level and returns the f-string
+        # template joining them
+        dialect = self.dialect
+        source = self.source
+        separator = repr(dialect.array_separator)
+        empty_array = repr(dialect.empty_array)
+        parts = []
+
+        for field in schema.fields:
+            kind = field.kind
+            value = source.name("v")
+            body.append("    try:")
+            body.append(f"        {value} = {data}[{field.name!r}]")
+            body.append("    except KeyError:")
+            body.append(f"        {value} = None")
+
+            if kind is FieldKind.OBJECT:
+                body.append(f"    if {value} is None:")
+                body.append(f"        {value} = _empty")
+                nested = self.level(field.schema, value, body, False)
+                parts.append(
+                    _fstring_literal(dialect.level_start) + nested + _fstring_literal(dialect.level_end)
+                )
+                continue
+
+            part = source.name("p")
+            if kind is FieldKind.SCALAR:
+                if field.format is not None:
+                    formatted = f"{source.constant(field.format)}({value})"
+                else:
+                    formatted = f"_escape(str({value}))"
+                body.append(f"    {part} = '' if {value} is None else {formatted}")
+            else:
+                if kind is FieldKind.OBJECT_ARRAY:
+                    item = source.name("_item")
+                    self.function(item, field.schema, False)
+                    items = f"[{item}(item) for item in {value}]"
+                elif field.format is not None:
+                    items = f"map({source.constant(field.format)}, {value})"
+                else:
+                    items = f"map(_escape, map(str, {value}))"
+                body.append(f"    {part} = {separator}.join({items}) if {value} else {empty_array}")
+            if kind is not FieldKind.SCALAR and in_array:
+                # Arrays inside items of arrays of objects are bracketed, see DictWriter
+                parts.append(
+                    _fstring_literal(dialect.array_start) + f"{{{part}}}" + _fstring_literal(dialect.array_end)
+                )
+            else:
+                parts.append(f"{{{part}}}")
+
+        return _fstring_literal(dialect.delimiter).join(parts)
+
+
+def compile_serializer(
+    schema: CompiledSchema,
+    dialect: Dialect,
+    escape: Callable[[str], str],
+    generic: Callable[[dict, Union[str, CompiledSchema]], str],
+) -> Union[Callable[[dict], str], None]:
+    """
+    Generates a function that serializes a dictionary to a single MHN row, specialized to
+    `schema` and `dialect`. It returns the same text as `DictWriter.convert_dict_to_mhn`,
+    whose signature it shares.
+
+    Args:
+        schema (CompiledSchema): The schema to serialize with.
+        dialect (Dialect): The dialect to write.
+        escape (Callable[[str], str]): Escapes a single value, see `utilities.escaper`.
+        generic (Callable): The generic serializer, used for rows serialized with another
+            schema through the `sub_schema` argument.
+
+    Returns:
+        Callable[[dict], str]: The serializer, or None when the schema is not supported.
+    """
+    generator = _SerializerGenerator(dialect, escape, generic)
+    generator.function("serialize", schema, True)
+    try:
+        return generator.source.compile("serialize")
+    except (SyntaxError, RecursionError, MemoryError):
+        return None
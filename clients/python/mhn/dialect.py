@@ -1,4 +1,47 @@
+import re
+
+
 class Dialect:
+    """
+    The set of characters used to lay out MHN data.
+
+    Dialects are immutable and hashable, so everything derived from the characters is
+    computed once at construction and shared by every reader and writer using them.
+
+    The type separator only appears in schemas, where it separates a field name from an
+    optional type tag such as `Age:int`.
+
+    Attributes:
+        control_chars (frozenset): The characters that must be escaped inside values.
+        escape_mappings (dict): Maps each escape sequence to the text it stands for.
+        escape_table (dict): A `str.translate` table that escapes a value in a single pass.
+        escape_replacements (tuple): The `(text, escaped)` pairs to replace, in order, after
+            translating a value with `escape_table`: multi-character line breaks and the
+            carriage returns that are not part of one.
+        unescape_table (dict): Maps the character following the escape character to the
+            text it stands for.
+        needs_escaping (re.Pattern): Matches the first character of a value that must be escaped.
+    """
+    __slots__ = (
+        "delimiter",
+        "level_start",
+        "level_end",
+        "array_start",
+        "array_end",
+        "array_separator",
+        "empty_array",
+        "line_break",
+        "escape_char",
+        "type_separator",
+        "control_chars",
+        "escape_mappings",
+        "escape_table",
+        "escape_replacements",
+        "unescape_table",
+        "needs_escaping",
+        "_key",
+    )
+
     def __init__(
         self,
         delimiter: str = "|",
@@ -9,40 +52,116 @@ class Dialect:
         array_separator: str = "^",
         empty_array: str = "~",
         line_break: str = '\n',
-        escape_char: str = "\\"
+        escape_char: str = "\\",
+        type_separator: str = ":",
     ):
-        self.delimiter = delimiter
-        self.level_start = level_start
-        self.level_end = level_end
-        self.array_start = array_start
-        self.array_end = array_end
-        self.array_separator = array_separator
-        self.empty_array = empty_array
-        self.line_break = line_break
-        self.escape_char = escape_char
-    
-    @property
-    def control_chars(self) -> set:
-        return set(
-            self.level_start
-            + self.level_end
-            + self.array_start
-            + self.array_end
-            + self.array_separator
-            + self.delimiter
+        key = (
+            delimiter,
+            level_start,
+            level_end,
+            array_start,
+            array_end,
+            array_separator,
+            empty_array,
+            line_break,
+            escape_char,
+            type_separator,
+        )
+        for name, char in zip(self.__slots__, key):
+            if name == "line_break":
+                if not char:
+                    raise ValueError("Dialect line_break must not be empty")
+            elif len(char) != 1:
+                raise ValueError(f"Dialect {name} must be a single character, got {char!r}")
+
+        control_chars = frozenset(
+            level_start
+            + level_end
+            + array_start
+            + array_end
+            + array_separator
+            + empty_array
+            + delimiter
+        )
+
+        unescape_table = {char: char for char in control_chars}
+        unescape_table[escape_char] = escape_char
+        unescape_table["n"] = line_break
+        unescape_table["r"] = "\r"
+
+        # A raw carriage return would end the row for readers splitting on universal newlines
+        escaped_chars = {char: f"{escape_char}{char}" for char in control_chars}
+        escaped_chars[escape_char] = f"{escape_char}{escape_char}"
+        escaped_chars["\r"] = f"{escape_char}r"
+        escape_replacements = ()
+        if len(line_break) == 1:
+            escaped_chars[line_break] = f"{escape_char}n"
+        else:
+            escape_replacements = ((line_break, f"{escape_char}n"),)
+            if "\r" in line_break:
+                # Escape carriage returns only after the line breaks containing them
+                del escaped_chars["\r"]
+                escape_replacements += (("\r", f"{escape_char}r"),)
+
+        set_attribute = super().__setattr__
+        for name, value in zip(self.__slots__, key):
+            set_attribute(name, value)
+        set_attribute("control_chars", control_chars)
+        set_attribute(
+            "escape_mappings",
+            {f"{escape_char}{char}": value for char, value in unescape_table.items()},
+        )
+        set_attribute("escape_table", str.maketrans(escaped_chars))
+        set_attribute("escape_replacements", escape_replacements)
+        set_attribute("unescape_table", unescape_table)
+        # Multi-character line breaks come first, so that a match is replaced as a whole
+        needs_escaping = "[" + "".join(
+            re.escape(char) for char in sorted(set(escaped_chars) | {"\r"})
+        ) + "]"
+        if len(line_break) > 1:
+            needs_escaping = f"{re.escape(line_break)}|{needs_escaping}"
+        set_attribute("needs_escaping", re.compile(needs_escaping))
+        set_attribute("_key", key)
+
+    def check_bytes_mode(self, encoding: str) -> None:
+        """
+        Raises ValueError unless rows in this dialect can be split on raw bytes of the
+        given encoding: every character of the dialect must be ASCII and encode to the
+        same single byte, as it does in UTF-8 or Latin-1 but not in UTF-16.
+        """
+        chars = "".join(self._key)
+        try:
+            ascii_compatible = chars.encode(encoding) == chars.encode("ascii")
+        except UnicodeEncodeError:
+            ascii_compatible = False
+        if not ascii_compatible:
+            raise ValueError(
+                f"Bytes mode requires ASCII dialect characters and an ASCII compatible "
+                f"encoding, got {encoding!r}"
+            )
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, Dialect):
+            return NotImplemented
+        return self._key == other._key
+
+    def __hash__(self):
+        return hash(self._key)
+
+    def __reduce__(self):
+        return (type(self), self._key)
+
+    def __repr__(self):
+        fields = ", ".join(
+            f"{name}={value!r}" for name, value in zip(self.__slots__, self._key)
         )
-        
-    @property
-    def escape_mappings(self) -> dict:
-        return {
-            f"{self.escape_char}{self.array_start}": "___ARRAY_START___",
-            f"{self.escape_char}{self.array_end}": "___ARRAY_END___",
-            f"{self.escape_char}{self.array_separator}": "___ARRAY_SEPARATOR___",            
-            f"{self.escape_char}{self.empty_array}": "___EMPTY_ARRAY___",
-            f"{self.escape_char}{self.level_start}": "___LEVEL_START___",
-            f"{self.escape_char}{self.level_end}": "___LEVEL_END___",
-            f"{self.escape_char}{self.delimiter}": "___DELIMITER___",
-        }
+        return f"{type(self).__name__}({fields})"
 
 
 default_dialect = Dialect()
@@ -0,0 +1,209 @@
+import builtins
+import bz2
+import gzip
+import io
+import lzma
+import os
+import queue
+import threading
+from typing import Union
+from .dialect import Dialect, default_dialect
+from .reader import DictReader
+from .schema import CompiledSchema
+from .writer import DictWriter
+
+_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    *((b"BZh" + str(level).encode(), "bz2") for level in range(1, 10)),
+    (b"\xfd7zXZ\x00", "xz"),
+)
+
+_EXTENSIONS = {
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".lzma": "lzma",
+}
+
+
+def _open_lzma(path: Union[str, os.PathLike], mode: str) -> lzma.LZMAFile:
+    # Legacy .lzma files use the "alone" container, which is detected when reading
+    return lzma.open(path, mode, format=lzma.FORMAT_ALONE if "w" in mode else None)
+
+
+_OPENERS = {
+    "gzip": gzip.open,
+    "bz2": bz2.open,
+    "xz": lzma.open,
+    "lzma": _open_lzma,
+}
+
+
+def detect_compression(path: Union[str, os.PathLike], mode: str = "r") -> Union[str, None]:
+    """
+    Returns the compression of a file: `"gzip"`, `"bz2"`, `"xz"`, `"lzma"` or None.
+
+    Files being read are recognized by their leading magic bytes, falling back to the
+    file extension. Files being written only have their extension to go by.
+    """
+    if mode == "r":
+        with builtins.open(path, "rb") as f:
+            magic = f.read(6)
+        for prefix, compression in _MAGIC:
+            if magic.startswith(prefix):
+                return compression
+    return _EXTENSIONS.get(os.path.splitext(os.fspath(path))[1].lower())
+
+
+class _ThreadedReader(io.RawIOBase):
+    # Reads a binary file on a background thread, a block ahead of the consumer. The
+    # decompressors release the GIL, so decompression overlaps with parsing.
+    def __init__(self, source: io.BufferedIOBase, block_size: int, depth: int = 4) -> None:
+        self._source = source
+        self._block_size = block_size
+        self._queue = queue.Queue(depth)
+        self._stop = threading.Event()
+        self._block = memoryview(b"")
+        self._done = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                block = self._source.read(self._block_size)
+                self._queue.put(block)
+                if not block:
+                    return
+        except BaseException as error:
+            self._queue.put(error)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if not self._block:
+            if self._done:
+                return 0
+            block = self._queue.get()
+            if isinstance(block, BaseException):
+                self._done = True
+                raise block
+            if not block:
+                self._done = True
+                return 0
+            self._block = memoryview(block)
+
+        size = min(len(buffer), len(self._block))
+        buffer[:size] = self._block[:size]
+        self._block = self._block[size:]
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            # Unblock the thread if it is waiting for room in the queue
+            while self._thread.is_alive():
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self._thread.join(0.01)
+            self._source.close()
+        super().close()
+
+
+def _open_binary(
+    path: Union[str, os.PathLike], mode: str, compression: Union[str, None], block_size: int
+) -> io.IOBase:
+    if compression is None:
+        return builtins.open(path, f"{mode}b", buffering=block_size)
+
+    try:
+        opener = _OPENERS[compression]
+    except KeyError:
+        raise ValueError(f"Unsupported compression {compression!r}") from None
+    f = opener(path, f"{mode}b")
+    # The decompressors work on whatever size they are asked for, so buffering them in
+    # large blocks keeps the per-call overhead out of the reading loop
+    if mode == "r":
+        return io.BufferedReader(f, block_size)
+    return io.BufferedWriter(f, block_size)
+
+
+def open(
+    path: Union[str, os.PathLike],
+    mode: str = "r",
+    schema: Union[str, CompiledSchema] = None,
+    dialect: Dialect = default_dialect,
+    compression: str = "infer",
+    block_size: int = 1024 * 1024,
+    threaded: bool = False,
+    encoding: str = "utf-8",
+    **kwargs,
+) -> Union[DictReader, DictWriter]:
+    """
+    Opens an MHN file, which may be compressed, for reading or writing.
+
+    Compression is inferred from the magic bytes of the file when reading and from the
+    file extension when writing (`.gz`, `.bz2`, `.xz` or `.lzma`). The file is read and
+    written in blocks of `block_size` bytes, and readers split rows out of whole blocks
+    rather than calling `readline` through the decompressor for every row.
+
+    The reader or writer returned closes the file when it is closed or used as a
+    context manager.
+
+    Example:
+        with mhn.open("archive.mhn.gz") as reader:
+            for row in reader:
+                print(row)
+
+        with mhn.open("archive.mhn.gz", "w", schema) as writer:
+            writer.writeheader()
+            writer.writerows(rows)
+
+    Args:
+        path (Union[str, os.PathLike]): The file to open.
+        mode (str, optional): `"r"` to read or `"w"` to write. Defaults to `"r"`.
+        schema (Union[str, CompiledSchema], optional): The schema of the rows. Required when
+            writing; when reading without one, the schema is read from the first row.
+        dialect (Dialect, optional): The dialect the data is written in.
+        compression (str, optional): `"gzip"`, `"bz2"`, `"xz"`, `"lzma"`, None for an
+            uncompressed file, or `"infer"` to detect it. Defaults to `"infer"`.
+        block_size (int, optional): The number of bytes to read or write at a time.
+            Defaults to 1 MiB.
+        threaded (bool, optional): When reading, decompress on a background thread so
+            decompression overlaps with parsing.
+        encoding (str, optional): The encoding of the file. Defaults to UTF-8.
+        **kwargs: Passed on to `DictReader` or `DictWriter`.
+
+    Returns:
+        Union[DictReader, DictWriter]: A reader in `"r"` mode, a writer in `"w"` mode.
+    """
+    if mode not in ("r", "w"):
+        raise ValueError(f"mode must be 'r' or 'w', got {mode!r}")
+    if block_size < 1:
+        raise ValueError("block_size must be positive")
+    if mode == "w" and not schema:
+        raise ValueError("A schema is required to write")
+
+    if compression == "infer":
+        compression = detect_compression(path, mode)
+    binary = _open_binary(path, mode, compression, block_size)
+
+    try:
+        if mode == "w":
+            text = io.TextIOWrapper(binary, encoding, newline="")
+            return DictWriter(text, schema, dialect, **kwargs)
+
+        if threaded:
+            binary = io.BufferedReader(_ThreadedReader(binary, block_size), block_size)
+        text = io.TextIOWrapper(binary, encoding, newline="")
+        kwargs.setdefault("block_size", block_size)
+        return DictReader(
+            text, schema, dialect, read_schema_from_first_row=schema is None, **kwargs
+        )
+    except BaseException:
+        binary.close()
+        raise
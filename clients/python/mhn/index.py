@@ -0,0 +1,406 @@
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Iterator, List, Tuple, Union
+from .dialect import Dialect, default_dialect
+from .scanner import get_scanner
+from .schema import CompiledSchema, compile_schema
+
+# Magic, format version, row interval, row count, data file size and modification time
+_ROW_INDEX_HEADER = struct.Struct("<4sHIqqq")
+_ROW_INDEX_MAGIC = b"MHNR"
+_ROW_INDEX_VERSION = 1
+
+# Magic, format version, entry count, data file size, modification time and key path length
+_KEY_INDEX_HEADER = struct.Struct("<4sHqqqI")
+_KEY_INDEX_MAGIC = b"MHNK"
+_KEY_INDEX_VERSION = 1
+
+
+def _little_endian(offsets: array) -> array:
+    if sys.byteorder == "big":
+        offsets = array(offsets.typecode, offsets)
+        offsets.byteswap()
+    return offsets
+
+
+def _iter_lines(f, line_break: bytes, block_size: int) -> Iterator[Tuple[int, bytes, int, int]]:
+    # Yields the byte offset of every non-blank line of a binary file, with the block
+    # holding it and the line's start and end within that block
+    step = len(line_break)
+    base = 0
+    tail = b""
+    while True:
+        block = f.read(block_size)
+        data = tail + block if tail else block
+        start = 0
+        while True:
+            end = data.find(line_break, start)
+            if end == -1:
+                if block:
+                    break
+                # The last line has no line break after it
+                end = len(data)
+            if end > start and not (end - start == 1 and data[start] == 13):
+                yield base + start, data, start, end
+            start = end + step
+            if start > len(data):
+                break
+        if not block:
+            return
+        tail = data[start:]
+        base += start
+
+
+class RowIndex:
+    """
+    The byte offsets of every Nth row of an uncompressed MHN file.
+
+    The index is built in a single streaming pass and stored in a small sidecar file next
+    to the data. Readers given an index jump to the recorded row closest to the one asked
+    for and step over at most `every - 1` rows without parsing them. Blank lines are not
+    counted as rows, matching the block and memory mapped readers.
+
+    Example:
+        index = RowIndex.open("archive.mhn", every=1000)
+        with MmapDictReader("archive.mhn", read_schema_from_first_row=True, index=index) as reader:
+            page = reader[50000:50100]
+
+    Attributes:
+        every (int): The interval between recorded rows.
+        rows (int): The number of rows in the file, not counting the header.
+        size (int): The size of the file in bytes when the index was built.
+        mtime_ns (int): The modification time of the file when the index was built.
+        offsets (array.array): The byte offset of rows 0, `every`, `2 * every` and so on.
+    """
+    def __init__(
+        self, every: int, rows: int, size: int, mtime_ns: int, offsets: array
+    ) -> None:
+        self.every = every
+        self.rows = rows
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.offsets = offsets
+
+    @classmethod
+    def build(
+        cls,
+        path: Union[str, os.PathLike],
+        every: int = 1000,
+        dialect: Dialect = default_dialect,
+        has_header: bool = True,
+        encoding: str = "utf-8",
+        block_size: int = 1024 * 1024,
+    ) -> "RowIndex":
+        """
+        Indexes a file in one pass, reading it in blocks of `block_size` bytes.
+
+        Args:
+            path (Union[str, os.PathLike]): The MHN file to index.
+            every (int, optional): Record the offset of every this many rows. Defaults to 1000.
+            dialect (Dialect, optional): The dialect the data is written in.
+            has_header (bool, optional): Whether the first row is the schema. Defaults to True.
+            encoding (str, optional): The encoding of the file. Defaults to UTF-8.
+            block_size (int, optional): The number of bytes to read at a time.
+        """
+        if every < 1:
+            raise ValueError("every must be positive")
+
+        offsets = array("q")
+        # The header is counted as row -1 so the first data row is row 0
+        row = -1 if has_header else 0
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            for offset, _, _, _ in _iter_lines(f, dialect.line_break.encode(encoding), block_size):
+                if row >= 0 and not row % every:
+                    offsets.append(offset)
+                row += 1
+
+        return cls(every, max(row, 0), stat.st_size, stat.st_mtime_ns, offsets)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike]) -> "RowIndex":
+        """
+        Reads an index saved with `save`.
+        """
+        with open(path, "rb") as f:
+            header = f.read(_ROW_INDEX_HEADER.size)
+            if len(header) < _ROW_INDEX_HEADER.size:
+                raise ValueError(f"{os.fspath(path)!r} is not a row index")
+            magic, version, every, rows, size, mtime_ns = _ROW_INDEX_HEADER.unpack(header)
+            if magic != _ROW_INDEX_MAGIC or version != _ROW_INDEX_VERSION:
+                raise ValueError(f"{os.fspath(path)!r} is not a row index")
+            offsets = array("q", f.read())
+        return cls(every, rows, size, mtime_ns, _little_endian(offsets))
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Writes the index to a sidecar file.
+        """
+        with open(path, "wb") as f:
+            f.write(_ROW_INDEX_HEADER.pack(
+                _ROW_INDEX_MAGIC, _ROW_INDEX_VERSION, self.every, self.rows, self.size, self.mtime_ns
+            ))
+            f.write(_little_endian(self.offsets).tobytes())
+
+    @classmethod
+    def open(
+        cls,
+        path: Union[str, os.PathLike],
+        every: int = 1000,
+        dialect: Dialect = default_dialect,
+        has_header: bool = True,
+        encoding: str = "utf-8",
+    ) -> "RowIndex":
+        """
+        Returns the index stored next to `path` as `<path>.idx`, building and saving it
+        first when it is missing or the file has changed since it was built.
+        """
+        index_path = f"{os.fspath(path)}.idx"
+        try:
+            index = cls.load(index_path)
+        except (OSError, ValueError):
+            index = None
+        if index is None or index.every != every or not index.is_current(path):
+            index = cls.build(path, every, dialect, has_header, encoding)
+            index.save(index_path)
+        return index
+
+    def is_current(self, path: Union[str, os.PathLike]) -> bool:
+        """
+        Whether `path` is unchanged since the index was built.
+        """
+        stat = os.stat(path)
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def locate(self, row: int) -> Tuple[int, int]:
+        """
+        Finds where to start reading to reach a row.
+
+        Args:
+            row (int): The row number, counting from 0 after the header.
+
+        Returns:
+            Tuple[int, int]: The byte offset to seek to and the number of rows to step over
+                from there. Rows past the end resolve to the end of the file.
+
+        Raises:
+            IndexError: Raised if `row` is negative.
+        """
+        if row < 0:
+            raise IndexError("row index out of range")
+        if row >= self.rows:
+            return self.size, 0
+        checkpoint, skip = divmod(row, self.every)
+        return self.offsets[checkpoint], skip
+
+
+def _key_values(value, names: List[str]) -> Iterator[Any]:
+    # Resolves a key path, fanning out over arrays and arrays of objects
+    if isinstance(value, list):
+        for item in value:
+            yield from _key_values(item, names)
+    elif names:
+        yield from _key_values(value[names[0]], names[1:])
+    elif value is not None:
+        yield value
+
+
+class KeyIndex:
+    """
+    Maps the values of a key field to the byte offsets of the rows holding them.
+
+    Keys are stored sorted, as one block of encoded key bytes with the end position of
+    every key and the offset of its row, and are found by binary search. Fields of nested
+    objects are addressed with dotted paths such as `User.Name`. When the path leads
+    through an array, every item is indexed, so a row can be found by any of its values.
+
+    Example:
+        index = KeyIndex.open("users.mhn", "User.Name")
+        with MmapDictReader("users.mhn", read_schema_from_first_row=True, key_index=index) as reader:
+            rows = reader.lookup("Alice")
+
+    Attributes:
+        key (str): The path of the key field.
+        size (int): The size of the file in bytes when the index was built.
+        mtime_ns (int): The modification time of the file when the index was built.
+        offsets (array.array): The byte offset of the row of each entry, in key order.
+        ends (array.array): The end position of each entry's key within `keys`.
+        keys (bytes): The encoded keys of all entries, sorted.
+    """
+    def __init__(
+        self,
+        key: str,
+        size: int,
+        mtime_ns: int,
+        offsets: array,
+        ends: array,
+        keys: bytes,
+        encoding: str = "utf-8",
+    ) -> None:
+        self.key = key
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.offsets = offsets
+        self.ends = ends
+        self.keys = keys
+        self.encoding = encoding
+
+    @classmethod
+    def build(
+        cls,
+        path: Union[str, os.PathLike],
+        key: str,
+        schema: Union[str, CompiledSchema] = None,
+        dialect: Dialect = default_dialect,
+        has_header: bool = True,
+        encoding: str = "utf-8",
+        block_size: int = 1024 * 1024,
+    ) -> "KeyIndex":
+        """
+        Indexes a file in one pass, reading it in blocks of `block_size` bytes. Only the
+        fields up to the key are scanned in each row.
+
+        Args:
+            path (Union[str, os.PathLike]): The MHN file to index.
+            key (str): The path of the key field, such as `"Id"` or `"User.Name"`.
+            schema (Union[str, CompiledSchema], optional): The schema of the rows. Defaults
+                to the header of the file.
+            dialect (Dialect, optional): The dialect the data is written in.
+            has_header (bool, optional): Whether the first row is the schema. Defaults to True.
+            encoding (str, optional): The encoding of the file. Defaults to UTF-8.
+            block_size (int, optional): The number of bytes to read at a time.
+
+        Raises:
+            ValueError: Raised if the key is not a field of the schema.
+        """
+        if schema is None and not has_header:
+            raise ValueError("A schema must be provided or read from the first row")
+
+        names = key.split(".")
+        record = get_scanner(dialect).record
+        entries = set()
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            lines = _iter_lines(f, dialect.line_break.encode(encoding), block_size)
+            if has_header:
+                header = next(lines, None)
+                if schema is None:
+                    if header is None:
+                        raise ValueError("A schema must be provided or read from the first row")
+                    _, data, start, end = header
+                    schema = data[start:end].decode(encoding).rstrip()
+            projected = compile_schema(schema, dialect).project([key])
+
+            for offset, data, start, end in lines:
+                line = data[start:end].decode(encoding)
+                if line.endswith("\r"):
+                    line = line[:-1]
+                for value in _key_values(record(line, projected), names):
+                    entries.add((str(value).encode(encoding), offset))
+
+        offsets = array("q")
+        ends = array("q")
+        keys = []
+        end = 0
+        for value, offset in sorted(entries):
+            end += len(value)
+            keys.append(value)
+            ends.append(end)
+            offsets.append(offset)
+        return cls(key, stat.st_size, stat.st_mtime_ns, offsets, ends, b"".join(keys), encoding)
+
+    @classmethod
+    def load(cls, path: Union[str, os.PathLike], encoding: str = "utf-8") -> "KeyIndex":
+        """
+        Reads an index saved with `save`.
+        """
+        with open(path, "rb") as f:
+            header = f.read(_KEY_INDEX_HEADER.size)
+            if len(header) < _KEY_INDEX_HEADER.size:
+                raise ValueError(f"{os.fspath(path)!r} is not a key index")
+            magic, version, count, size, mtime_ns, key_size = _KEY_INDEX_HEADER.unpack(header)
+            if magic != _KEY_INDEX_MAGIC or version != _KEY_INDEX_VERSION:
+                raise ValueError(f"{os.fspath(path)!r} is not a key index")
+            key = f.read(key_size).decode("utf-8")
+            offsets = array("q", f.read(count * 8))
+            ends = array("q", f.read(count * 8))
+            keys = f.read()
+        return cls(
+            key, size, mtime_ns, _little_endian(offsets), _little_endian(ends), keys, encoding
+        )
+
+    def save(self, path: Union[str, os.PathLike]) -> None:
+        """
+        Writes the index to a sidecar file.
+        """
+        key = self.key.encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(_KEY_INDEX_HEADER.pack(
+                _KEY_INDEX_MAGIC, _KEY_INDEX_VERSION, len(self), self.size, self.mtime_ns, len(key)
+            ))
+            f.write(key)
+            f.write(_little_endian(self.offsets).tobytes())
+            f.write(_little_endian(self.ends).tobytes())
+            f.write(self.keys)
+
+    @classmethod
+    def open(
+        cls,
+        path: Union[str, os.PathLike],
+        key: str,
+        schema: Union[str, CompiledSchema] = None,
+        dialect: Dialect = default_dialect,
+        has_header: bool = True,
+        encoding: str = "utf-8",
+    ) -> "KeyIndex":
+        """
+        Returns the index stored next to `path` as `<path>.<key>.idx`, building and saving
+        it first when it is missing or the file has changed since it was built.
+        """
+        index_path = f"{os.fspath(path)}.{key}.idx"
+        try:
+            index = cls.load(index_path, encoding)
+        except (OSError, ValueError):
+            index = None
+        if index is None or index.key != key or not index.is_current(path):
+            index = cls.build(path, key, schema, dialect, has_header, encoding)
+            index.save(index_path)
+        return index
+
+    def is_current(self, path: Union[str, os.PathLike]) -> bool:
+        """
+        Whether `path` is unchanged since the index was built.
+        """
+        stat = os.stat(path)
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __contains__(self, key) -> bool:
+        return bool(self.find(key))
+
+    def _key(self, position: int) -> bytes:
+        return self.keys[self.ends[position - 1] if position else 0:self.ends[position]]
+
+    def find(self, key) -> List[int]:
+        """
+        Returns the byte offsets of the rows holding `key`, in file order. Keys are compared
+        as text, so `find(1)` finds the rows whose key reads `1`.
+        """
+        target = str(key).encode(self.encoding)
+        low, high = 0, len(self.offsets)
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+
+        offsets = []
+        while low < len(self.offsets) and self._key(low) == target:
+            offsets.append(self.offsets[low])
+            low += 1
+        return offsets
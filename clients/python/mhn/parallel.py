@@ -0,0 +1,240 @@
+import mmap
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from io import IOBase
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+from .dialect import Dialect, default_dialect
+from .schema import CompiledSchema, compile_schema
+from .scanner import get_scanner
+from .writer import DictWriter
+
+
+def _parse_range(
+    path: Union[str, os.PathLike], start: int, end: int, schema: CompiledSchema, encoding: str
+) -> List[dict]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    line_break = schema.dialect.line_break
+    lines = data.decode(encoding).split(line_break)
+    record = get_scanner(schema.dialect).record
+    return [record(line.rstrip("\r"), schema) for line in lines if line and line != "\r"]
+
+
+def _serialize_rows(schema: CompiledSchema, rows: List[dict], escape_cache_size: int = 0) -> str:
+    convert = DictWriter(
+        None, schema, schema.dialect, escape_cache_size=escape_cache_size
+    ).convert_dict_to_mhn
+    line_break = schema.dialect.line_break
+    return "".join([f"{line_break}{convert(row)}" for row in rows])
+
+
+def split_ranges(
+    path: Union[str, os.PathLike],
+    start: int = 0,
+    chunk_size: int = 16 * 1024 * 1024,
+    dialect: Dialect = default_dialect,
+    encoding: str = "utf-8",
+) -> List[Tuple[int, int]]:
+    """
+    Splits a file into byte ranges of roughly `chunk_size` bytes that start and end on
+    record boundaries.
+
+    The writer escapes every line break inside a value, so each raw line break in the
+    file ends a record and a range never cuts through one.
+
+    Args:
+        path (Union[str, os.PathLike]): The path of the MHN file.
+        start (int, optional): The offset of the first record, after any header row.
+        chunk_size (int, optional): The target size of each range in bytes.
+        dialect (Dialect, optional): The dialect the data is written in.
+        encoding (str, optional): The encoding of the file.
+
+    Returns:
+        List[Tuple[int, int]]: The `(start, end)` byte offsets of each range.
+    """
+    line_break = dialect.line_break.encode(encoding)
+    ranges = []
+
+    with open(path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return ranges
+
+        with data:
+            size = len(data)
+            while start < size:
+                end = data.find(line_break, start + chunk_size)
+                end = size if end == -1 else end + len(line_break)
+                ranges.append((start, end))
+                start = end
+
+    return ranges
+
+
+class ParallelDictReader:
+    """
+    A reader class that parses one MHN file in several processes.
+
+    The file is split into byte ranges aligned to record boundaries and each range is
+    read and parsed by a worker process. Rows are yielded in file order, or as soon as
+    their range is parsed when `ordered` is False.
+
+    Example:
+        reader = ParallelDictReader("archive.mhn", read_schema_from_first_row=True, workers=8)
+        for row in reader:
+            print(row)
+
+    Args:
+        path (Union[str, os.PathLike]): The path of the MHN file.
+        schema (Union[str, CompiledSchema], optional): The schema of the rows.
+        dialect (Dialect, optional): The dialect the data is written in.
+        read_schema_from_first_row (bool, optional): Read the schema from the first row of the file.
+        workers (int, optional): The number of worker processes. Defaults to the CPU count.
+        chunk_size (int, optional): The target size in bytes of the range each worker parses at a time.
+        ordered (bool, optional): Yield rows in file order. Defaults to True.
+        encoding (str, optional): The encoding of the file. Defaults to UTF-8.
+        columns (Iterable[str], optional): Only read these field paths, see `DictReader`.
+    """
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        schema: Union[str, CompiledSchema] = None,
+        dialect: Dialect = default_dialect,
+        read_schema_from_first_row: bool = False,
+        workers: int = None,
+        chunk_size: int = 16 * 1024 * 1024,
+        ordered: bool = True,
+        encoding: str = "utf-8",
+        columns: Iterable[str] = None,
+    ) -> None:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        self.path = path
+        self.dialect = dialect
+        self.read_schema_from_first_row = read_schema_from_first_row
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.ordered = ordered
+        self.encoding = encoding
+        self._data_start = 0
+
+        if read_schema_from_first_row:
+            with open(path, "rb") as f:
+                header = f.readline()
+            self._data_start = len(header)
+            schema = header.decode(encoding).rstrip()
+        elif not schema:
+            raise ValueError("A schema must be provided or read from the first row")
+
+        self.compiled_schema = compile_schema(schema, dialect)
+        if columns is not None:
+            self.compiled_schema = self.compiled_schema.project(columns)
+        self.schema = self.compiled_schema.schema
+
+    def __iter__(self) -> Iterator[Dict[str, Union[str, List[str]]]]:
+        for batch in self.iter_batches():
+            yield from batch
+
+    def iter_batches(self) -> Iterator[List[Dict[str, Union[str, List[str]]]]]:
+        """
+        Yields the parsed rows of each byte range as a list.
+        """
+        ranges = deque(split_ranges(
+            self.path, self._data_start, self.chunk_size, self.dialect, self.encoding
+        ))
+        # Bound the number of parsed ranges held in memory at once
+        window = 2 * self.workers
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            def submit():
+                start, end = ranges.popleft()
+                return executor.submit(
+                    _parse_range, self.path, start, end, self.compiled_schema, self.encoding
+                )
+
+            pending = deque(submit() for _ in range(min(window, len(ranges))))
+            while pending:
+                if self.ordered:
+                    done = pending.popleft()
+                else:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    done = finished.pop()
+                    pending.remove(done)
+                if ranges:
+                    pending.append(submit())
+                yield done.result()
+
+
+class ParallelDictWriter(DictWriter):
+    """
+    A writer class that serializes rows in several processes.
+
+    `writerows` splits its input into batches of `batch_rows` rows, serializes the
+    batches to MHN text in worker processes and writes them to the output in input
+    order. Only a few batches per worker are held in memory at once, so generators of
+    any length can be written.
+
+    Example:
+        writer = ParallelDictWriter(output_file, schema, workers=8)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    Args:
+        f (IOBase): A file-like object to write the MHN data to.
+        schema (Union[str, CompiledSchema]): The schema to use when writing the MHN data.
+        dialect (Dialect, optional): The dialect to use when writing the MHN data.
+        workers (int, optional): The number of worker processes. Defaults to the CPU count.
+        batch_rows (int, optional): The number of rows serialized per worker task.
+        escape_cache_size (int, optional): The size of the cache of escaped values of each
+            batch, see `DictWriter`. Defaults to 0, no cache.
+    """
+    def __init__(
+        self,
+        f: IOBase,
+        schema: Union[str, CompiledSchema],
+        dialect: Dialect = default_dialect,
+        workers: int = None,
+        batch_rows: int = 10000,
+        escape_cache_size: int = 0,
+    ) -> None:
+        super().__init__(f, schema, dialect, escape_cache_size=escape_cache_size)
+        if batch_rows < 1:
+            raise ValueError("batch_rows must be positive")
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_rows = batch_rows
+        self.escape_cache_size = escape_cache_size
+
+    def writerows(self, rows: Iterable[dict]) -> None:
+        """
+        Write rows of data to the output file, serializing them in worker processes.
+
+        Args:
+            rows (Iterable[dict]): The rows to write. Any iterable, including a generator.
+        """
+        self._write_buffer()
+        rows = iter(rows)
+        batch_rows = self.batch_rows
+        write = self._output.write
+        # Bound the number of batches held in memory at once
+        window = 2 * self.workers
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            while True:
+                while len(pending) < window:
+                    batch = list(islice(rows, batch_rows))
+                    if not batch:
+                        break
+                    pending.append(executor.submit(
+                        _serialize_rows, self.compiled_schema, batch, self.escape_cache_size
+                    ))
+                if not pending:
+                    break
+                write(pending.popleft().result())
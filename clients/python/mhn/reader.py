@@ -1,106 +1,966 @@
+import mmap
+import os
+from array import array
 from io import IOBase
-from typing import Dict, List, Union
+from functools import partial
+from itertools import islice
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Union
 from .dialect import Dialect, default_dialect
-from .schema import generate_schema
-from .utilities import unescape, parse_array, unescape_newlines, split_nested
+from .codegen import compile_parser
+from .index import KeyIndex, RowIndex
+from .records import RowFactory, record_parser
+from .rows import LazyRow
+from .schema import CompiledSchema, FieldKind, SchemaField, compile_schema
+from .scanner import BytesScanner, Scanner, get_bytes_scanner, get_scanner
+from .stats import Stats
+from .utilities import escape
+
+
+def _resolve(row: dict, path: List[str]):
+    value = row
+    for name in path:
+        if isinstance(value, list):
+            # Paths through arrays of objects resolve to one value per item
+            value = [item[name] for item in value]
+        else:
+            value = value[name]
+    return value
+
+
+def _filter_needles(where: Dict[str, Any], dialect: Dialect) -> List[str]:
+    # The escaped string literals of `where`, each of which a matching line contains
+    return [
+        escape(expected, dialect)
+        for expected in where.values()
+        if isinstance(expected, str) and expected
+    ]
+
+
+def compile_filter(
+    schema: Union[str, CompiledSchema],
+    where: Dict[str, Any],
+    dialect: Dialect = default_dialect,
+    scanner: Scanner = None,
+) -> Callable[[str], bool]:
+    """
+    Builds a function that tells whether a raw MHN line matches a set of conditions.
+
+    Only the fields named in `where` are extracted from the line. String literals are
+    first looked up in escaped form as substrings of the line, which rejects most
+    non-matching lines before any field is scanned.
+
+    Args:
+        schema (Union[str, CompiledSchema]): The schema of the rows.
+        where (Dict[str, Any]): Maps field paths such as `"User.Name"` to either a literal
+            the field must equal, or a callable that receives the field value and returns
+            whether the row matches. Paths through arrays of objects resolve to a list with
+            one value per item.
+        dialect (Dialect, optional): The dialect the data is written in.
+        scanner (Scanner, optional): The scanner to extract fields with.
+
+    Returns:
+        Callable[[str], bool]: The filter function.
+    """
+    schema = compile_schema(schema, dialect)
+    scanner = scanner or get_scanner(dialect)
+    record = partial(scanner.record, schema=schema.project(where))
+    needles = [scanner.encode(needle) for needle in _filter_needles(where, dialect)]
+    conditions = [
+        (path.split("."), callable(expected), expected) for path, expected in where.items()
+    ]
+
+    def matches(line: str) -> bool:
+        for needle in needles:
+            if needle not in line:
+                return False
+        row = record(line)
+        for path, is_callable, expected in conditions:
+            value = _resolve(row, path)
+            if is_callable:
+                if not expected(value):
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+    return matches
+
+
+_ARRAY_TYPECODES = {int: "q", float: "d"}
+
+
+class DictionaryColumn:
+    """
+    A dictionary encoded column: every distinct value is stored once in `values`, and
+    `codes` holds the position of the value of each row in `values`.
+
+    The column reads like a sequence of its values, and `codes` and `values` map directly
+    onto categorical types such as `pandas.Categorical.from_codes(codes, values)`.
+
+    Attributes:
+        codes (array.array): The code of each row, as C ints, or a NumPy array of them.
+        values (List[str]): The distinct values in order of first appearance.
+    """
+    __slots__ = ("codes", "values", "_index")
+
+    def __init__(self) -> None:
+        self.codes = array("i")
+        self.values = []
+        self._index = {}
+
+    def append(self, value) -> None:
+        index = self._index
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def decode(self) -> list:
+        """
+        Returns the values of all rows as a list.
+        """
+        values = self.values
+        return [values[code] for code in self.codes]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int):
+        return self.values[self.codes[index]]
+
+    def __iter__(self) -> Iterator:
+        return iter(self.decode())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(rows={len(self.codes)}, values={len(self.values)})"
+
+
+def _converting_append(append: Callable, convert: Callable) -> Callable:
+    return lambda value: append(convert(value))
+
+
+def _column_plan(
+    schema: CompiledSchema,
+    prefix: str,
+    columns: Dict[str, list],
+    fields: Dict[str, SchemaField],
+    dictionary: Union[bool, set] = None,
+) -> list:
+    # Pairs each scanned field with the append method of its column, a nested plan for
+    # nested objects, or None for fields a projection skips
+    plan = []
+    for field in schema.scan_fields:
+        name = f"{prefix}{field.name}"
+        if not field.selected:
+            plan.append((field, None))
+        elif field.kind is FieldKind.OBJECT:
+            plan.append((field, _column_plan(field.schema, f"{name}.", columns, fields, dictionary)))
+        else:
+            fields[name] = field
+            plan.append((field, _column_target(field, name, columns, dictionary)))
+    return plan
+
+
+def _column_target(
+    field: SchemaField, name: str, columns: Dict[str, list], dictionary: Union[bool, set]
+) -> Callable:
+    untyped_scalar = field.kind is FieldKind.SCALAR and field.type is str
+    if dictionary is True and untyped_scalar or dictionary and dictionary is not True and name in dictionary:
+        if not untyped_scalar:
+            raise ValueError(f"Only untyped scalar columns can be dictionary encoded, got {name!r}")
+        column = columns[name] = DictionaryColumn()
+        return column.append
+
+    append = columns.setdefault(name, []).append
+    if untyped_scalar and field.convert is not None:
+        # Values of interned fields are interned as they are read
+        return _converting_append(append, field.convert)
+    return append
+
+
+def _scan_columns(scanner: Scanner, line: str, pos: int, plan: list) -> int:
+    delimiter = scanner.delimiter
+    for index, (field, target) in enumerate(plan):
+        if index:
+            if not line.startswith(delimiter, pos):
+                raise scanner.malformed(line, pos, f"{scanner.dialect.delimiter!r} before {field.name!r}")
+            pos += 1
+
+        kind = field.kind
+        if target is None:
+            pos = scanner.skip(line, pos, field)
+        elif kind is FieldKind.SCALAR:
+            value, pos = scanner.scalar(line, pos)
+            target(value)
+        elif kind is FieldKind.ARRAY:
+            value, pos = scanner.array(line, pos)
+            if field.convert is not None:
+                value = list(map(field.convert, value))
+            target(value)
+        elif kind is FieldKind.OBJECT:
+            pos = _scan_columns(scanner, line, scanner.start_level(line, pos, field), target)
+            pos = scanner.end_level(line, pos, field.schema)
+        else:
+            value, pos = scanner.object_array(line, pos, field.schema)
+            target(value)
+    return pos
+
+
+def _convert_columns(
+    columns: Dict[str, list],
+    fields: Dict[str, SchemaField],
+    types: Dict[str, Callable],
+    numpy: bool,
+) -> Dict[str, Any]:
+    if numpy:
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("NumPy output requires the numpy package") from None
+
+    types = types or {}
+    for name in types:
+        if name not in columns:
+            raise ValueError(f"Unknown column {name!r}")
+
+    # Scalar columns are converted in bulk once all rows are read, with the type passed
+    # in `types` or else the one declared in the schema
+    for name, field in fields.items():
+        if field.kind is FieldKind.SCALAR:
+            _convert_column(columns, name, field, types.get(name))
+
+    if numpy:
+        for name, values in columns.items():
+            columns[name] = _numpy_column(np, values)
+
+    return columns
+
+
+def _convert_column(
+    columns: Dict[str, list], name: str, field: SchemaField, convert: Callable
+) -> None:
+    if convert is None and (field.convert is None or field.type is str):
+        return
+    if isinstance(columns[name], DictionaryColumn):
+        raise ValueError(f"Dictionary encoded column {name!r} cannot be converted")
+    typecode = _ARRAY_TYPECODES.get(convert or field.type)
+    if typecode is not None:
+        try:
+            columns[name] = array(typecode, map(convert or field.type, columns[name]))
+            return
+        except ValueError:
+            # Empty values read as None, which arrays cannot hold
+            if convert is not None:
+                raise
+    columns[name] = list(map(convert or field.convert, columns[name]))
+
+
+def _numpy_column(np, values):
+    if isinstance(values, DictionaryColumn):
+        values.codes = np.frombuffer(values.codes, dtype=np.intc)
+        return values
+    if isinstance(values, array):
+        return np.frombuffer(values, dtype=np.int64 if values.typecode == "q" else np.float64)
+    # Filled one by one so list values stay objects instead of becoming a new axis
+    column = np.empty(len(values), dtype=object)
+    for index, value in enumerate(values):
+        column[index] = value
+    return column
 
 
 class DictReader:
+    """
+    A reader class for reading MHN formatted data as dictionaries.
+
+    Example:
+        reader = DictReader(input_file, read_schema_from_first_row=True)
+        for row in reader:
+            print(row)
+
+        reader = DictReader(input_file, schema, block_size=1024 * 1024)
+        for batch in reader.iter_batches(10000):
+            process(batch)
+
+    Args:
+        f (IOBase): A file-like object to read the MHN data from.
+        schema (Union[str, CompiledSchema], optional): The schema of the rows.
+        dialect (Dialect, optional): The dialect the data is written in.
+        read_schema_from_first_row (bool, optional): Read the schema from the first row of `f`.
+        block_size (int, optional): When set, read `f` in blocks of this many characters
+            instead of one `readline` call per row. Blank lines are skipped in this mode,
+            while line by line reading stops at the first blank line.
+        lazy (bool, optional): Return `LazyRow` mappings that decode each field on first
+            access instead of fully parsed dictionaries.
+        columns (Iterable[str], optional): Only read these field paths, such as
+            `["Id", "User.Name", "Tags"]`. Other fields are stepped over without being
+            sliced or unescaped and are left out of the rows.
+        where (Dict[str, Any], optional): Only return rows matching these conditions, see
+            `compile_filter`. Rows are fully parsed only once they are known to match.
+        index (RowIndex, optional): The row index of the file, which enables `seek_row` and
+            indexing or slicing the reader such as `reader[1000:1100]`. `f` must be a file
+            whose positions are byte offsets, such as a file opened from disk.
+        key_index (KeyIndex, optional): An index of the values of a key field, which
+            enables `lookup`. `f` must be a file whose positions are byte offsets.
+        stats (Union[Stats, bool], optional): Collect counters and per stage timings into
+            this `Stats` instance, or a new one for True, available as `reader.stats`.
+        row_factory (Union[str, type, Dict[str, type]], optional): Return compact records
+            instead of dictionaries: `"record"` for generated named tuples, one class per
+            nested level, or classes of your own such as slotted dataclasses, see
+            `record_parser`. Cannot be combined with `lazy`.
+        intern (Union[bool, Iterable[str]], optional): Make equal values of these field paths,
+            or of all fields for True, share one object, see `CompiledSchema.intern`.
+        intern_size (int, optional): The maximum number of distinct values interned per
+            field. Defaults to 65536.
+        codegen (bool, optional): Parse rows with a function generated for this schema and
+            dialect, see `codegen.compile_parser`. Applies to dictionary rows, and falls
+            back to the generic parser for scanners it does not support.
+    """
     def __init__(
         self,
         f: IOBase,
-        schema: str = None,
+        schema: Union[str, CompiledSchema] = None,
         dialect: Dialect = default_dialect,
         read_schema_from_first_row: bool = False,
+        block_size: int = None,
+        lazy: bool = False,
+        columns: Iterable[str] = None,
+        where: Dict[str, Any] = None,
+        index: RowIndex = None,
+        key_index: KeyIndex = None,
+        stats: Union[Stats, bool] = None,
+        row_factory: RowFactory = None,
+        intern: Union[bool, Iterable[str]] = None,
+        intern_size: int = 65536,
+        codegen: bool = False,
     ) -> None:
         self.input = f
         self.dialect = dialect
         self.read_schema_from_first_row = read_schema_from_first_row
+        self.block_size = block_size
+        self.lazy = lazy
+        self.index = index
+        self.key_index = key_index
+        self.stats = Stats() if stats is True else stats or None
+        self.row_factory = row_factory
+        self.codegen = codegen
+
+        if block_size is not None and block_size < 1:
+            raise ValueError("block_size must be positive")
+        if lazy and row_factory is not None:
+            raise ValueError("lazy and row_factory cannot be combined")
 
         if read_schema_from_first_row:
-            self.schema = self.input.readline().rstrip()
-        elif schema:
-            self.schema = schema
-        else:
+            schema = self.input.readline().rstrip()
+        elif not schema:
             raise ValueError("A schema must be provided or read from the first row")
 
+        self.compiled_schema = compile_schema(schema, dialect)
+        if columns is not None:
+            self.compiled_schema = self.compiled_schema.project(columns)
+        if intern:
+            self.compiled_schema = self.compiled_schema.intern(
+                None if intern is True else intern, intern_size
+            )
+        self.schema = self.compiled_schema.schema
+        self._scanner = self._make_scanner()
+        self._blocks = self._open_lines() if block_size or self.stats else None
+        self._parse_row = self._row_parser()
+        self._matches = (
+            compile_filter(self.schema, where, dialect, self._scanner) if where else None
+        )
+        if self.stats is not None and self._matches is not None:
+            self._matches = self.stats.track_filter(self._matches)
+
     def __iter__(self):
         return self
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the input file.
+        """
+        if self.input is not None:
+            self.input.close()
+
     def __next__(self) -> Dict[str, Union[str, List[str]]]:
-        line = self.input.readline().rstrip()
-        if not line:
-            raise StopIteration
+        matches = self._matches
+        while True:
+            if self._blocks is not None:
+                line = next(self._blocks)
+            else:
+                line = self.input.readline().rstrip("\r\n")
+                if not line:
+                    raise StopIteration
 
-        row_data = self._parse_mhn_string(line, self.schema)
+            if matches is None or matches(line):
+                break
+
+        row_data = self._parse_row(line)
         return row_data
-    
-    def split_nested(data, dialect:Dialect):
-        parts = []
-        current_part = []
-        nesting_level = 0
-
-        for char in data:
-            if char == dialect.level_start:
-                nesting_level += 1
-            elif char == dialect.level_end:
-                nesting_level -= 1
-            elif char == dialect.delimiter and nesting_level == 0:
-                parts.append("".join(current_part))
-                current_part = []
-                continue
-
-            current_part.append(char)
-
-        parts.append("".join(current_part))
-        return parts
-    
-    def _parse_level(self, data_line, schema_line):
-        result = {}
-        data_parts = split_nested(
-            data_line,
-            self.dialect
+
+    def __getitem__(self, key: Union[int, slice]):
+        """
+        Reads a row, or a list of rows for a slice, by its position in the file. Requires
+        a row index. The reader continues after the rows returned.
+        """
+        index = self._require_index()
+        if isinstance(key, slice):
+            start, stop, step = key.indices(index.rows)
+            if step < 1:
+                raise ValueError("slice step must be positive")
+            self.seek_row(start)
+            lines = islice(self._lines(), 0, max(stop - start, 0), step)
+            if self._matches is not None:
+                lines = filter(self._matches, lines)
+            return list(map(self._parse_row, lines))
+
+        if key < 0:
+            key += index.rows
+        if not 0 <= key < index.rows:
+            raise IndexError("row index out of range")
+        self.seek_row(key)
+        return self._parse_row(next(self._lines()))
+
+    def seek_row(self, n: int) -> None:
+        """
+        Moves the reader to the `n`th row of the file, counting from 0 after the header,
+        without parsing the rows before it. Requires a row index.
+
+        Rows are counted in the file regardless of `where`, and negative numbers count from
+        the end of the file.
+
+        Args:
+            n (int): The row to read next.
+        """
+        index = self._require_index()
+        if n < 0:
+            n += index.rows
+        offset, skip = index.locate(n)
+        self._seek(offset)
+        lines = self._lines()
+        for _ in islice(lines, skip):
+            pass
+
+    def lookup(self, key) -> List[Dict[str, Union[str, List[str]]]]:
+        """
+        Reads the rows whose key field holds `key`, seeking straight to each of them.
+        Requires a key index. Rows that do not match `where` are left out.
+
+        Args:
+            key: The key value to look up.
+
+        Returns:
+            List[dict]: The matching rows, in file order.
+        """
+        if self.key_index is None:
+            raise ValueError("Lookups require a key index")
+
+        rows = []
+        for offset in self.key_index.find(key):
+            self._seek(offset)
+            line = next(self._lines(), None)
+            if line is not None and (self._matches is None or self._matches(line)):
+                rows.append(self._parse_row(line))
+        return rows
+
+    def _require_index(self) -> RowIndex:
+        if self.index is None:
+            raise ValueError("Random access requires a row index")
+        return self.index
+
+    def _seek(self, offset: int) -> None:
+        self.input.seek(offset)
+        if self._blocks is not None:
+            self._blocks = self._open_lines()
+
+    def _make_scanner(self) -> Scanner:
+        return get_scanner(self.dialect)
+
+    def _open_lines(self) -> Iterator[str]:
+        lines = self._read_source()
+        if self.stats is not None:
+            scanner = self._scanner
+            lines = self.stats.track_lines(lines, scanner.escape_char, scanner.line_break)
+        return lines
+
+    def _read_source(self) -> Iterator[str]:
+        return self._read_blocks() if self.block_size else self._read_lines()
+
+    def _lines(self) -> Iterator[str]:
+        # The raw rows left to read, shared with __next__ in block mode
+        return self._blocks if self._blocks is not None else self._read_lines()
+
+    def _matching_lines(self) -> Iterator[str]:
+        lines = self._lines()
+        return lines if self._matches is None else filter(self._matches, lines)
+
+    def iter_batches(self, size: int) -> Iterator[List[Dict[str, Union[str, List[str]]]]]:
+        """
+        Yields the remaining rows in lists of up to `size` parsed rows.
+
+        Args:
+            size (int): The number of rows per batch.
+        """
+        if size < 1:
+            raise ValueError("size must be positive")
+
+        parse_row = self._parse_row
+        lines = self._matching_lines()
+        while True:
+            batch = [parse_row(line) for line in islice(lines, size)]
+            if not batch:
+                return
+            yield batch
+
+    def read_columns(
+        self,
+        types: Dict[str, Callable] = None,
+        numpy: bool = False,
+        dictionary: Union[bool, Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Reads the remaining rows into columns instead of one dictionary per row.
+
+        Nested fields are flattened to dotted names such as `"User.Name"`. Array fields and
+        arrays of objects hold one list per row.
+
+        Args:
+            types (Dict[str, Callable], optional): Maps column names to a type to convert the
+                values with, overriding the type tags of the schema. `int` and `float` columns
+                are returned as `array.array`, other types as lists of converted values.
+            numpy (bool, optional): Return NumPy arrays. Typed numeric columns become int64 or
+                float64 arrays and all other columns object arrays.
+            dictionary (Union[bool, Iterable[str]], optional): Return these columns, or all
+                untyped scalar columns for True, as `DictionaryColumn`s of integer codes and
+                a table of their distinct values. With `numpy`, the codes are a NumPy array.
+
+        Returns:
+            Dict[str, Any]: The columns by name, in schema order.
+        """
+        lines = self._matching_lines()
+        stats = self.stats
+        if stats is None:
+            return _read_columns(lines, self.compiled_schema, self._scanner, types, numpy, dictionary)
+
+        # Rows are scanned straight into the columns, so parsing is timed as a whole
+        timers = stats.timers
+        other_stages = timers["read"] + timers["filter"]
+        start = perf_counter()
+        columns = _read_columns(lines, self.compiled_schema, self._scanner, types, numpy, dictionary)
+        timers["parse"] += perf_counter() - start - (timers["read"] + timers["filter"] - other_stages)
+        stats.count_rows(len(next(iter(columns.values()), ())), self.compiled_schema)
+        return columns
+
+    def _row_parser(self) -> Callable[[str], Dict[str, Union[str, List[str]]]]:
+        # Returns the function turning a raw line into the row handed to the caller
+        if self.lazy:
+            parse_row = partial(LazyRow, schema=self.compiled_schema, scanner=self._scanner)
+        elif self.row_factory is not None:
+            parse_row = record_parser(self.compiled_schema, self._scanner, self.row_factory)
+        else:
+            parse_row = None
+            if self.codegen:
+                parse_row = compile_parser(self.compiled_schema, self._scanner)
+            if parse_row is None:
+                parse_row = partial(self._scanner.record, schema=self.compiled_schema)
+        if self.stats is not None:
+            parse_row = self.stats.track_parser(parse_row, self.compiled_schema)
+        return parse_row
+
+    def _read_lines(self) -> Iterator[str]:
+        readline = self.input.readline
+        while True:
+            line = readline().rstrip("\r\n")
+            if not line:
+                return
+            yield line
+
+    def _read_blocks(self) -> Iterator[str]:
+        read = self.input.read
+        block_size = self.block_size
+        line_break = self.dialect.line_break
+        tail = ""
+
+        while True:
+            block = read(block_size)
+            if not block:
+                break
+
+            text = tail + block if tail else block
+            lines = text.split(line_break)
+            # The last line of a block is incomplete until the next block is read
+            tail = lines.pop()
+            if "\r" in text:
+                lines = [line.rstrip("\r") for line in lines]
+            yield from filter(None, lines)
+
+        tail = tail.rstrip("\r")
+        if tail:
+            yield tail
+
+    def _parse_mhn_string(self, data_str, schema_str):
+        # Escapes are resolved by the scanner while it finds the delimiters
+        return self._scanner.record(data_str, compile_schema(schema_str, self.dialect))
+
+
+class MmapDictReader(DictReader):
+    """
+    A reader class for reading MHN files through a memory map.
+
+    Record boundaries are found directly in the mapped file and only the records that
+    are parsed are decoded, so page cache backed reads never copy the whole file into
+    Python strings. Blank lines are skipped.
+
+    Example:
+        with MmapDictReader("archive.mhn", read_schema_from_first_row=True) as reader:
+            for row in reader:
+                print(row)
+
+    Args:
+        path (Union[str, os.PathLike]): The path of the MHN file.
+        schema (Union[str, CompiledSchema], optional): The schema of the rows.
+        dialect (Dialect, optional): The dialect the data is written in.
+        read_schema_from_first_row (bool, optional): Read the schema from the first row of the file.
+        encoding (str, optional): The encoding of the file. Defaults to UTF-8.
+        lazy (bool, optional): Return `LazyRow` mappings, see `DictReader`.
+        columns (Iterable[str], optional): Only read these field paths, see `DictReader`.
+        where (Dict[str, Any], optional): Only return rows matching these conditions, see
+            `DictReader`.
+        index (RowIndex, optional): The row index of the file, see `DictReader`.
+        key_index (KeyIndex, optional): An index of the values of a key field, see `DictReader`.
+        stats (Union[Stats, bool], optional): Collect counters and timings, see `DictReader`.
+        row_factory (Union[str, type, Dict[str, type]], optional): Return records instead of
+            dictionaries, see `DictReader`.
+        intern (Union[bool, Iterable[str]], optional): Intern the values of these fields, see
+            `DictReader`.
+        intern_size (int, optional): The maximum number of distinct values interned per field.
+        codegen (bool, optional): Parse rows with a generated function, see `DictReader`.
+    """
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        schema: Union[str, CompiledSchema] = None,
+        dialect: Dialect = default_dialect,
+        read_schema_from_first_row: bool = False,
+        encoding: str = "utf-8",
+        lazy: bool = False,
+        columns: Iterable[str] = None,
+        where: Dict[str, Any] = None,
+        index: RowIndex = None,
+        key_index: KeyIndex = None,
+        stats: Union[Stats, bool] = None,
+        row_factory: RowFactory = None,
+        intern: Union[bool, Iterable[str]] = None,
+        intern_size: int = 65536,
+        codegen: bool = False,
+    ) -> None:
+        if not schema and not read_schema_from_first_row:
+            raise ValueError("A schema must be provided or read from the first row")
+
+        self.path = path
+        self.encoding = encoding
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            self._map = b""
+        self._view = memoryview(self._map)
+        self._line_break = dialect.line_break.encode(encoding)
+        self._offset = 0
+        self._needles = ()
+
+        if read_schema_from_first_row:
+            schema = self._read_record()
+        super().__init__(
+            None,
+            schema=schema,
+            dialect=dialect,
+            lazy=lazy,
+            columns=columns,
+            where=where,
+            index=index,
+            key_index=key_index,
+            stats=stats,
+            row_factory=row_factory,
+            intern=intern,
+            intern_size=intern_size,
+            codegen=codegen,
         )
-        schema_parts = split_nested(
-            schema_line,
-            self.dialect
+        self.read_schema_from_first_row = read_schema_from_first_row
+        if where and self.stats is None:
+            # Lines without every string literal of `where` are skipped before being
+            # decoded. Stats count every line, so they leave the filter to the text.
+            self._needles = tuple(
+                needle.encode(encoding) for needle in _filter_needles(where, dialect)
+            )
+        self._blocks = self._open_lines()
+
+    def close(self) -> None:
+        """
+        Unmap and close the file.
+        """
+        self._blocks.close()
+        self._view.release()
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def _seek(self, offset: int) -> None:
+        self._blocks.close()
+        self._offset = offset
+        self._blocks = self._open_lines()
+
+    def _read_source(self) -> Iterator[str]:
+        return self._read_records(self._needles)
+
+    def _lines(self) -> Iterator[str]:
+        if not self._needles:
+            return self._blocks
+        # Rows counted by position must include the lines the shared records skip. Both
+        # continue from `_offset`, and every caller seeks first, so the shared records
+        # have not started yet.
+        return self._read_records()
+
+    def _matching_lines(self) -> Iterator[str]:
+        return self._blocks if self._matches is None else filter(self._matches, self._blocks)
+
+    def _decode(self, start: int, end: int) -> str:
+        line = str(self._view[start:end], self.encoding)
+        return line[:-1] if line.endswith("\r") else line
+
+    def _read_record(self) -> str:
+        end = self._map.find(self._line_break, self._offset)
+        if end == -1:
+            end = len(self._map)
+        line = self._decode(self._offset, end)
+        self._offset = end + len(self._line_break)
+        return line.rstrip()
+
+    def _read_records(self, needles: Iterable[bytes] = ()) -> Iterator[str]:
+        find = self._map.find
+        decode = self._decode
+        line_break = self._line_break
+        step = len(line_break)
+        size = len(self._map)
+        pos = self._offset
+
+        while pos < size:
+            start = pos
+            end = find(line_break, pos)
+            if end == -1:
+                end = size
+            pos = self._offset = end + step
+            if end > start:
+                for needle in needles:
+                    if find(needle, start, end) == -1:
+                        break
+                else:
+                    line = decode(start, end)
+                    if line:
+                        yield line
+
+
+class BytesDictReader(DictReader):
+    """
+    A reader class for reading MHN data from a binary stream without a text decoding layer.
+
+    Rows are split and scanned as raw bytes and only the values in the rows are decoded,
+    or left as `bytes` with `decode=False`, so data can be passed on to a `BytesDictWriter`
+    without being decoded and encoded again. The dialect must be ASCII and the encoding
+    ASCII compatible, such as UTF-8.
+
+    Example:
+        with open("archive.mhn", "rb") as f:
+            for row in BytesDictReader(f, read_schema_from_first_row=True, block_size=1024 * 1024):
+                print(row)
+
+    Args:
+        f (IOBase): A binary file-like object to read the MHN data from.
+        schema (Union[str, CompiledSchema], optional): The schema of the rows.
+        dialect (Dialect, optional): The dialect the data is written in.
+        read_schema_from_first_row (bool, optional): Read the schema from the first row of `f`.
+        encoding (str, optional): The encoding of the data. Defaults to UTF-8.
+        decode (bool, optional): Decode values to `str`. When False, values are `bytes`
+            and so are the literals `where` compares them with. Defaults to True.
+        block_size (int, optional): When set, read `f` in blocks of this many bytes, see
+            `DictReader`.
+        lazy (bool, optional): Return `LazyRow` mappings, see `DictReader`.
+        columns (Iterable[str], optional): Only read these field paths, see `DictReader`.
+        where (Dict[str, Any], optional): Only return rows matching these conditions, see
+            `DictReader`.
+        index (RowIndex, optional): The row index of the file, see `DictReader`.
+        key_index (KeyIndex, optional): An index of the values of a key field, see `DictReader`.
+        stats (Union[Stats, bool], optional): Collect counters and timings, see `DictReader`.
+            Characters are counted as bytes.
+        row_factory (Union[str, type, Dict[str, type]], optional): Return records instead of
+            dictionaries, see `DictReader`.
+        intern (Union[bool, Iterable[str]], optional): Intern the values of these fields, see
+            `DictReader`.
+        intern_size (int, optional): The maximum number of distinct values interned per field.
+        codegen (bool, optional): Parse rows with a generated function, see `DictReader`.
+    """
+    def __init__(
+        self,
+        f: IOBase,
+        schema: Union[str, CompiledSchema] = None,
+        dialect: Dialect = default_dialect,
+        read_schema_from_first_row: bool = False,
+        encoding: str = "utf-8",
+        decode: bool = True,
+        block_size: int = None,
+        lazy: bool = False,
+        columns: Iterable[str] = None,
+        where: Dict[str, Any] = None,
+        index: RowIndex = None,
+        key_index: KeyIndex = None,
+        stats: Union[Stats, bool] = None,
+        row_factory: RowFactory = None,
+        intern: Union[bool, Iterable[str]] = None,
+        intern_size: int = 65536,
+        codegen: bool = False,
+    ) -> None:
+        dialect.check_bytes_mode(encoding)
+        self.encoding = encoding
+        self.decode = decode
+
+        if read_schema_from_first_row:
+            schema = f.readline().rstrip().decode(encoding)
+        super().__init__(
+            f,
+            schema=schema,
+            dialect=dialect,
+            block_size=block_size,
+            lazy=lazy,
+            columns=columns,
+            where=where,
+            index=index,
+            key_index=key_index,
+            stats=stats,
+            row_factory=row_factory,
+            intern=intern,
+            intern_size=intern_size,
+            codegen=codegen,
         )
+        self.read_schema_from_first_row = read_schema_from_first_row
+        # Rows always come from a generator, which splits them on bytes
+        self._blocks = self._open_lines()
 
-        for i, part in enumerate(schema_parts):
-            if self.dialect.array_start in part and self.dialect.array_end in part:
-                field_name = part[:-2]
-                result[field_name] = [unescape_newlines(unescape(val, self.dialect), self.dialect) for val in parse_array(data_parts[i], self.dialect)]
-            elif self.dialect.level_start in part:
-                field_name, remaining_parts = part.split(self.dialect.level_start)
-                sub_data, remaining_data = data_parts[i].split(
-                    self.dialect.level_end, 1
-                )
-                sub_data = sub_data.lstrip(
-                    self.dialect.level_start
-                )  # Remove leading level_start
-                sub_schema = remaining_parts.rstrip(
-                    self.dialect.level_end
-                )  # Remove trailing level_end
-                result[field_name] = self._parse_level(sub_data, sub_schema)
-                data_parts[i] = remaining_data
-            else:
-                val = data_parts[i]
-                # Replace temporary placeholders with original characters
-                for control_char, replace_char in self.dialect.escape_mappings.items():
-                    val = val.replace(replace_char, control_char.lstrip(self.dialect.escape_char))
+    def _make_scanner(self) -> BytesScanner:
+        return get_bytes_scanner(self.dialect, self.encoding, self.decode)
 
-                field_name = part.split(self.dialect.array_start)[0]
-                result[field_name] = unescape_newlines(unescape(val, self.dialect), self.dialect)
+    def _read_lines(self) -> Iterator[bytes]:
+        readline = self.input.readline
+        while True:
+            line = readline().rstrip(b"\r\n")
+            if not line:
+                return
+            yield line
 
+    def _read_blocks(self) -> Iterator[bytes]:
+        read = self.input.read
+        block_size = self.block_size
+        line_break = self._scanner.line_break
+        tail = b""
 
-        return result
+        while True:
+            block = read(block_size)
+            if not block:
+                break
 
-    def _parse_mhn_string(self, data_str, schema_str):
-        # Replace escaped characters with temporary placeholders
-        for control_char, replace_char in self.dialect.escape_mappings.items():
-            data_str = data_str.replace(control_char, replace_char)
+            data = tail + block if tail else block
+            lines = data.split(line_break)
+            # The last line of a block is incomplete until the next block is read
+            tail = lines.pop()
+            if b"\r" in data:
+                lines = [line.rstrip(b"\r") for line in lines]
+            yield from filter(None, lines)
+
+        tail = tail.rstrip(b"\r")
+        if tail:
+            yield tail
+
+
+def _read_columns(
+    lines: Iterable[str],
+    schema: CompiledSchema,
+    scanner: Scanner,
+    types: Dict[str, Callable],
+    numpy: bool,
+    dictionary: Union[bool, Iterable[str]] = None,
+) -> Dict[str, Any]:
+    columns = {}
+    fields = {}
+    if dictionary and dictionary is not True:
+        dictionary = set(dictionary)
+    plan = _column_plan(schema, "", columns, fields, dictionary)
+    if dictionary and dictionary is not True:
+        unknown = dictionary.difference(fields)
+        if unknown:
+            raise ValueError(f"Unknown column {min(unknown)!r}")
+    for line in lines:
+        scanner.end_row(line, _scan_columns(scanner, line, 0, plan), schema)
+    return _convert_columns(columns, fields, types, numpy)
+
+
+def read_columns(
+    source: Union[IOBase, Iterable[str]],
+    schema: Union[str, CompiledSchema] = None,
+    dialect: Dialect = default_dialect,
+    read_schema_from_first_row: bool = False,
+    columns: Iterable[str] = None,
+    types: Dict[str, Callable] = None,
+    numpy: bool = False,
+    dictionary: Union[bool, Iterable[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Reads MHN data into columns instead of one dictionary per row.
+
+    Example:
+        columns = read_columns(input_file, read_schema_from_first_row=True, types={"Age": int})
+        average_age = sum(columns["Age"]) / len(columns["Age"])
+
+    Args:
+        source (Union[IOBase, Iterable[str]]): A file-like object to read the whole of, or a
+            batch of lines without their line breaks.
+        schema (Union[str, CompiledSchema], optional): The schema of the rows.
+        dialect (Dialect, optional): The dialect the data is written in.
+        read_schema_from_first_row (bool, optional): Read the schema from the first row of `source`.
+        columns (Iterable[str], optional): Only read these field paths, see `DictReader`.
+        types (Dict[str, Callable], optional): Maps column names to a type to convert the
+            values with, see `DictReader.read_columns`.
+        numpy (bool, optional): Return NumPy arrays, see `DictReader.read_columns`.
+        dictionary (Union[bool, Iterable[str]], optional): Dictionary encode these columns,
+            see `DictReader.read_columns`.
+
+    Returns:
+        Dict[str, Any]: The columns by name, in schema order.
+    """
+    if hasattr(source, "read"):
+        reader = DictReader(
+            source,
+            schema=schema,
+            dialect=dialect,
+            read_schema_from_first_row=read_schema_from_first_row,
+            block_size=1024 * 1024,
+            columns=columns,
+        )
+        return reader.read_columns(types, numpy, dictionary)
 
-        # Parse single line of data
-        parsed_data = self._parse_level(data_str.strip(), schema_str)
+    lines = iter(source)
+    if read_schema_from_first_row:
+        schema = next(lines, "").rstrip()
+    if not schema:
+        raise ValueError("A schema must be provided or read from the first row")
 
-        return parsed_data
\ No newline at end of file
+    compiled_schema = compile_schema(schema, dialect)
+    if columns is not None:
+        compiled_schema = compiled_schema.project(columns)
+    return _read_columns(lines, compiled_schema, get_scanner(dialect), types, numpy, dictionary)
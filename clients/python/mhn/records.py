@@ -0,0 +1,193 @@
+import dataclasses
+from collections import namedtuple
+from functools import lru_cache, partial
+from typing import Callable, Dict, List, Tuple, Union
+from .schema import CompiledSchema, FieldKind
+from .scanner import Scanner
+
+RowFactory = Union[str, type, Dict[str, type]]
+
+
+def record_type(schema: CompiledSchema, name: str = "Record") -> type:
+    """
+    Returns the generated record class of one level of a schema: a named tuple of the
+    selected fields of that level, in row order.
+
+    Records have no per instance dictionary and are built straight from the values in
+    the order they are scanned. Field names that are not valid identifiers are renamed to
+    their position, such as `_1`, and remain readable by index. The class is shared by
+    every level with the same name and fields.
+
+    Args:
+        schema (CompiledSchema): The schema of the level.
+        name (str, optional): The class name, used when it is a valid identifier.
+    """
+    return _record_type(schema.names, name if name.isidentifier() else "Record")
+
+
+@lru_cache(maxsize=None)
+def _record_type(names: Tuple[str, ...], name: str) -> type:
+    # Keyed by the field names, so schemas copied for projections or interning share
+    # their classes and are not kept alive by the cache
+    return namedtuple(name, names, rename=True)
+
+
+class _Level:
+    # The fields of one level of a schema and how to build its records
+    __slots__ = ("schema", "fields", "scan_fields", "new")
+
+    def __init__(self, schema: CompiledSchema, fields, scan_fields, new: Callable[[list], object]) -> None:
+        self.schema = schema
+        self.fields = fields
+        self.scan_fields = scan_fields
+        self.new = new
+
+
+def _constructor(cls: type, schema: CompiledSchema, path: str) -> Callable[[list], object]:
+    if dataclasses.is_dataclass(cls):
+        names = tuple(field.name for field in dataclasses.fields(cls) if field.init)
+        if names != schema.names:
+            raise ValueError(
+                f"{cls.__name__} has the fields {list(names)}, but the "
+                f"{repr(path) if path else 'row'} level of the schema has {list(schema.names)}"
+            )
+    if issubclass(cls, tuple):
+        # Named tuples are filled from the list of values without unpacking it
+        return partial(tuple.__new__, cls)
+    return lambda values: cls(*values)
+
+
+def _plan(
+    schema: CompiledSchema, classes: Dict[str, type], path: str, name: str, paths: set
+) -> _Level:
+    paths.add(path)
+    nested = {}
+    for field in schema.fields:
+        if field.selected and field.schema is not None:
+            nested[field.name] = _plan(
+                field.schema,
+                classes,
+                f"{path}.{field.name}" if path else field.name,
+                field.name,
+                paths,
+            )
+    fields = tuple((field, nested.get(field.name)) for field in schema.fields)
+    cls = classes.get(path) or record_type(schema, name)
+    return _Level(schema, fields, fields[:len(schema.scan_fields)], _constructor(cls, schema, path))
+
+
+def _scan_record(scanner: Scanner, line: str, pos: int, level: _Level, in_array: bool = False):
+    values = []
+    append = values.append
+    delimiter = scanner.delimiter
+
+    for index, (field, nested) in enumerate(level.fields if in_array else level.scan_fields):
+        if index:
+            if not line.startswith(delimiter, pos):
+                raise scanner.malformed(line, pos, f"{scanner.dialect.delimiter!r} before {field.name!r}")
+            pos += 1
+
+        if not field.selected:
+            pos = scanner.skip(line, pos, field, in_array)
+            continue
+
+        kind = field.kind
+        if kind is FieldKind.SCALAR:
+            value, pos = scanner.scalar(line, pos, in_array)
+            if field.convert is not None:
+                value = field.convert(value)
+        elif kind is FieldKind.ARRAY:
+            value, pos = scanner.array(line, pos)
+            if field.convert is not None:
+                value = list(map(field.convert, value))
+        elif kind is FieldKind.OBJECT:
+            value, pos = _scan_record(scanner, line, scanner.start_level(line, pos, field), nested)
+            pos = scanner.end_level(line, pos, nested.schema)
+        else:
+            value, pos = _scan_records(scanner, line, pos, nested)
+
+        append(value)
+
+    return level.new(values), pos
+
+
+def _scan_records(scanner: Scanner, line: str, pos: int, level: _Level) -> Tuple[List, int]:
+    bracketed = line.startswith(scanner.array_start, pos)
+    if bracketed:
+        pos += 1
+
+    items = []
+    if scanner._is_empty_array(line, pos):
+        pos += len(scanner.empty_array)
+    else:
+        separator = scanner.array_separator
+        while True:
+            item, pos = _scan_record(scanner, line, pos, level, True)
+            items.append(item)
+            if not line.startswith(separator, pos):
+                break
+            pos += 1
+
+    if bracketed:
+        pos = scanner.end_array(line, pos)
+    return items, pos
+
+
+def record_parser(
+    schema: CompiledSchema, scanner: Scanner, row_factory: RowFactory = "record"
+) -> Callable[[str], object]:
+    """
+    Builds a function that parses a raw MHN line into a record instead of a dictionary.
+
+    Every level of the schema, the rows themselves, nested objects and the items of arrays
+    of objects, gets a class of its own. Levels default to the named tuples of
+    `record_type`. Classes of your own, such as dataclasses declared with `slots=True`,
+    are called with the selected fields of their level as positional arguments, in row
+    order.
+
+    Example:
+        @dataclass(slots=True)
+        class User:
+            Name: str
+            Age: int
+
+        parse = record_parser(schema, scanner, {"User": User})
+
+    Args:
+        schema (CompiledSchema): The schema of the rows.
+        scanner (Scanner): The scanner to read the rows with.
+        row_factory (Union[str, type, Dict[str, type]], optional): `"record"` to generate a
+            class for every level, the class of the rows, or a dictionary mapping field
+            paths such as `"User"` or `"User.Address"` to the class of that level, with `""`
+            for the rows. Levels without a class get a generated one.
+
+    Returns:
+        Callable[[str], object]: The parser.
+
+    Raises:
+        ValueError: Raised if a dataclass does not have the fields of its level, or a path
+            is not an object or array of objects of the schema.
+    """
+    if row_factory == "record":
+        classes = {}
+    elif isinstance(row_factory, type):
+        classes = {"": row_factory}
+    elif isinstance(row_factory, dict):
+        classes = dict(row_factory)
+    else:
+        raise ValueError(
+            f"row_factory must be 'record', a class or a dictionary of classes, got {row_factory!r}"
+        )
+
+    paths = set()
+    level = _plan(schema, classes, "", "Record", paths)
+    unknown = [path for path in classes if path not in paths]
+    if unknown:
+        raise ValueError(f"{unknown[0]!r} is not an object or array of objects of the schema")
+
+    def parse_record(line: str):
+        record, pos = _scan_record(scanner, line, 0, level)
+        scanner.end_row(line, pos, schema)
+        return record
+
+    return parse_record
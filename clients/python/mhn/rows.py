@@ -0,0 +1,102 @@
+from collections.abc import Mapping
+from typing import Iterator
+from .schema import CompiledSchema, FieldKind
+from .scanner import Scanner
+
+
+class LazyRow(Mapping):
+    """
+    A read-only mapping over a single MHN row that decodes fields on first access.
+
+    The row keeps the raw line and the offsets of the fields found so far. Accessing a
+    field only scans past the fields in front of it, decodes that one value and caches
+    the result. Nested objects are returned as lazy rows of their own, so rows nothing is
+    read from cost little more than the line itself. Malformed rows only raise a ValueError
+    once the fields that do not match the schema are read.
+
+    Example:
+        reader = DictReader(input_file, read_schema_from_first_row=True, lazy=True)
+        for row in reader:
+            print(row["User"]["Name"])
+    """
+    __slots__ = ("_line", "_schema", "_scanner", "_in_array", "_offsets", "_values")
+
+    def __init__(
+        self,
+        line: str,
+        schema: CompiledSchema,
+        scanner: Scanner,
+        start: int = 0,
+        in_array: bool = False,
+    ) -> None:
+        self._line = line
+        self._schema = schema
+        self._scanner = scanner
+        self._in_array = in_array
+        self._offsets = [start]
+        self._values = {}
+
+    def _offset(self, index: int) -> int:
+        offsets = self._offsets
+        if index < len(offsets):
+            return offsets[index]
+
+        line = self._line
+        fields = self._schema.fields
+        scanner = self._scanner
+        delimiter = scanner.delimiter
+        pos = offsets[-1]
+        while len(offsets) <= index:
+            pos = scanner.skip(line, pos, fields[len(offsets) - 1], self._in_array)
+            if not line.startswith(delimiter, pos):
+                raise scanner.malformed(
+                    line, pos, f"{scanner.dialect.delimiter!r} before {fields[len(offsets)].name!r}"
+                )
+            pos += 1
+            offsets.append(pos)
+        return pos
+
+    def __getitem__(self, key: str):
+        values = self._values
+        if key in values:
+            return values[key]
+
+        index = self._schema.positions[key]
+        field = self._schema.fields[index]
+        pos = self._offset(index)
+        scanner = self._scanner
+        kind = field.kind
+
+        if kind is FieldKind.SCALAR:
+            value = scanner.scalar(self._line, pos, self._in_array)[0]
+            if field.convert is not None:
+                value = field.convert(value)
+        elif kind is FieldKind.ARRAY:
+            value = scanner.array(self._line, pos)[0]
+            if field.convert is not None:
+                value = list(map(field.convert, value))
+        elif kind is FieldKind.OBJECT:
+            value = LazyRow(self._line, field.schema, scanner, scanner.start_level(self._line, pos, field))
+        else:
+            value = scanner.object_array(self._line, pos, field.schema)[0]
+
+        values[key] = value
+        return value
+
+    def __contains__(self, key) -> bool:
+        return key in self._schema.positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._schema.names)
+
+    def __len__(self) -> int:
+        return len(self._schema.names)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+    def to_dict(self) -> dict:
+        """
+        Decodes the whole row into a dictionary.
+        """
+        return self._scanner.object(self._line, self._offsets[0], self._schema, self._in_array)[0]
@@ -0,0 +1,497 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
+from .dialect import Dialect, default_dialect
+from .schema import CompiledSchema, FieldKind, SchemaField
+
+
+def _char_class(chars: str) -> str:
+    return "".join(re.escape(char) for char in chars)
+
+
+def _run_pattern(escape_char: str, stop_chars: str) -> str:
+    # Matches a run of text up to the first unescaped stop character. Escape
+    # sequences are consumed as a pair so an escaped stop character never ends the run.
+    stops = _char_class(escape_char + stop_chars)
+    escape = re.escape(escape_char)
+    return f"[^{stops}]*(?:{escape}.?[^{stops}]*)*"
+
+
+class Scanner:
+    """
+    A single pass tokenizer for MHN rows.
+
+    Escape sequences are resolved while the scanner looks for delimiters, so every
+    character of a row is visited once and values are only copied when they are sliced
+    out of the row. The scanner is the exact inverse of `DictWriter`, and rows that run out
+    of data before the last field of their schema or hold data past it raise a ValueError.
+
+    Example:
+        scanner = get_scanner(dialect)
+        row = scanner.record(line, compile_schema(schema, dialect))
+    """
+    def __init__(self, dialect: Dialect = default_dialect) -> None:
+        self.dialect = dialect
+        encode = self.encode
+        self.escape_char = encode(dialect.escape_char)
+        self.delimiter = encode(dialect.delimiter)
+        self.level_start = encode(dialect.level_start)
+        self.level_end = encode(dialect.level_end)
+        self.array_start = encode(dialect.array_start)
+        self.array_end = encode(dialect.array_end)
+        self.array_separator = encode(dialect.array_separator)
+        self.empty_array = encode(dialect.empty_array)
+        self.line_break = encode(dialect.line_break)
+
+        self.escapes = {
+            encode(char): encode(value) for char, value in dialect.unescape_table.items()
+        }
+
+        self._field = self._compile(_run_pattern(
+            dialect.escape_char, dialect.delimiter + dialect.level_end
+        )).match
+        self._element = self._compile(_run_pattern(
+            dialect.escape_char,
+            dialect.delimiter + dialect.level_end + dialect.array_separator + dialect.array_end,
+        )).match
+        self._level = self._compile(_run_pattern(
+            dialect.escape_char, dialect.level_start + dialect.level_end
+        )).match
+        self._unescape = self._compile(f"{re.escape(dialect.escape_char)}(.?)").sub
+        self._empty_array_ends = (self.delimiter, self.level_end, self.array_end)
+
+    def encode(self, text: str) -> str:
+        """
+        Returns text in the form the scanner reads rows in: unchanged, as rows are `str`.
+        """
+        return text
+
+    def _compile(self, pattern: str):
+        return re.compile(self.encode(pattern), re.DOTALL)
+
+    def _unescape_match(self, match) -> str:
+        return self.escapes.get(match.group(1), match.group(0))
+
+    def unescape(self, value: str) -> str:
+        """
+        Resolves the escape sequences in a single value.
+
+        Args:
+            value (str): The escaped value.
+
+        Returns:
+            str: The original value.
+        """
+        if self.escape_char not in value:
+            return value
+        return self._unescape(self._unescape_match, value)
+
+    def malformed(self, line: str, pos: int, expected: str) -> ValueError:
+        """
+        Returns the error to raise for a row that does not match its schema.
+
+        Args:
+            line (str): The row being scanned.
+            pos (int): The position the row stops matching the schema at.
+            expected (str): What the schema expects at `pos`.
+        """
+        found = "the end of the row" if pos >= len(line) else repr(line[pos:pos + 20])
+        return ValueError(f"Malformed row: expected {expected} at position {pos}, found {found}")
+
+    def start_level(self, line: str, pos: int, field: SchemaField) -> int:
+        """
+        Steps past the level start of the nested object `field` at `pos`.
+
+        Raises:
+            ValueError: Raised if the object does not start at `pos`.
+        """
+        if not line.startswith(self.level_start, pos):
+            raise self.malformed(line, pos, f"{self.dialect.level_start!r} opening {field.name!r}")
+        return pos + 1
+
+    def end_level(self, line: str, pos: int, schema: CompiledSchema) -> int:
+        """
+        Steps past the level end of a nested object whose fields were read up to `pos`.
+        When a projection stopped reading the object early, the rest of it is skipped.
+        Trailing delimiters before the level end hold no data and are ignored.
+
+        Returns:
+            int: The position after the level end.
+
+        Raises:
+            ValueError: Raised if anything else follows the last field.
+        """
+        if len(schema.scan_fields) < len(schema.fields):
+            return self.skip_level(line, pos)
+        if not line.startswith(self.level_end, pos):
+            end = self._skip_delimiters(line, pos)
+            if not line.startswith(self.level_end, end):
+                raise self.malformed(line, pos, repr(self.dialect.level_end))
+            pos = end
+        return pos + 1
+
+    def end_array(self, line: str, pos: int) -> int:
+        """
+        Steps past the array end of a bracketed array whose items were read up to `pos`.
+
+        Raises:
+            ValueError: Raised if anything but the array end follows the last item.
+        """
+        if not line.startswith(self.array_end, pos):
+            raise self.malformed(line, pos, repr(self.dialect.array_end))
+        return pos + 1
+
+    def end_row(self, line: str, pos: int, schema: CompiledSchema) -> None:
+        """
+        Checks that a row whose fields were read up to `pos` holds nothing more than
+        trailing delimiters. Rows a projection stopped reading early are not checked.
+
+        Raises:
+            ValueError: Raised if data follows the last field.
+        """
+        if (
+            pos != len(line)
+            and len(schema.scan_fields) == len(schema.fields)
+            and self._skip_delimiters(line, pos) != len(line)
+        ):
+            raise self.malformed(line, pos, "the end of the row")
+
+    def _skip_delimiters(self, line: str, pos: int) -> int:
+        delimiter = self.delimiter
+        while line.startswith(delimiter, pos):
+            pos += 1
+        return pos
+
+    def skip_level(self, line: str, pos: int) -> int:
+        """
+        Skips past the level end that closes the nested object `pos` is inside of,
+        stepping over any nested objects and escaped characters on the way.
+
+        Returns:
+            int: The position after the closing level end, or the end of the line.
+        """
+        depth = 1
+        level_start = self.level_start
+        while pos < len(line):
+            pos = self._level(line, pos).end()
+            if pos == len(line):
+                break
+            depth += 1 if line.startswith(level_start, pos) else -1
+            pos += 1
+            if not depth:
+                break
+        return pos
+
+    def scalar(self, line: str, pos: int, in_array: bool = False) -> Tuple[str, int]:
+        """
+        Reads a single value starting at `pos`.
+
+        Args:
+            line (str): The row being scanned.
+            pos (int): The position the value starts at.
+            in_array (bool, optional): Whether array separators and array ends also end the value.
+
+        Returns:
+            Tuple[str, int]: The unescaped value and the position of the character that ended it.
+        """
+        end = (self._element if in_array else self._field)(line, pos).end()
+        value = line[pos:end]
+        if self.escape_char in value:
+            value = self._unescape(self._unescape_match, value)
+        return value, end
+
+    def _is_empty_array(self, line: str, pos: int) -> bool:
+        if not line.startswith(self.empty_array, pos):
+            return False
+        pos += len(self.empty_array)
+        return pos == len(line) or line.startswith(self._empty_array_ends, pos)
+
+    def array(self, line: str, pos: int) -> Tuple[List[str], int]:
+        """
+        Reads an array of values starting at `pos`. The array may be wrapped in the
+        dialect's array start and end characters.
+
+        Returns:
+            Tuple[List[str], int]: The unescaped items and the position after the array.
+        """
+        bracketed = line.startswith(self.array_start, pos)
+        if bracketed:
+            pos += 1
+
+        if self._is_empty_array(line, pos):
+            items = []
+            pos += len(self.empty_array)
+        else:
+            items = []
+            element = self._element
+            separator = self.array_separator
+            escape_char = self.escape_char
+            while True:
+                end = element(line, pos).end()
+                value = line[pos:end]
+                if escape_char in value:
+                    value = self._unescape(self._unescape_match, value)
+                items.append(value)
+                if line.startswith(separator, end):
+                    pos = end + 1
+                else:
+                    pos = end
+                    break
+
+        if bracketed:
+            pos = self.end_array(line, pos)
+        return items, pos
+
+    def object(
+        self, line: str, pos: int, schema: CompiledSchema, in_array: bool = False
+    ) -> Tuple[Dict[str, Union[str, list, dict]], int]:
+        """
+        Reads the fields of `schema` starting at `pos`.
+
+        Args:
+            line (str): The row being scanned.
+            pos (int): The position the first field starts at.
+            schema (CompiledSchema): The fields to read.
+            in_array (bool, optional): Whether the object is an item of an array of objects.
+
+        Returns:
+            Tuple[dict, int]: The parsed fields and the position after the last scanned field.
+        """
+        result = {}
+        delimiter = self.delimiter
+
+        # Outside arrays of objects the caller never needs the position after the last
+        # field, so scanning stops at the last field a projection selects
+        for index, field in enumerate(schema.fields if in_array else schema.scan_fields):
+            if index:
+                if not line.startswith(delimiter, pos):
+                    raise self.malformed(line, pos, f"{self.dialect.delimiter!r} before {field.name!r}")
+                pos += 1
+
+            if not field.selected:
+                pos = self.skip(line, pos, field, in_array)
+                continue
+
+            kind = field.kind
+            if kind is FieldKind.SCALAR:
+                value, pos = self.scalar(line, pos, in_array)
+                if field.convert is not None:
+                    value = field.convert(value)
+            elif kind is FieldKind.ARRAY:
+                value, pos = self.array(line, pos)
+                if field.convert is not None:
+                    value = list(map(field.convert, value))
+            elif kind is FieldKind.OBJECT:
+                value, pos = self.object(line, self.start_level(line, pos, field), field.schema)
+                pos = self.end_level(line, pos, field.schema)
+            else:
+                value, pos = self.object_array(line, pos, field.schema)
+
+            result[field.name] = value
+
+        return result, pos
+
+    def object_array(
+        self, line: str, pos: int, schema: CompiledSchema
+    ) -> Tuple[List[dict], int]:
+        """
+        Reads an array of objects starting at `pos`. Each item holds the fields of `schema`
+        and items are separated by the dialect's array separator. Arrays inside the items
+        are wrapped in the array start and end characters.
+
+        Returns:
+            Tuple[List[dict], int]: The parsed items and the position after the array.
+        """
+        bracketed = line.startswith(self.array_start, pos)
+        if bracketed:
+            pos += 1
+
+        items = []
+        if self._is_empty_array(line, pos):
+            pos += len(self.empty_array)
+        else:
+            while True:
+                item, pos = self.object(line, pos, schema, True)
+                items.append(item)
+                if not line.startswith(self.array_separator, pos):
+                    break
+                pos += 1
+
+        if bracketed:
+            pos = self.end_array(line, pos)
+        return items, pos
+
+    def skip(self, line: str, pos: int, field: SchemaField, in_array: bool = False) -> int:
+        """
+        Steps over the value of `field` starting at `pos` without slicing or unescaping it.
+
+        Args:
+            line (str): The row being scanned.
+            pos (int): The position the value starts at.
+            field (SchemaField): The field whose value starts at `pos`.
+            in_array (bool, optional): Whether the field belongs to an item of an array of objects.
+
+        Returns:
+            int: The position after the value.
+        """
+        kind = field.kind
+        if kind is FieldKind.SCALAR:
+            return (self._element if in_array else self._field)(line, pos).end()
+
+        if kind is FieldKind.OBJECT:
+            if line.startswith(self.level_start, pos):
+                pos += 1
+            return self.skip_level(line, pos)
+
+        bracketed = line.startswith(self.array_start, pos)
+        if bracketed:
+            pos += 1
+        if self._is_empty_array(line, pos):
+            pos += len(self.empty_array)
+        else:
+            pos = self._skip_items(line, pos, field)
+        if bracketed:
+            pos = self.end_array(line, pos)
+        return pos
+
+    def _skip_items(self, line: str, pos: int, field: SchemaField) -> int:
+        separator = self.array_separator
+        if field.kind is FieldKind.ARRAY:
+            element = self._element
+            pos = element(line, pos).end()
+            while line.startswith(separator, pos):
+                pos = element(line, pos + 1).end()
+            return pos
+
+        while True:
+            pos = self.skip_fields(line, pos, field.schema, True)
+            if not line.startswith(separator, pos):
+                return pos
+            pos += 1
+
+    def skip_fields(
+        self, line: str, pos: int, schema: CompiledSchema, in_array: bool = False
+    ) -> int:
+        """
+        Steps over all fields of `schema` starting at `pos`.
+
+        Returns:
+            int: The position after the last field.
+        """
+        delimiter = self.delimiter
+        for index, field in enumerate(schema.fields):
+            if index and line.startswith(delimiter, pos):
+                pos += 1
+            pos = self.skip(line, pos, field, in_array)
+        return pos
+
+    def record(self, line: str, schema: CompiledSchema) -> Dict[str, Union[str, list, dict]]:
+        """
+        Parses a full row.
+
+        Args:
+            line (str): The row, without its trailing line break.
+            schema (CompiledSchema): The schema of the row.
+
+        Returns:
+            dict: The parsed row.
+
+        Raises:
+            ValueError: Raised if the row does not match the schema.
+        """
+        row, pos = self.object(line, 0, schema)
+        self.end_row(line, pos, schema)
+        return row
+
+
+class BytesScanner(Scanner):
+    """
+    A scanner for rows held as `bytes`.
+
+    Every character of an MHN dialect is ASCII, and in ASCII compatible encodings such as
+    UTF-8 the bytes of multi-byte characters never fall in the ASCII range, so delimiters
+    are found on the raw bytes. Only the values handed out are decoded, or left as bytes
+    with `decode=False`.
+
+    Example:
+        scanner = get_bytes_scanner(dialect)
+        row = scanner.record(line, compile_schema(schema, dialect))
+    """
+    def __init__(
+        self, dialect: Dialect = default_dialect, encoding: str = "utf-8", decode: bool = True
+    ) -> None:
+        dialect.check_bytes_mode(encoding)
+        self.encoding = encoding
+        self.decode = decode
+        super().__init__(dialect)
+        self._escape_byte = self.escape_char[0]
+
+    def encode(self, text: str) -> bytes:
+        """
+        Returns text in the form the scanner reads rows in, encoded to bytes.
+        """
+        return text.encode(self.encoding)
+
+    # The methods below are copies of those of Scanner, called for every value. They look
+    # for the escape character as an int, as `bytes in bytes` is several times slower.
+
+    def unescape(self, value: bytes) -> bytes:
+        if self._escape_byte not in value:
+            return value
+        return self._unescape(self._unescape_match, value)
+
+    def scalar(self, line: bytes, pos: int, in_array: bool = False) -> Tuple[Union[str, bytes], int]:
+        end = (self._element if in_array else self._field)(line, pos).end()
+        value = line[pos:end]
+        if self._escape_byte in value:
+            value = self._unescape(self._unescape_match, value)
+        if self.decode:
+            value = value.decode(self.encoding)
+        return value, end
+
+    def array(self, line: bytes, pos: int) -> Tuple[List[Union[str, bytes]], int]:
+        bracketed = line.startswith(self.array_start, pos)
+        if bracketed:
+            pos += 1
+
+        items = []
+        if self._is_empty_array(line, pos):
+            pos += len(self.empty_array)
+        else:
+            element = self._element
+            separator = self.array_separator
+            escape_byte = self._escape_byte
+            encoding = self.encoding if self.decode else None
+            while True:
+                end = element(line, pos).end()
+                value = line[pos:end]
+                if escape_byte in value:
+                    value = self._unescape(self._unescape_match, value)
+                items.append(value if encoding is None else value.decode(encoding))
+                if line.startswith(separator, end):
+                    pos = end + 1
+                else:
+                    pos = end
+                    break
+
+        if bracketed:
+            pos = self.end_array(line, pos)
+        return items, pos
+
+
+@lru_cache(maxsize=None)
+def get_scanner(dialect: Dialect = default_dialect) -> Scanner:
+    """
+    Returns the shared scanner for a dialect.
+    """
+    return Scanner(dialect)
+
+
+@lru_cache(maxsize=None)
+def get_bytes_scanner(
+    dialect: Dialect = default_dialect, encoding: str = "utf-8", decode: bool = True
+) -> BytesScanner:
+    """
+    Returns the shared bytes scanner for a dialect, encoding and decoding mode.
+    """
+    return BytesScanner(dialect, encoding, decode)
@@ -1,26 +1,155 @@
+from enum import Enum
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, Union
 from .dialect import Dialect, default_dialect
 
 
+_BOOLEANS = {"true": True, "1": True, "false": False, "0": False}
+# Bytes readers that do not decode values convert the raw bytes
+_BOOLEANS.update({key.encode(): value for key, value in _BOOLEANS.items()})
+
+
+def _parse_int(value: str):
+    return int(value) if value else None
+
+
+def _parse_float(value: str):
+    return float(value) if value else None
+
+
+def _parse_bool(value: str):
+    if not value:
+        return None
+    try:
+        return _BOOLEANS[value.lower()]
+    except KeyError:
+        raise ValueError(f"Invalid bool value {value!r}") from None
+
+
+def _format_int(value) -> str:
+    if value is None:
+        return ""
+    number = int(value)
+    if not isinstance(value, (str, bytes)) and number != value:
+        # int() would silently drop the fraction of a float
+        raise ValueError(f"Invalid int value: {value!r}")
+    return str(number)
+
+
+def _format_float(value) -> str:
+    return "" if value is None else repr(float(value))
+
+
+def _format_bool(value) -> str:
+    if isinstance(value, (str, bytes)):
+        # Untyped values read back as text, where "false" is truthy
+        value = _parse_bool(value)
+    return "" if value is None else ("true" if value else "false")
+
+
+class Interner:
+    """
+    A converter that makes equal values read from a field share one object.
+
+    Values are kept in a table of at most `size` distinct values. Once the table is full,
+    values not yet in it are returned as they are, so fields that turn out to be unique
+    per row cost a bounded amount of memory.
+
+    Attributes:
+        size (int): The maximum number of distinct values kept.
+    """
+    __slots__ = ("size", "_table")
+
+    def __init__(self, size: int = 65536) -> None:
+        if size < 1:
+            raise ValueError("size must be positive")
+        self.size = size
+        self._table = {}
+
+    def __call__(self, value):
+        table = self._table
+        interned = table.get(value)
+        if interned is not None:
+            return interned
+        if len(table) < self.size:
+            table[value] = value
+        return value
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+# Maps each type tag to its type, the converter used when reading and the formatter
+# used when writing. Formatted numbers and booleans never need escaping.
+TYPE_TAGS = {
+    "str": (str, None, None),
+    "int": (int, _parse_int, _format_int),
+    "float": (float, _parse_float, _format_float),
+    "bool": (bool, _parse_bool, _format_bool),
+}
+
+_TYPE_NAMES = {value[0]: tag for tag, value in TYPE_TAGS.items()}
+
+
+def infer_type_tag(values) -> str:
+    """
+    Returns the type tag that fits all of the given sample values, ignoring None.
+
+    Booleans, integers and floats are tagged `bool`, `int` and `float`, with integers
+    widened to `float` when both appear. Anything else is tagged `str`.
+    """
+    return _widest_tag({_TYPE_NAMES.get(type(value), "str") for value in values if value is not None})
+
+
+def _widest_tag(tags) -> str:
+    if tags == {"int", "float"}:
+        return "float"
+    if len(tags) == 1:
+        return tags.pop()
+    return "str"
+
+
+def _type_suffix(values, dialect: Dialect) -> str:
+    tag = infer_type_tag(values)
+    return "" if tag == "str" else f"{dialect.type_separator}{tag}"
+
+
 def generate_schema(
-    data_dict: dict, dialect: Dialect = default_dialect, parent_key=""
+    data_dict: dict, dialect: Dialect = default_dialect, parent_key="", infer_types: bool = False
 ) -> str:
+    """
+    Generates the schema of a row.
+
+    Args:
+        data_dict (dict): A sample row.
+        dialect (Dialect, optional): The dialect to write the schema in.
+        infer_types (bool, optional): Tag scalar and array fields holding booleans, integers
+            or floats with their type, such as `Age:int` or `Scores[]:float`.
+
+    Returns:
+        str: The schema.
+    """
     schema_parts = []
     for key, value in data_dict.items():
         if isinstance(value, dict):
-            sub_schema = generate_schema(value, dialect=dialect, parent_key=key)
+            sub_schema = generate_schema(value, dialect=dialect, parent_key=key, infer_types=infer_types)
             schema_parts.append(
                 f"{key}{dialect.level_start}{sub_schema}{dialect.level_end}"
             )
-        elif isinstance(value, list) and all(isinstance(item, dict) for item in value):
+        elif isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
             # handle arrays of nested objects
-            sub_schema = generate_schema(value[0], dialect=dialect, parent_key="")
+            sub_schema = generate_schema(value[0], dialect=dialect, parent_key="", infer_types=infer_types)
             schema_parts.append(f"{key}{dialect.array_start}{sub_schema}{dialect.array_end}")
         elif isinstance(value, list):
-            schema_parts.append(f"{key}{dialect.array_start}{dialect.array_end}")
+            suffix = _type_suffix(value, dialect) if infer_types and value else ""
+            schema_parts.append(f"{key}{dialect.array_start}{dialect.array_end}{suffix}")
         else:
-            schema_parts.append(key)
+            suffix = _type_suffix([value], dialect) if infer_types else ""
+            schema_parts.append(f"{key}{suffix}")
     return dialect.delimiter.join(schema_parts)
 
+
 def parse_schema_parts(schema_str:str, dialect:Dialect):
     parts = []
     part_start = 0
@@ -36,4 +165,451 @@ def parse_schema_parts(schema_str:str, dialect:Dialect):
             part_start = idx + 1
 
     parts.append(schema_str[part_start:])
-    return parts
\ No newline at end of file
+    return parts
+
+
+class FieldKind(Enum):
+    SCALAR = "scalar"
+    ARRAY = "array"
+    OBJECT = "object"
+    OBJECT_ARRAY = "object_array"
+
+
+class SchemaField:
+    """
+    A single field of a compiled schema.
+
+    Attributes:
+        name (str): The field name.
+        kind (FieldKind): How the field is laid out in a row.
+        schema (CompiledSchema): The child plan for nested objects and arrays of objects,
+            otherwise None.
+        selected (bool): False when a projection skips the field while reading.
+        type_tag (str): The type tag of a scalar or array field, or None when untagged.
+        type (type): The type values of the field are converted to, `str` when untagged.
+        convert (Callable[[str], Any]): Converts a read value to `type`, or None for strings.
+        format (Callable[[Any], str]): Formats a value for writing without escaping, or None
+            for strings.
+    """
+    __slots__ = ("name", "kind", "schema", "selected", "type_tag", "type", "convert", "format")
+
+    def __init__(
+        self,
+        name: str,
+        kind: FieldKind,
+        schema: "CompiledSchema" = None,
+        selected: bool = True,
+        type_tag: str = None,
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.schema = schema
+        self.selected = selected
+        self.type_tag = type_tag
+        self.type, self.convert, self.format = TYPE_TAGS[type_tag or "str"]
+
+    def __repr__(self) -> str:
+        if self.type_tag:
+            return f"SchemaField({self.name!r}, {self.kind.name}, {self.type_tag!r})"
+        return f"SchemaField({self.name!r}, {self.kind.name})"
+
+
+class CompiledSchema:
+    """
+    A schema string turned into a field tree once, so readers and writers do not
+    have to split the schema again for every row.
+
+    Example:
+        compiled = CompiledSchema("Id|User>Name|Age<|Tags[]")
+        reader = DictReader(f, schema=compiled)
+
+    Attributes:
+        schema (str): The original schema string.
+        dialect (Dialect): The dialect the schema was compiled with.
+        fields (Tuple[SchemaField, ...]): The top level fields in row order.
+        names (Tuple[str, ...]): The selected top level field names in row order.
+        positions (Dict[str, int]): Maps each selected top level field name to its position
+            in `fields`.
+        scan_fields (Tuple[SchemaField, ...]): The fields up to and including the last
+            selected one. Fields after it never have to be scanned.
+        columns (Tuple[str, ...]): The column paths the schema was projected to, or None.
+    """
+    def __init__(self, schema: str, dialect: Dialect = default_dialect) -> None:
+        self.schema = schema
+        self.dialect = dialect
+        self.columns = None
+        self._set_fields(tuple(
+            _compile_field(part, dialect) for part in parse_schema_parts(schema, dialect)
+        ))
+
+    def _set_fields(self, fields) -> None:
+        self.fields = fields
+        self.names = tuple(field.name for field in fields if field.selected)
+        self.positions = {
+            field.name: index for index, field in enumerate(fields) if field.selected
+        }
+        last = max(self.positions.values(), default=-1)
+        self.scan_fields = fields[:last + 1]
+
+    def __repr__(self) -> str:
+        if self.columns is not None:
+            return f"CompiledSchema({self.schema!r}, columns={list(self.columns)!r})"
+        return f"CompiledSchema({self.schema!r})"
+
+    def __reduce__(self):
+        # Only the schema string, dialect and projection are sent to other processes,
+        # which recompile (or reuse) the plan on arrival
+        if self.columns is not None:
+            return (_project_schema, (self.schema, self.dialect, self.columns))
+        return (compile_schema, (self.schema, self.dialect))
+
+    def project(self, columns: Iterable[str]) -> "CompiledSchema":
+        """
+        Returns a copy of the schema that only reads the given columns.
+
+        Columns are field paths with nested fields separated by dots, such as
+        `["Id", "User.Name", "Tags"]`. Fields that are not selected are stepped over while
+        scanning a row without being sliced or unescaped, and are left out of the rows.
+
+        Args:
+            columns (Iterable[str]): The field paths to read.
+
+        Returns:
+            CompiledSchema: The projected schema.
+
+        Raises:
+            ValueError: Raised if a column does not exist in the schema.
+        """
+        columns = tuple(columns)
+        projected = self._project(_selection(columns), "")
+        projected.columns = columns
+        return projected
+
+    def intern(self, columns: Iterable[str] = None, size: int = 65536) -> "CompiledSchema":
+        """
+        Returns a copy of the schema whose readers intern the values of the given columns.
+
+        Equal values of an interned field share one string object instead of a new one per
+        row, which saves a lot of memory for fields with few distinct values, such as
+        countries or statuses, when many rows are held at once. Every field has a table of
+        its own, bounded to `size` distinct values. Typed fields are not interned.
+
+        Args:
+            columns (Iterable[str], optional): The field paths to intern, where a nested
+                object or array of objects stands for all of its fields. Defaults to all
+                selected fields.
+            size (int, optional): The maximum number of distinct values kept per field.
+
+        Returns:
+            CompiledSchema: The interning schema.
+
+        Raises:
+            ValueError: Raised if a column does not exist in the schema.
+        """
+        if size < 1:
+            raise ValueError("size must be positive")
+        interning = self._intern(True if columns is None else _selection(columns), "", size)
+        interning.columns = self.columns
+        return interning
+
+    def _intern(self, selection, prefix: str, size: int) -> "CompiledSchema":
+        self._check_selection(selection, prefix)
+
+        fields = []
+        for field in self.fields:
+            selected = selection if selection is True else selection.get(field.name)
+            if selected is None or not field.selected:
+                fields.append(field)
+            elif field.schema is not None:
+                fields.append(SchemaField(
+                    field.name,
+                    field.kind,
+                    field.schema._intern(selected, f"{prefix}{field.name}.", size),
+                ))
+            elif selected is not True:
+                raise ValueError(f"Column {prefix + field.name!r} has no nested fields")
+            elif field.convert is None:
+                interned = SchemaField(field.name, field.kind)
+                interned.convert = Interner(size)
+                fields.append(interned)
+            else:
+                fields.append(field)
+        return self._copy(fields)
+
+    def _check_selection(self, selection, prefix: str) -> None:
+        if selection is True:
+            return
+        unknown = [name for name in selection if name not in self.positions]
+        if unknown:
+            raise ValueError(f"Unknown column {prefix + unknown[0]!r}")
+
+    def _copy(self, fields) -> "CompiledSchema":
+        copy = object.__new__(CompiledSchema)
+        copy.schema = self.schema
+        copy.dialect = self.dialect
+        copy.columns = None
+        copy._set_fields(tuple(fields))
+        return copy
+
+    def _project(self, selection: dict, prefix: str) -> "CompiledSchema":
+        self._check_selection(selection, prefix)
+
+        fields = []
+        for field in self.fields:
+            selected = selection.get(field.name)
+            if selected is None:
+                fields.append(SchemaField(
+                    field.name, field.kind, field.schema, selected=False, type_tag=field.type_tag
+                ))
+            elif selected is True:
+                fields.append(field)
+            elif field.schema is None:
+                raise ValueError(f"Column {prefix + field.name!r} has no nested fields")
+            else:
+                fields.append(SchemaField(
+                    field.name,
+                    field.kind,
+                    field.schema._project(selected, f"{prefix}{field.name}."),
+                ))
+        return self._copy(fields)
+
+    def __str__(self) -> str:
+        return self.schema
+
+
+def _selection(columns: Iterable[str]) -> dict:
+    # Turns field paths into a tree of names, with True for the fields selected whole
+    selection = {}
+    for column in columns:
+        node = selection
+        *parents, name = column.split(".")
+        for parent in parents:
+            child = node.setdefault(parent, {})
+            if child is True:
+                break
+            node = child
+        else:
+            node[name] = True
+    return selection
+
+
+def _compile_field(part: str, dialect: Dialect) -> SchemaField:
+    name, separator, type_tag = part.rpartition(dialect.type_separator)
+    if separator and type_tag in TYPE_TAGS:
+        field = _compile_field(name, dialect)
+        if field.kind is FieldKind.OBJECT or field.kind is FieldKind.OBJECT_ARRAY:
+            raise ValueError(f"Type tags only apply to scalar and array fields, got {part!r}")
+        return SchemaField(field.name, field.kind, type_tag=type_tag)
+
+    array_at = part.find(dialect.array_start)
+    level_at = part.find(dialect.level_start)
+
+    if array_at != -1 and (level_at == -1 or array_at < level_at):
+        end = part.rfind(dialect.array_end)
+        if end < array_at:
+            raise ValueError(f"Unterminated array in schema part {part!r}")
+        sub_schema = part[array_at + 1:end]
+        if not sub_schema:
+            return SchemaField(part[:array_at], FieldKind.ARRAY)
+        return SchemaField(
+            part[:array_at], FieldKind.OBJECT_ARRAY, CompiledSchema(sub_schema, dialect)
+        )
+
+    if level_at != -1:
+        end = part.rfind(dialect.level_end)
+        if end < level_at:
+            raise ValueError(f"Unterminated nested object in schema part {part!r}")
+        return SchemaField(
+            part[:level_at], FieldKind.OBJECT, CompiledSchema(part[level_at + 1:end], dialect)
+        )
+
+    return SchemaField(part, FieldKind.SCALAR)
+
+
+@lru_cache(maxsize=128)
+def _compile_schema(schema: str, dialect: Dialect) -> CompiledSchema:
+    return CompiledSchema(schema, dialect)
+
+
+def _project_schema(schema: str, dialect: Dialect, columns) -> CompiledSchema:
+    return compile_schema(schema, dialect).project(columns)
+
+
+def compile_schema(
+    schema: Union[str, CompiledSchema], dialect: Dialect = default_dialect
+) -> CompiledSchema:
+    """
+    Returns the compiled plan for a schema, reusing a cached plan when the same
+    schema and dialect have been compiled before.
+
+    Args:
+        schema (Union[str, CompiledSchema]): The schema string, or an already compiled schema.
+        dialect (Dialect, optional): The dialect the schema is written in.
+
+    Returns:
+        CompiledSchema: The compiled schema.
+    """
+    if isinstance(schema, CompiledSchema):
+        if schema.dialect == dialect:
+            return schema
+        if schema.columns is not None:
+            return _project_schema(schema.schema, dialect, schema.columns)
+        schema = schema.schema
+    return _compile_schema(schema, dialect)
+
+
+class _FieldStats:
+    # What has been seen of one field across all rows: its shape, the type tags of its
+    # values and, for nested objects and arrays of objects, the stats of its own fields
+    __slots__ = ("kind", "tags", "fields")
+
+    def __init__(self) -> None:
+        self.kind = None
+        self.tags = set()
+        self.fields = None
+
+
+class SchemaInferrer:
+    """
+    Builds a schema from many rows in a single pass.
+
+    The schema holds the union of the fields of every row added, in the order they are
+    first seen. Items of arrays of objects are merged the same way. Only the shape of the
+    fields is kept, so memory grows with the number of distinct fields and not with the
+    number of rows. `None` values, and `None` items of arrays, count towards the field union
+    but not towards its shape. Writers write them empty.
+
+    Example:
+        inferrer = SchemaInferrer(infer_types=True)
+        for row in rows:
+            inferrer.add(row)
+        writer = DictWriter(output, inferrer.schema())
+    """
+    def __init__(self, dialect: Dialect = default_dialect, infer_types: bool = False) -> None:
+        """
+        Args:
+            dialect (Dialect, optional): The dialect to write the schema in.
+            infer_types (bool, optional): Tag scalar and array fields with the type that fits
+                all of their values, as `generate_schema` does.
+        """
+        self.dialect = dialect
+        self.infer_types = infer_types
+        self.rows = 0
+        self._fields = {}
+
+    def add(self, row: dict) -> None:
+        """
+        Merges the fields of a row into the schema.
+
+        Raises:
+            ValueError: Raised if a field holds values of incompatible shapes, such as an
+                object in one row and a scalar in another.
+        """
+        self._merge(self._fields, row)
+        self.rows += 1
+
+    def update(self, rows: Iterable[dict]) -> None:
+        """
+        Merges the fields of every row into the schema.
+        """
+        for row in rows:
+            self.add(row)
+
+    def _merge(self, fields: Dict[str, _FieldStats], row: dict) -> None:
+        for key, value in row.items():
+            stats = fields.get(key)
+            if stats is None:
+                stats = fields[key] = _FieldStats()
+            if value is None:
+                continue
+
+            if isinstance(value, dict):
+                self._set_kind(stats, key, FieldKind.OBJECT)
+                self._merge(stats.fields, value)
+            elif isinstance(value, list):
+                items = [item for item in value if item is not None]
+                if items and all(isinstance(item, dict) for item in items):
+                    # Lists seen empty so far may still turn out to hold objects
+                    if stats.kind is FieldKind.ARRAY and not stats.tags:
+                        stats.kind = None
+                    self._set_kind(stats, key, FieldKind.OBJECT_ARRAY)
+                    for item in items:
+                        self._merge(stats.fields, item)
+                elif stats.kind is not FieldKind.OBJECT_ARRAY or items:
+                    self._set_kind(stats, key, FieldKind.ARRAY)
+                    stats.tags.update(_TYPE_NAMES.get(type(item), "str") for item in items)
+            else:
+                self._set_kind(stats, key, FieldKind.SCALAR)
+                stats.tags.add(_TYPE_NAMES.get(type(value), "str"))
+
+    @staticmethod
+    def _set_kind(stats: _FieldStats, key: str, kind: FieldKind) -> None:
+        if stats.kind is None:
+            stats.kind = kind
+            if kind is FieldKind.OBJECT or kind is FieldKind.OBJECT_ARRAY:
+                stats.fields = {}
+        elif stats.kind is not kind:
+            raise ValueError(
+                f"Field {key!r} holds both {stats.kind.name.lower()} and {kind.name.lower()} values"
+            )
+
+    def schema(self) -> str:
+        """
+        Returns the schema of all rows added so far.
+        """
+        return self._format(self._fields)
+
+    def _format(self, fields: Dict[str, _FieldStats]) -> str:
+        dialect = self.dialect
+        schema_parts = []
+        for key, stats in fields.items():
+            kind = stats.kind
+            if kind is FieldKind.OBJECT:
+                schema_parts.append(
+                    f"{key}{dialect.level_start}{self._format(stats.fields)}{dialect.level_end}"
+                )
+            elif kind is FieldKind.OBJECT_ARRAY:
+                schema_parts.append(
+                    f"{key}{dialect.array_start}{self._format(stats.fields)}{dialect.array_end}"
+                )
+            else:
+                suffix = ""
+                if self.infer_types and stats.tags:
+                    tag = _widest_tag(stats.tags)
+                    if tag != "str":
+                        suffix = f"{dialect.type_separator}{tag}"
+                if kind is FieldKind.ARRAY:
+                    key = f"{key}{dialect.array_start}{dialect.array_end}"
+                schema_parts.append(f"{key}{suffix}")
+        return dialect.delimiter.join(schema_parts)
+
+
+def infer_schema(
+    rows: Iterable[dict],
+    sample_size: int = None,
+    dialect: Dialect = default_dialect,
+    infer_types: bool = False,
+) -> str:
+    """
+    Generates a schema holding the fields of many rows.
+
+    Args:
+        rows (Iterable[dict]): The rows to infer the schema from. When an iterator is given,
+            only the sampled rows are consumed from it.
+        sample_size (int, optional): The number of leading rows to look at. Defaults to all rows.
+        dialect (Dialect, optional): The dialect to write the schema in.
+        infer_types (bool, optional): Tag scalar and array fields with their type.
+
+    Returns:
+        str: The schema.
+
+    Raises:
+        ValueError: Raised if a field holds values of incompatible shapes.
+    """
+    if sample_size is not None:
+        if sample_size < 1:
+            raise ValueError("sample_size must be positive")
+        rows = islice(rows, sample_size)
+    inferrer = SchemaInferrer(dialect, infer_types)
+    inferrer.update(rows)
+    return inferrer.schema()
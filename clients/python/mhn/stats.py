@@ -0,0 +1,214 @@
+from time import perf_counter
+from typing import Callable, Dict, Iterator, Tuple
+from .schema import CompiledSchema, FieldKind
+
+
+def schema_shape(schema: CompiledSchema) -> Tuple[int, int]:
+    """
+    Returns the number of selected leaf fields of a schema and how deeply its nested
+    objects and arrays of objects go, with 1 for a schema without any.
+    """
+    fields = 0
+    depth = 1
+    for field in schema.fields:
+        if not field.selected:
+            continue
+        if field.kind is FieldKind.OBJECT:
+            nested_fields, nested_depth = schema_shape(field.schema)
+            fields += nested_fields
+            depth = max(depth, nested_depth + 1)
+        else:
+            fields += 1
+            if field.kind is FieldKind.OBJECT_ARRAY:
+                depth = max(depth, schema_shape(field.schema)[1] + 1)
+    return fields, depth
+
+
+class Stats:
+    """
+    Counters and per stage timers of a reader or writer.
+
+    Readers and writers only collect stats when given a `Stats` instance (or `stats=True`).
+    Collecting swaps in timed versions of their inner steps, so nothing is measured, and
+    nothing costs anything, when stats are off.
+
+    Readers time the `read` stage (I/O and splitting rows), the `filter` stage and the
+    `parse` stage, in which the scanner finds delimiters, resolves escapes and builds the
+    rows in a single pass. Writers time the `serialize` and `write` stages.
+
+    Example:
+        stats = Stats(on_batch=lambda stats: log.info(stats.as_dict()), batch_rows=100000)
+        reader = DictReader(input_file, read_schema_from_first_row=True, stats=stats)
+
+    Attributes:
+        rows (int): The rows returned by a reader or written by a writer.
+        lines (int): The rows a reader read, including those a filter rejected.
+        chars (int): The characters read or written, line breaks included. For ASCII data
+            this is the number of bytes.
+        fields (int): The fields decoded or encoded. Nested objects count by their fields,
+            and arrays count as one field.
+        escapes (int): The escape characters in the rows read or written.
+        depth (int): How deeply the rows nest, see `schema_shape`.
+        timers (Dict[str, float]): The cumulative seconds spent in each stage.
+        on_batch (Callable[[Stats], None]): Called with the stats every `batch_rows` rows,
+            and when a reader runs out of rows or `writerows` returns.
+        batch_rows (int): The number of rows between calls of `on_batch`.
+    """
+    def __init__(
+        self, on_batch: Callable[["Stats"], None] = None, batch_rows: int = 10000
+    ) -> None:
+        if batch_rows < 1:
+            raise ValueError("batch_rows must be positive")
+
+        self.on_batch = on_batch
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self.lines = 0
+        self.chars = 0
+        self.fields = 0
+        self.escapes = 0
+        self.depth = 0
+        self.timers: Dict[str, float] = {}
+        self._reported_rows = 0
+
+    def as_dict(self) -> dict:
+        """
+        Returns the counters and timers as a plain dictionary.
+        """
+        return {
+            "rows": self.rows,
+            "lines": self.lines,
+            "chars": self.chars,
+            "fields": self.fields,
+            "escapes": self.escapes,
+            "depth": self.depth,
+            "timers": dict(self.timers),
+        }
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+    def report(self) -> None:
+        """
+        Calls `on_batch` if any rows were counted since it was last called.
+        """
+        if self.on_batch is not None and self.rows != self._reported_rows:
+            self._reported_rows = self.rows
+            self.on_batch(self)
+
+    def _count_row(self, fields: int) -> None:
+        self.rows += 1
+        self.fields += fields
+        if self.on_batch is not None and not self.rows % self.batch_rows:
+            self._reported_rows = self.rows
+            self.on_batch(self)
+
+    def count_rows(self, count: int, schema: CompiledSchema) -> None:
+        """
+        Counts rows processed in bulk, such as by `read_columns`.
+        """
+        fields, depth = schema_shape(schema)
+        self.rows += count
+        self.fields += count * fields
+        self.depth = max(self.depth, depth)
+        self.report()
+
+    def _start(self, schema: CompiledSchema, *stages: str) -> int:
+        # Registers the stages of a reader or writer and returns its fields per row
+        for stage in stages:
+            self.timers.setdefault(stage, 0.0)
+        fields, depth = schema_shape(schema)
+        self.depth = max(self.depth, depth)
+        return fields
+
+    def track_lines(self, lines: Iterator[str], escape_char: str, line_break: str) -> Iterator[str]:
+        """
+        Wraps the raw rows of a reader, timing the `read` stage.
+        """
+        timers = self.timers
+        timers.setdefault("read", 0.0)
+        line_break_size = len(line_break)
+        while True:
+            start = perf_counter()
+            line = next(lines, None)
+            timers["read"] += perf_counter() - start
+            if line is None:
+                self.report()
+                return
+            self.lines += 1
+            self.chars += len(line) + line_break_size
+            self.escapes += line.count(escape_char)
+            yield line
+
+    def track_parser(
+        self, parse: Callable[[str], dict], schema: CompiledSchema
+    ) -> Callable[[str], dict]:
+        """
+        Wraps the function a reader parses rows with, timing the `parse` stage.
+        """
+        timers = self.timers
+        fields = self._start(schema, "read", "filter", "parse")
+
+        def parse_row(line: str) -> dict:
+            start = perf_counter()
+            row = parse(line)
+            timers["parse"] += perf_counter() - start
+            self._count_row(fields)
+            return row
+
+        return parse_row
+
+    def track_filter(self, matches: Callable[[str], bool]) -> Callable[[str], bool]:
+        """
+        Wraps the filter of a reader, timing the `filter` stage.
+        """
+        timers = self.timers
+
+        def timed_matches(line: str) -> bool:
+            start = perf_counter()
+            matched = matches(line)
+            timers["filter"] += perf_counter() - start
+            return matched
+
+        return timed_matches
+
+    def track_serializer(
+        self, convert: Callable[[dict], str], schema: CompiledSchema, escape_char: str
+    ) -> Callable[[dict], str]:
+        """
+        Wraps the function a writer serializes rows with, timing the `serialize` stage.
+        """
+        timers = self.timers
+        fields = self._start(schema, "serialize", "write")
+
+        def serialize(row: dict, sub_schema=None) -> str:
+            start = perf_counter()
+            mhn_str = convert(row, sub_schema)
+            timers["serialize"] += perf_counter() - start
+            self.escapes += mhn_str.count(escape_char)
+            self._count_row(fields)
+            return mhn_str
+
+        return serialize
+
+    def track_output(self, output):
+        """
+        Wraps the output file of a writer, timing the `write` stage.
+        """
+        return _TimedOutput(output, self)
+
+
+class _TimedOutput:
+    __slots__ = ("_output", "_stats")
+
+    def __init__(self, output, stats: Stats) -> None:
+        self._output = output
+        self._stats = stats
+
+    def write(self, text: str):
+        stats = self._stats
+        start = perf_counter()
+        result = self._output.write(text)
+        stats.timers["write"] += perf_counter() - start
+        stats.chars += len(text)
+        return result
@@ -1,4 +1,8 @@
+import re
+from functools import lru_cache
+from typing import Callable, Union
 from .dialect import Dialect
+from .scanner import get_scanner
 
 def unescape(value, dialect:Dialect):
     """
@@ -11,9 +15,7 @@ def unescape(value, dialect:Dialect):
     Returns:
         str: The unescaped string.
     """
-    for control_char, replace_char in dialect.escape_mappings.items():
-        value = value.replace(replace_char, control_char.lstrip(dialect.escape_char))
-    return value
+    return get_scanner(dialect).unescape(value)
 
 def split_nested(data, dialect:Dialect):
     parts = []
@@ -46,17 +48,7 @@ def parse_array(array_str, dialect:Dialect):
     Returns:
         List[str]: The unescaped array items as a list of strings.
     """
-    if array_str.startswith(dialect.array_start) and array_str.endswith(
-        dialect.array_end
-    ):
-        array_str = array_str[1:-1]    
-    
-    if array_str == dialect.empty_array:
-        return []
-    array_items = array_str.split(dialect.array_separator)
-    # Unescape escaped control characters in array items
-    array_items = [unescape(item, dialect) for item in array_items]
-    return array_items
+    return get_scanner(dialect).array(array_str, 0)[0]
 
 def unescape_newlines(value, dialect: Dialect):
     """
@@ -78,19 +70,119 @@ def unescape_newlines(value, dialect: Dialect):
 
 def escape_newlines(value, dialect:Dialect):
     if isinstance(value, str):
-        return value.replace(dialect.line_break, "\\n")
+        return value.replace(dialect.line_break, f"{dialect.escape_char}n")
     elif isinstance(value, list):
         return [escape_newlines(v, dialect) for v in value]
     else:
         return value
 
 def escape(value, dialect):
+    """
+    Escapes the control characters, escape characters and line breaks in a string or list of strings.
+
+    Values that need no escaping are returned unchanged after a single scan.
+
+    Args:
+        value (Union[str, List[str]]): The string or list of strings to escape.
+        dialect (Dialect): The dialect defining the control and escape characters.
+
+    Returns:
+        Union[str, List[str]]: The escaped string or list of strings.
+    """
     if isinstance(value, str):
-        for control_char in dialect.control_chars:
-            value = value.replace(control_char, f"{dialect.escape_char}{control_char}")
+        if dialect.needs_escaping.search(value) is not None:
+            value = value.translate(dialect.escape_table)
+            for text, escaped in dialect.escape_replacements:
+                value = value.replace(text, escaped)
     elif isinstance(value, list):
         value = [escape(v, dialect) for v in value]
     return value
 
+
+def escaper(dialect: Dialect, cache_size: int = 0) -> Callable[[str], str]:
+    """
+    Returns a function that escapes a single string, bound to a dialect.
+
+    Strings that need no escaping are returned unchanged after a single scan, so the cost
+    of escaping depends on the values that contain control characters, not on how many
+    control characters the dialect has.
+
+    Args:
+        dialect (Dialect): The dialect defining the control and escape characters.
+        cache_size (int, optional): Remember the escaped form of up to this many distinct
+            values, least recently used first out. Pays off for highly repetitive values
+            such as status codes or country names. Defaults to 0, no cache.
+
+    Returns:
+        Callable[[str], str]: The escaping function.
+    """
+    if cache_size < 0:
+        raise ValueError("cache_size must not be negative")
+
+    search = dialect.needs_escaping.search
+    escape_table = dialect.escape_table
+    escape_replacements = dialect.escape_replacements
+
+    def escape_value(value: str) -> str:
+        if search(value) is None:
+            return value
+        value = value.translate(escape_table)
+        for text, escaped in escape_replacements:
+            value = value.replace(text, escaped)
+        return value
+
+    if cache_size:
+        return lru_cache(cache_size)(escape_value)
+    return escape_value
+
+
+def bytes_escaper(
+    dialect: Dialect, encoding: str = "utf-8", cache_size: int = 0
+) -> Callable[[Union[str, bytes]], bytes]:
+    """
+    Returns a function that escapes a single value to encoded bytes, bound to a dialect.
+
+    `bytes` values are escaped as they are, without being decoded, and returned unchanged
+    when they need no escaping. Other values are converted with `str`, escaped and encoded.
+
+    Args:
+        dialect (Dialect): The dialect defining the control and escape characters. It must
+            be usable in bytes mode, see `Dialect.check_bytes_mode`.
+        encoding (str, optional): The encoding to write. Defaults to UTF-8.
+        cache_size (int, optional): Remember the escaped form of up to this many distinct
+            values, see `escaper`. Defaults to 0, no cache.
+
+    Returns:
+        Callable[[Union[str, bytes]], bytes]: The escaping function.
+    """
+    if cache_size < 0:
+        raise ValueError("cache_size must not be negative")
+    dialect.check_bytes_mode(encoding)
+
+    escape_text = escaper(dialect)
+    needs_escaping = re.compile(dialect.needs_escaping.pattern.encode(encoding))
+    search = needs_escaping.search
+    sub = needs_escaping.sub
+    escaped = {
+        chr(char).encode(encoding): value.encode(encoding)
+        for char, value in dialect.escape_table.items()
+    }
+    for text, replacement in dialect.escape_replacements:
+        escaped[text.encode(encoding)] = replacement.encode(encoding)
+
+    def replace(match) -> bytes:
+        return escaped[match.group(0)]
+
+    def escape_value(value: Union[str, bytes]) -> bytes:
+        if isinstance(value, bytes):
+            if search(value) is None:
+                return value
+            return sub(replace, value)
+        return escape_text(str(value)).encode(encoding)
+
+    if cache_size:
+        return lru_cache(cache_size)(escape_value)
+    return escape_value
+
 def escape_control_chars(data, dialect: Dialect):
     return [escape(v, dialect) for v in data]
\ No newline at end of file
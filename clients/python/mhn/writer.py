@@ -1,7 +1,11 @@
 from io import IOBase
+from itertools import chain, islice
+from typing import Callable, Iterable, Union
 from .dialect import Dialect, default_dialect
-from .schema import parse_schema_parts
-from .utilities import escape_newlines, escape, escape_control_chars
+from .schema import CompiledSchema, FieldKind, SchemaField, compile_schema, infer_schema
+from .codegen import compile_serializer
+from .stats import Stats
+from .utilities import bytes_escaper, escaper
 
 
 class DictWriter:
@@ -12,32 +16,80 @@ class DictWriter:
         writer = DictWriter(output_file, 'Field1|Field2|Field3')
         writer.writeheader()
         writer.writerow({'Field1': 'Value 1', 'Field2': 'Value 2', 'Field3': 'Value 3'})
+        writer.writerows(rows)
 
     """
     def __init__(
-        self, f: IOBase, schema: str, dialect: Dialect = default_dialect
+        self,
+        f: IOBase,
+        schema: Union[str, CompiledSchema],
+        dialect: Dialect = default_dialect,
+        chunk_size: int = 1024 * 1024,
+        chunk_rows: int = None,
+        stats: Union[Stats, bool] = None,
+        escape_cache_size: int = 0,
+        codegen: bool = False,
     ) -> None:
         """
         Initialize a new instance of DictWriter.
 
         Args:
             f (IOBase): A file-like object to write the MHN data to.
-            schema (str): The schema to use when writing the MHN data.
+            schema (Union[str, CompiledSchema]): The schema to use when writing the MHN data.
             dialect (Dialect, optional): The dialect to use when writing the MHN data.
                 Defaults to the default dialect.
+            chunk_size (int, optional): The number of characters `writerows` buffers before
+                writing them to the output in one call. Defaults to 1 MiB.
+            chunk_rows (int, optional): The number of rows `writerows` buffers before writing
+                them to the output, whichever of the two limits is reached first. Defaults to
+                no row limit.
+            stats (Union[Stats, bool], optional): Collect counters and per stage timings into
+                this `Stats` instance, or a new one for True, available as `writer.stats`.
+            escape_cache_size (int, optional): Remember the escaped form of up to this many
+                distinct values, for data that repeats the same values over and over. Values
+                are only escaped when they contain control characters either way. Defaults
+                to 0, no cache.
+            codegen (bool, optional): Serialize rows with a function generated for this
+                schema and dialect, see `codegen.compile_serializer`. Falls back to the
+                generic serializer where it is not supported.
 
         Raises:
             ValueError: Raised if the schema is empty.
         """
+        if chunk_size < 1 or (chunk_rows is not None and chunk_rows < 1):
+            raise ValueError("chunk_size and chunk_rows must be positive")
+        if escape_cache_size < 0:
+            raise ValueError("escape_cache_size must not be negative")
+
         self.output = f
-        self.schema = schema
         self.dialect = dialect
+        self.compiled_schema = compile_schema(schema, dialect)
+        self.schema = self.compiled_schema.schema
+        self.chunk_size = chunk_size
+        self.chunk_rows = chunk_rows
+        self._buffer = []
+        self._buffered_size = 0
+        self._escape = self._make_escaper(escape_cache_size)
+        self._line_break = self._encode(dialect.line_break)
+        if codegen:
+            serializer = self._compile_serializer()
+            if serializer is not None:
+                self.convert_dict_to_mhn = serializer
+
+        self.stats = Stats() if stats is True else stats or None
+        self._output = f
+        if self.stats is not None:
+            self.convert_dict_to_mhn = self.stats.track_serializer(
+                self.convert_dict_to_mhn, self.compiled_schema, self._encode(dialect.escape_char)
+            )
+            self._output = self.stats.track_output(f)
 
     def writeheader(self) -> None:
         """
         Write the schema to the output file.
         """
-        self.output.writelines([self.schema])
+        self._write_buffer()
+        self._output.write(self._encode(self.schema))
 
     def writerow(self, row: dict) -> None:
         """
@@ -46,42 +98,308 @@ class DictWriter:
         Args:
             row (dict): A dictionary of key/value pairs to write to the output file.
         """
+        self._write_buffer()
         mhn_str = self.convert_dict_to_mhn(row)
-        self.output.writelines([self.dialect.line_break, mhn_str])
-        pass
+        self._output.write(self._line_break + mhn_str)
+
+    def writerows(self, rows: Iterable[dict]) -> None:
+        """
+        Write rows of data to the output file.
+
+        Rows are serialized into an internal buffer which is written to the output in
+        chunks of `chunk_size` characters or `chunk_rows` rows, so large inputs cost a
+        handful of write calls rather than one per row. Everything is written by the time
+        the method returns.
+
+        Args:
+            rows (Iterable[dict]): The rows to write. Any iterable, including a generator.
+        """
+        buffer = self._buffer
+        append = buffer.append
+        convert = self.convert_dict_to_mhn
+        line_break = self._line_break
+        chunk_size = self.chunk_size
+        chunk_rows = self.chunk_rows
+        buffered_rows = 0
+
+        for row in rows:
+            mhn_str = convert(row)
+            append(line_break)
+            append(mhn_str)
+            self._buffered_size += len(line_break) + len(mhn_str)
+            buffered_rows += 1
+            if self._buffered_size >= chunk_size or buffered_rows == chunk_rows:
+                self._write_buffer()
+                buffered_rows = 0
+
+        self._write_buffer()
+        if self.stats is not None:
+            self.stats.report()
+
+    def flush(self) -> None:
+        """
+        Write any buffered rows and flush the output file.
+        """
+        self._write_buffer()
+        flush = getattr(self.output, "flush", None)
+        if flush is not None:
+            flush()
+
+    def close(self) -> None:
+        """
+        Write any buffered rows and close the output file.
+        """
+        self._write_buffer()
+        self.output.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _make_escaper(self, cache_size: int) -> Callable[[str], str]:
+        return escaper(self.dialect, cache_size)
+
+    def _encode(self, text: str) -> str:
+        # Returns text in the form written to the output: unchanged, as it is a text file
+        return text
+
+    def _compile_serializer(self) -> Union[Callable[[dict], str], None]:
+        return compile_serializer(
+            self.compiled_schema, self.dialect, self._escape, self.convert_dict_to_mhn
+        )
+
+    def _write_buffer(self) -> None:
+        if self._buffer:
+            self._output.write(self._line_break[:0].join(self._buffer))
+            self._buffer.clear()
+            self._buffered_size = 0
 
     def convert_dict_to_mhn(self, data_dict, sub_schema=None):
-        def handle_array(part, array_items):
-            if isinstance(array_items[0], dict):
-                end_index = part.rfind(self.dialect.array_end)
-                sub_schema = part[:end_index].split(self.dialect.array_start, 1)[1]
-                return self.dialect.array_separator.join([
-                    self.convert_dict_to_mhn(item, sub_schema=sub_schema) for item in array_items
-                ])
+        """
+        Serialize a dictionary to a single MHN row.
+
+        Args:
+            data_dict (dict): The dictionary to serialize.
+            sub_schema (Union[str, CompiledSchema], optional): The schema to serialize with.
+                Defaults to the writer's schema.
+
+        Returns:
+            str: The MHN formatted row, without a trailing line break.
+        """
+        if sub_schema is None:
+            schema = self.compiled_schema
+        else:
+            schema = compile_schema(sub_schema, self.dialect)
+        return self._convert_level(data_dict, schema)
+
+    def _convert_level(self, data_dict, schema: CompiledSchema, in_array: bool = False) -> str:
+        dialect = self.dialect
+        escape = self._escape
+        mhn_parts = []
+        if data_dict is None:
+            # None objects and array items are written like empty ones
+            data_dict = {}
+
+        for field in schema.fields:
+            kind = field.kind
+            try:
+                value = data_dict[field.name]
+            except KeyError:
+                value = None
+
+            if kind is FieldKind.SCALAR:
+                if value is None:
+                    # Missing fields and None values are written empty, as rows inferred
+                    # schemas are built from may each hold only some of the fields
+                    mhn_parts.append("")
+                elif field.format is not None:
+                    mhn_parts.append(field.format(value))
+                else:
+                    mhn_parts.append(escape(str(value)))
+            elif kind is FieldKind.OBJECT:
+                mhn_parts.append(
+                    f"{dialect.level_start}{self._convert_level(value, field.schema)}{dialect.level_end}"
+                )
             else:
-                return self.dialect.array_separator.join(escape_control_chars(escape_newlines(array_items, self.dialect), self.dialect))
+                mhn_parts.append(self._convert_array(value, field, in_array))
+
+        return dialect.delimiter.join(mhn_parts)
+
+    def _convert_array(self, value, field: SchemaField, in_array: bool) -> str:
+        dialect = self.dialect
+        if not value:
+            array = dialect.empty_array
+        elif field.kind is FieldKind.OBJECT_ARRAY:
+            array = dialect.array_separator.join([
+                self._convert_level(item, field.schema, True) for item in value
+            ])
+        elif field.format is not None:
+            array = dialect.array_separator.join(map(field.format, value))
+        else:
+            array = dialect.array_separator.join(map(self._escape, map(str, value)))
+        if in_array:
+            # Arrays inside the items of an array of objects share its separator, so
+            # they are wrapped in array brackets to tell their items apart
+            array = f"{dialect.array_start}{array}{dialect.array_end}"
+        return array
+
 
-        def handle_nested_object(part, field_name):
-            _, nested_schema = part.split(self.dialect.level_start)
-            nested_schema = nested_schema[:-1]  # Remove trailing level_end
-            return f"{self.dialect.level_start}{self.convert_dict_to_mhn(data_dict[field_name], sub_schema=nested_schema)}{self.dialect.level_end}"
+class BytesDictWriter(DictWriter):
+    """
+    A writer class for writing dictionaries as MHN formatted data to a binary stream.
+
+    Rows are serialized straight to encoded bytes, without a text encoding layer. Values
+    that are `bytes`, such as those of a `BytesDictReader` with `decode=False`, are
+    escaped and written as they are, without being decoded. The dialect must be ASCII and
+    the encoding ASCII compatible, such as UTF-8.
+
+    Example:
+        with open("copy.mhn", "wb") as f:
+            writer = BytesDictWriter(f, reader.compiled_schema)
+            writer.writeheader()
+            writer.writerows(reader)
 
-        def handle_regular_field(field_name):
-            return escape(escape_newlines(str(data_dict[field_name]), self.dialect), self.dialect)
+    Args:
+        f (IOBase): A binary file-like object to write the MHN data to.
+        schema (Union[str, CompiledSchema]): The schema to use when writing the MHN data.
+        dialect (Dialect, optional): The dialect to use when writing the MHN data.
+        encoding (str, optional): The encoding to write. Defaults to UTF-8.
+        chunk_size (int, optional): The number of bytes `writerows` buffers, see `DictWriter`.
+        chunk_rows (int, optional): The number of rows `writerows` buffers, see `DictWriter`.
+        stats (Union[Stats, bool], optional): Collect counters and timings, see `DictWriter`.
+            Characters are counted as bytes.
+        escape_cache_size (int, optional): The size of the cache of escaped values, see
+            `DictWriter`.
+        codegen (bool, optional): Accepted for compatibility with `DictWriter`. Rows are
+            always serialized by the generic bytes serializer.
+    """
+    def __init__(
+        self,
+        f: IOBase,
+        schema: Union[str, CompiledSchema],
+        dialect: Dialect = default_dialect,
+        encoding: str = "utf-8",
+        chunk_size: int = 1024 * 1024,
+        chunk_rows: int = None,
+        stats: Union[Stats, bool] = None,
+        escape_cache_size: int = 0,
+        codegen: bool = False,
+    ) -> None:
+        dialect.check_bytes_mode(encoding)
+        self.encoding = encoding
+        super().__init__(
+            f,
+            schema,
+            dialect,
+            chunk_size=chunk_size,
+            chunk_rows=chunk_rows,
+            stats=stats,
+            escape_cache_size=escape_cache_size,
+            codegen=codegen,
+        )
+        encode = self._encode
+        self._delimiter = encode(dialect.delimiter)
+        self._level_start = encode(dialect.level_start)
+        self._level_end = encode(dialect.level_end)
+        self._array_start = encode(dialect.array_start)
+        self._array_end = encode(dialect.array_end)
+        self._array_separator = encode(dialect.array_separator)
+        self._empty_array = encode(dialect.empty_array)
 
+    def _make_escaper(self, cache_size: int) -> Callable[[Union[str, bytes]], bytes]:
+        return bytes_escaper(self.dialect, self.encoding, cache_size)
+
+    def _encode(self, text: str) -> bytes:
+        return text.encode(self.encoding)
+
+    def _compile_serializer(self) -> None:
+        return None
+
+    def _convert_level(self, data_dict, schema: CompiledSchema, in_array: bool = False) -> bytes:
+        escape = self._escape
         mhn_parts = []
-        schema_parts = parse_schema_parts(sub_schema or self.schema, self.dialect)
+        if data_dict is None:
+            data_dict = {}
 
-        for part in schema_parts:
-            field_name = part.split(self.dialect.array_start)[0].split(
-                self.dialect.level_start
-            )[0]
+        for field in schema.fields:
+            kind = field.kind
+            try:
+                value = data_dict[field.name]
+            except KeyError:
+                value = None
 
-            if self.dialect.array_start in part and self.dialect.array_end in part:
-                mhn_parts.append(handle_array(part, data_dict[field_name]))
-            elif self.dialect.level_start in part:
-                mhn_parts.append(handle_nested_object(part, field_name))
+            if kind is FieldKind.SCALAR:
+                if value is None:
+                    mhn_parts.append(b"")
+                elif field.format is not None:
+                    # Formatted numbers and booleans are ASCII
+                    mhn_parts.append(field.format(value).encode())
+                else:
+                    mhn_parts.append(escape(value))
+            elif kind is FieldKind.OBJECT:
+                mhn_parts.append(
+                    self._level_start + self._convert_level(value, field.schema) + self._level_end
+                )
             else:
-                mhn_parts.append(handle_regular_field(field_name))
+                mhn_parts.append(self._convert_array(value, field, in_array))
+
+        return self._delimiter.join(mhn_parts)
 
-        return self.dialect.delimiter.join(mhn_parts)
+    def _convert_array(self, value, field: SchemaField, in_array: bool) -> bytes:
+        array_separator = self._array_separator
+        if not value:
+            array = self._empty_array
+        elif field.kind is FieldKind.OBJECT_ARRAY:
+            array = array_separator.join([
+                self._convert_level(item, field.schema, True) for item in value
+            ])
+        elif field.format is not None:
+            array = array_separator.join([field.format(item).encode() for item in value])
+        else:
+            array = array_separator.join(map(self._escape, value))
+        if in_array:
+            array = self._array_start + array + self._array_end
+        return array
+
+
+def write_rows(
+    f: IOBase,
+    rows: Iterable[dict],
+    sample_size: int = 1000,
+    dialect: Dialect = default_dialect,
+    infer_types: bool = False,
+    **kwargs,
+) -> DictWriter:
+    """
+    Writes rows whose schema is not known up front.
+
+    Only the first `sample_size` rows are buffered to infer the schema from. The header
+    is written as soon as the sample is read and the remaining rows are streamed after it.
+    Fields missing from a row are written empty, while fields that only appear after the
+    sample are dropped.
+
+    Example:
+        with open("users.mhn", "w") as output_file:
+            write_rows(output_file, rows, sample_size=10000)
+
+    Args:
+        f (IOBase): A file-like object to write the MHN data to.
+        rows (Iterable[dict]): The rows to write. Any iterable, including a generator.
+        sample_size (int, optional): The number of rows to infer the schema from. Pass None
+            to buffer every row first. Defaults to 1000.
+        dialect (Dialect, optional): The dialect to write the MHN data in.
+        infer_types (bool, optional): Tag scalar and array fields with their type.
+        **kwargs: Passed on to `DictWriter`.
+
+    Returns:
+        DictWriter: The writer used, to write further rows with.
+    """
+    rows = iter(rows)
+    sample = list(rows if sample_size is None else islice(rows, sample_size))
+    schema = infer_schema(sample, dialect=dialect, infer_types=infer_types)
+    writer = DictWriter(f, schema, dialect, **kwargs)
+    writer.writeheader()
+    writer.writerows(chain(sample, rows))
+    return writer
@@ -8,7 +8,8 @@ setup(
     author="Peter Wicks",
     author_email="peter@wicks.ninja",
     url="https://github.com/Sckism/mhn",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks"]),
+    extras_require={"numpy": ["numpy"]},
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -0,0 +1,104 @@
+import asyncio
+import unittest
+from mhn.aio import AsyncDictReader, AsyncDictWriter
+
+
+def _stream(data: bytes) -> asyncio.StreamReader:
+    stream = asyncio.StreamReader()
+    stream.feed_data(data)
+    stream.feed_eof()
+    return stream
+
+
+class _CollectingStream:
+    # Stands in for an asyncio.StreamWriter
+    def __init__(self):
+        self.data = b""
+        self.drains = 0
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        self.drains += 1
+
+
+class TestAsyncDictReader(unittest.TestCase):
+    data = "Id|User>Name<|Tags[]\n1|>Älice<|a^b\r\n\n2|>Bob<|~\n3|>Carol<|c".encode("utf-8")
+    expected_data = [
+        {"Id": "1", "User": {"Name": "Älice"}, "Tags": ["a", "b"]},
+        {"Id": "2", "User": {"Name": "Bob"}, "Tags": []},
+        {"Id": "3", "User": {"Name": "Carol"}, "Tags": ["c"]},
+    ]
+
+    def test_read_rows(self):
+        async def read(block_size):
+            reader = AsyncDictReader(
+                _stream(self.data), read_schema_from_first_row=True, block_size=block_size
+            )
+            rows = [row async for row in reader]
+            return reader.schema, rows
+
+        # A block size of 1 splits the multi-byte character across reads
+        for block_size in (1, 5, 1024):
+            self.assertEqual(("Id|User>Name<|Tags[]", self.expected_data), asyncio.run(read(block_size)))
+
+    def test_iter_batches(self):
+        async def read():
+            reader = AsyncDictReader(_stream(self.data), read_schema_from_first_row=True, block_size=4)
+            return [batch async for batch in reader.iter_batches(2)]
+
+        self.assertEqual([self.expected_data[:2], self.expected_data[2:]], asyncio.run(read()))
+
+    def test_read_with_schema_and_filter(self):
+        async def read():
+            reader = AsyncDictReader(
+                _stream(b"1|>Alice<\n2|>Bob<"), schema="Id|User>Name<", where={"User.Name": "Bob"}
+            )
+            return [row async for row in reader]
+
+        self.assertEqual([{"Id": "2", "User": {"Name": "Bob"}}], asyncio.run(read()))
+
+    def test_read_empty_stream(self):
+        async def read():
+            return [row async for row in AsyncDictReader(_stream(b""), schema="Id")]
+
+        self.assertEqual([], asyncio.run(read()))
+
+
+class TestAsyncDictWriter(unittest.TestCase):
+    def test_write_rows(self):
+        async def rows():
+            for i in range(5):
+                yield {"Id": i, "Name": f"Näme|{i}"}
+
+        async def write(source):
+            stream = _CollectingStream()
+            writer = AsyncDictWriter(stream, "Id|Name", batch_rows=2)
+            await writer.writeheader()
+            await writer.writerows(source)
+            await writer.writerow({"Id": 5, "Name": ""})
+            return stream
+
+        expected = "Id|Name" + "".join(f"\n{i}|Näme\\|{i}" for i in range(5)) + "\n5|"
+        for source in (rows(), [{"Id": i, "Name": f"Näme|{i}"} for i in range(5)]):
+            stream = asyncio.run(write(source))
+            self.assertEqual(expected, stream.data.decode("utf-8"))
+            self.assertEqual(5, stream.drains)
+
+    def test_round_trip(self):
+        async def round_trip():
+            stream = _CollectingStream()
+            writer = AsyncDictWriter(stream, "Id|Tags[]")
+            await writer.writeheader()
+            await writer.writerows([{"Id": "1", "Tags": ["a", "b"]}, {"Id": "2", "Tags": []}])
+            reader = AsyncDictReader(_stream(stream.data), read_schema_from_first_row=True)
+            return [row async for row in reader]
+
+        self.assertEqual(
+            [{"Id": "1", "Tags": ["a", "b"]}, {"Id": "2", "Tags": []}], asyncio.run(round_trip())
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from benchmarks.run import BENCHMARKS, main, run
+from benchmarks.workloads import WORKLOADS, get_workload
+from mhn.reader import DictReader
+from mhn.writer import DictWriter
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_workloads_round_trip(self):
+        for name in WORKLOADS:
+            workload = get_workload(name)
+            self.assertEqual(workload.pool, get_workload(name).pool)
+            output = io.StringIO()
+            writer = DictWriter(output, workload.schema)
+            writer.writeheader()
+            writer.writerows(workload.rows(50))
+            output.seek(0)
+            self.assertEqual(workload.pool[:50], list(DictReader(output, read_schema_from_first_row=True)))
+
+    def test_run(self):
+        results = run(20, workloads=["nested"], operations=["read.mmap", "read.json"])
+        self.assertEqual(["read.mmap", "read.json"], [result.operation for result in results])
+        self.assertTrue(all(result.items == 20 and result.peak_memory for result in results))
+
+    def test_main_writes_json(self):
+        stdout = io.StringIO()
+        with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+            main(["--rows", "10", "--workload", "flat", "--no-memory"])
+        document = json.loads(stdout.getvalue())
+        self.assertEqual(10, document["rows"])
+        self.assertEqual(list(BENCHMARKS), [result["operation"] for result in document["results"]])
+        self.assertIsNone(document["results"][0]["peak_memory"])
+
+
+if __name__ == "__main__":
+    unittest.main()
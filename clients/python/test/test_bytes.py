@@ -0,0 +1,121 @@
+import io
+import unittest
+from mhn import BytesDictReader, BytesDictWriter, Dialect, DictReader, DictWriter, Stats
+
+SCHEMA = "Id:int|Name|Active:bool|User>City|Tags[]<|Items[Sku|Qty|Codes[]]"
+
+ROWS = [
+    {
+        "Id": 1,
+        "Name": "Zoë | Ünïcode ^ 日本",
+        "Active": True,
+        "User": {"City": "Köln<>", "Tags": ["a~b", "c\\d", "e\nf"]},
+        "Items": [{"Sku": "X^1", "Qty": "2", "Codes": ["p", "q"]}, {"Sku": "Y", "Qty": "3", "Codes": []}],
+    },
+    {
+        "Id": 2,
+        "Name": "plain",
+        "Active": False,
+        "User": {"City": "Paris", "Tags": []},
+        "Items": [],
+    },
+]
+
+
+def _text_output(rows=ROWS, schema=SCHEMA) -> str:
+    output = io.StringIO()
+    writer = DictWriter(output, schema)
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+class TestBytesDictWriter(unittest.TestCase):
+    def test_writes_the_same_data_as_the_text_writer(self):
+        output = io.BytesIO()
+        writer = BytesDictWriter(output, SCHEMA)
+        writer.writeheader()
+        writer.writerow(ROWS[0])
+        writer.writerows(ROWS[1:])
+
+        self.assertEqual(_text_output().encode("utf-8"), output.getvalue())
+
+    def test_writes_bytes_values_without_decoding(self):
+        output = io.BytesIO()
+        writer = BytesDictWriter(output, "Name|Tags[]")
+        writer.writerows([{"Name": b"a|b\n\xff", "Tags": [b"x", "y^"]}])
+
+        self.assertEqual(b"\na\\|b\\n\xff|x^y\\^", output.getvalue())
+
+    def test_multi_character_line_break(self):
+        dialect = Dialect(line_break="\r\n")
+        output = io.BytesIO()
+        BytesDictWriter(output, "Name", dialect).writerows([{"Name": b"a\r\nb"}, {"Name": "c\r\nd\r"}])
+
+        self.assertEqual(b"\r\na\\nb\r\nc\\nd\\r", output.getvalue())
+
+    def test_rejects_encodings_that_are_not_ascii_compatible(self):
+        with self.assertRaises(ValueError):
+            BytesDictWriter(io.BytesIO(), SCHEMA, encoding="utf-16")
+        with self.assertRaises(ValueError):
+            BytesDictWriter(io.BytesIO(), SCHEMA, Dialect(delimiter="¦"))
+
+
+class TestBytesDictReader(unittest.TestCase):
+    def setUp(self):
+        self.data = _text_output().encode("utf-8")
+
+    def test_reads_the_same_rows_as_the_text_reader(self):
+        expected = list(DictReader(io.StringIO(_text_output()), read_schema_from_first_row=True))
+        for block_size in (None, 7, 1024):
+            reader = BytesDictReader(
+                io.BytesIO(self.data), read_schema_from_first_row=True, block_size=block_size
+            )
+            self.assertEqual(SCHEMA, reader.schema)
+            self.assertEqual(expected, list(reader))
+            self.assertEqual(ROWS, expected)
+
+    def test_leaves_values_as_bytes(self):
+        reader = BytesDictReader(io.BytesIO(self.data), read_schema_from_first_row=True, decode=False)
+        row = next(reader)
+
+        self.assertEqual(1, row["Id"])
+        self.assertIs(True, row["Active"])
+        self.assertEqual("Zoë | Ünïcode ^ 日本".encode("utf-8"), row["Name"])
+        self.assertEqual([b"a~b", b"c\\d", b"e\nf"], row["User"]["Tags"])
+        self.assertEqual(
+            [{"Sku": b"X^1", "Qty": b"2", "Codes": [b"p", b"q"]}, {"Sku": b"Y", "Qty": b"3", "Codes": []}],
+            row["Items"],
+        )
+
+    def test_pass_through_round_trip(self):
+        reader = BytesDictReader(io.BytesIO(self.data), read_schema_from_first_row=True, decode=False)
+        output = io.BytesIO()
+        writer = BytesDictWriter(output, reader.compiled_schema)
+        writer.writeheader()
+        writer.writerows(reader)
+
+        self.assertEqual(self.data, output.getvalue())
+
+    def test_lazy_columns_and_filters(self):
+        def reader(**kwargs):
+            return BytesDictReader(io.BytesIO(self.data), read_schema_from_first_row=True, **kwargs)
+
+        self.assertEqual("Köln<>", next(reader(lazy=True))["User"]["City"])
+        self.assertEqual([{"User": {"City": "Paris"}}], list(reader(columns=["User.City"], where={"Id": 2})))
+        self.assertEqual([2], [row["Id"] for row in reader(where={"User.City": "Paris"})])
+        self.assertEqual([2], [row["Id"] for row in reader(where={"Name": b"plain"}, decode=False)])
+        columns = reader(columns=["Id", "Name"]).read_columns()
+        self.assertEqual([1, 2], list(columns["Id"]))
+        self.assertEqual(["Zoë | Ünïcode ^ 日本", "plain"], columns["Name"])
+
+    def test_stats_count_bytes(self):
+        stats = Stats()
+        list(BytesDictReader(io.BytesIO(self.data), read_schema_from_first_row=True, stats=stats))
+
+        self.assertEqual(2, stats.rows)
+        self.assertEqual(len(self.data) - len(SCHEMA), stats.chars)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import io
+import unittest
+from mhn import BytesDictReader, BytesDictWriter, Dialect, DictReader, DictWriter, compile_schema
+from mhn.codegen import compile_parser, compile_serializer
+from mhn.scanner import get_bytes_scanner, get_scanner
+
+SCHEMA = "Id:int|Name|User>Name|Profile>Age:float|City<<|Tags[]|Items[Sku|Qty:int|Size>W|H<]|Flags[]:bool|Last"
+
+LINES = [
+    "1|Ann|>Bob|>1.5|Paris<<|a^b|X|2|>1|2<^Y\\^|3|>|<|true^false|end",
+    "2|A\\|n\\\\n\\n|>|>|<<|~|~|~|",
+    "3|Ann|>Bob|>2|Rome|extra<|more<|x|Z|1|>3|4<|1|last",
+    "4|Ann|>Bob<|a",
+    "5",
+    "6|Ann|Bob|7|a^b|[X|1|>5|6<]|[0]|tail",
+]
+
+ROWS = [
+    {
+        "Id": 1,
+        "Name": "Ann|{x}'\\\n",
+        "User": {"Name": "Bob", "Profile": {"Age": 1.5, "City": "Pa^ris"}},
+        "Tags": ["a", "b~"],
+        "Items": [{"Sku": "X", "Qty": 2, "Size": {"W": "1", "H": "2"}}, {"Sku": "Y", "Qty": None, "Size": {}}],
+        "Flags": [True, False],
+        "Last": 3.5,
+    },
+    {"Id": None, "User": {}, "Tags": [], "Items": []},
+    {"Name": None, "User": None, "Tags": None, "Items": [None, {"Size": None}], "Flags": None},
+    {},
+]
+
+
+class TestCompileParser(unittest.TestCase):
+    def assert_same_rows(self, schema, lines, dialect=None):
+        scanner = get_scanner(dialect) if dialect else get_scanner()
+        parse = compile_parser(schema, scanner)
+        self.assertIsNotNone(parse)
+        for line in lines:
+            try:
+                expected = scanner.record(line, schema)
+            except ValueError as error:
+                with self.assertRaises(ValueError) as raised:
+                    parse(line)
+                self.assertEqual(str(error), str(raised.exception))
+            else:
+                self.assertEqual(expected, parse(line), line)
+
+    def test_matches_the_generic_parser(self):
+        self.assert_same_rows(compile_schema(SCHEMA), LINES)
+
+    def test_matches_the_generic_parser_with_projections(self):
+        schema = compile_schema(SCHEMA)
+        for columns in (["Name"], ["User.Profile.City", "Flags"], ["Items.Size.H", "Id"], ["Items"]):
+            self.assert_same_rows(schema.project(columns), LINES)
+
+    def test_custom_dialect(self):
+        dialect = Dialect(delimiter="'", level_start="{", level_end="}", array_separator='"', escape_char="%")
+        schema = compile_schema("A'B{C'D}'E[]", dialect)
+        self.assert_same_rows(schema, ["1'{2'3}'x\"y%\"z", "%'%{'{%%'}'~"], dialect)
+
+    def test_unsupported_scanner(self):
+        self.assertIsNone(compile_parser(compile_schema(SCHEMA), get_bytes_scanner()))
+
+
+class TestCompileSerializer(unittest.TestCase):
+    def test_matches_the_generic_serializer(self):
+        for dialect in (
+            Dialect(),
+            Dialect(delimiter="'", level_start="{", level_end="}", array_separator='"', line_break="\r\n"),
+        ):
+            characters = {"|": dialect.delimiter, ">": dialect.level_start, "<": dialect.level_end}
+            schema = compile_schema(SCHEMA.translate(str.maketrans(characters)), dialect)
+            generic = DictWriter(io.StringIO(), schema, dialect)
+            serialize = compile_serializer(schema, dialect, generic._escape, generic.convert_dict_to_mhn)
+            self.assertTrue(hasattr(serialize, "_source"))
+            for row in ROWS:
+                self.assertEqual(generic.convert_dict_to_mhn(row), serialize(row))
+
+    def test_sub_schema_uses_the_generic_serializer(self):
+        writer = DictWriter(io.StringIO(), "A|B", codegen=True)
+        self.assertEqual("1|>2<", writer.convert_dict_to_mhn({"A": 1, "B": {"C": 2}}, "A|B>C<"))
+
+    def test_bytes_writer_falls_back(self):
+        output = io.BytesIO()
+        writer = BytesDictWriter(output, "A|B[]", codegen=True)
+        writer.writerows([{"A": "x|y", "B": ["z"]}])
+        self.assertEqual(b"\nx\\|y|z", output.getvalue())
+
+
+class TestCodegenRoundTrip(unittest.TestCase):
+    def test_write_and_read_with_codegen(self):
+        output = io.StringIO()
+        writer = DictWriter(output, SCHEMA, codegen=True, stats=True)
+        writer.writeheader()
+        writer.writerows(ROWS)
+        self.assertEqual(len(ROWS), writer.stats.rows)
+
+        expected = list(DictReader(io.StringIO(output.getvalue()), read_schema_from_first_row=True))
+        rows = list(DictReader(io.StringIO(output.getvalue()), read_schema_from_first_row=True, codegen=True))
+        self.assertEqual(expected, rows)
+        self.assertEqual("Ann|{x}'\\\n", rows[0]["Name"])
+
+        reader = BytesDictReader(io.BytesIO(output.getvalue().encode()), read_schema_from_first_row=True, codegen=True)
+        self.assertEqual(expected, list(reader))
+
+
+if __name__ == "__main__":
+    unittest.main()
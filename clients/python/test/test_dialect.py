@@ -0,0 +1,60 @@
+import pickle
+import unittest
+from mhn.dialect import Dialect, default_dialect
+from mhn.utilities import escape, escaper
+
+
+class TestDialect(unittest.TestCase):
+    def test_dialect_is_immutable(self):
+        dialect = Dialect()
+        with self.assertRaises(AttributeError):
+            dialect.delimiter = ";"
+        with self.assertRaises(AttributeError):
+            dialect.extra = True
+
+    def test_dialects_with_same_characters_are_equal(self):
+        self.assertEqual(Dialect(), default_dialect)
+        self.assertEqual(hash(Dialect()), hash(default_dialect))
+        self.assertNotEqual(Dialect(delimiter=";"), default_dialect)
+
+    def test_dialect_can_be_pickled(self):
+        dialect = Dialect(delimiter=";", level_start="(", level_end=")")
+        self.assertEqual(dialect, pickle.loads(pickle.dumps(dialect)))
+
+    def test_control_chars(self):
+        self.assertEqual(frozenset("|><[]^~"), default_dialect.control_chars)
+
+    def test_escape_table(self):
+        self.assertEqual(r"a\|b\\c\nd\~", "a|b\\c\nd~".translate(default_dialect.escape_table))
+
+    def test_needs_escaping(self):
+        self.assertIsNone(default_dialect.needs_escaping.search("plain value"))
+        self.assertIsNotNone(default_dialect.needs_escaping.search("value with ^"))
+
+    def test_escape_with_multi_character_line_break(self):
+        dialect = Dialect(line_break="\r\n")
+        self.assertEqual(r"a\nb\|c", escape("a\r\nb|c", dialect))
+        self.assertEqual(r"a\rb\n\r\rc", escape("a\rb\r\n\r\rc", dialect))
+
+    def test_escape_carriage_returns(self):
+        self.assertEqual(r"a\rb\r\nc", escape("a\rb\r\nc", default_dialect))
+
+    def test_escaper_returns_clean_values_unchanged(self):
+        value = "plain value"
+        self.assertIs(value, escaper(default_dialect)(value))
+        self.assertEqual(r"a\^b\n", escaper(default_dialect)("a^b\n"))
+
+    def test_escaper_cache_is_bounded(self):
+        escape_value = escaper(default_dialect, cache_size=2)
+        for value in ("a|b", "c|d", "a|b", "e|f"):
+            self.assertEqual(escape(value, default_dialect), escape_value(value))
+        info = escape_value.cache_info()
+        self.assertEqual((1, 3, 2), (info.hits, info.misses, info.currsize))
+
+    def test_control_chars_must_be_single_characters(self):
+        with self.assertRaises(ValueError):
+            Dialect(delimiter="||")
+
+
+if __name__ == "__main__":
+    unittest.main()
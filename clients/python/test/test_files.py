@@ -0,0 +1,80 @@
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+import mhn
+from mhn.files import detect_compression
+
+
+class TestOpen(unittest.TestCase):
+    schema = "Id|User>Name<|Tags[]"
+    rows = [{"Id": str(i), "User": {"Name": f"Näme|{i}"}, "Tags": ["a", str(i)]} for i in range(1000)]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, **kwargs):
+        path = os.path.join(self.directory, name)
+        with mhn.open(path, "w", self.schema, **kwargs) as writer:
+            writer.writeheader()
+            writer.writerows(self.rows)
+        return path
+
+    def test_round_trip_compressed(self):
+        for name, opener in (
+            ("rows.mhn", open),
+            ("rows.mhn.gz", gzip.open),
+            ("rows.mhn.bz2", bz2.open),
+            ("rows.mhn.xz", lzma.open),
+            ("rows.mhn.lzma", lzma.open),
+        ):
+            path = self.write(name)
+            with opener(path, "rb") as f:
+                self.assertTrue(f.read().decode("utf-8").startswith(f"{self.schema}\n0|>Näme\\|0<"))
+            for threaded in (False, True):
+                with mhn.open(path, threaded=threaded, block_size=100) as reader:
+                    self.assertEqual(self.schema, reader.schema)
+                    self.assertEqual(self.rows, list(reader))
+
+    def test_detect_compression_from_magic_bytes(self):
+        path = self.write("rows.mhn.gz")
+        renamed = os.path.join(self.directory, "rows.data")
+        os.rename(path, renamed)
+        self.assertEqual("gzip", detect_compression(renamed))
+        self.assertEqual(None, detect_compression(renamed, "w"))
+        with mhn.open(renamed, columns=["User.Name"]) as reader:
+            self.assertEqual({"User": {"Name": "Näme|1"}}, list(reader)[1])
+
+    def test_read_with_schema(self):
+        path = os.path.join(self.directory, "rows.mhn.gz")
+        with gzip.open(path, "wt") as f:
+            f.write("1|a\n2|b")
+        with mhn.open(path, schema="Id|Name") as reader:
+            self.assertEqual([{"Id": "1", "Name": "a"}, {"Id": "2", "Name": "b"}], list(reader))
+
+    def test_close_threaded_reader_early(self):
+        path = self.write("rows.mhn.gz")
+        reader = mhn.open(path, threaded=True, block_size=16)
+        next(reader)
+        reader.close()
+        self.assertTrue(reader.input.closed)
+
+    def test_write_requires_schema(self):
+        with self.assertRaises(ValueError):
+            mhn.open(os.path.join(self.directory, "rows.mhn"), "w")
+
+    def test_star_import_keeps_builtin_open(self):
+        namespace = {}
+        exec("from mhn import *", namespace)
+        self.assertNotIn("open", namespace)
+        self.assertIn("DictReader", namespace)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import shutil
+import tempfile
+import unittest
+from mhn.dialect import Dialect
+from mhn.index import KeyIndex, RowIndex
+from mhn.reader import DictReader, MmapDictReader
+
+
+class TestRowIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "rows.mhn")
+        lines = ["Id|Name"] + [f"{i}|Näme {i}" for i in range(25)]
+        # A blank line and a carriage return are not counted as rows
+        lines.insert(5, "")
+        lines.insert(9, "\r")
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            f.write("\n".join(lines))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_build(self):
+        for block_size in (3, 1024):
+            index = RowIndex.build(self.path, every=10, block_size=block_size)
+            self.assertEqual(25, index.rows)
+            self.assertEqual(3, len(index.offsets))
+            with open(self.path, "rb") as f:
+                data = f.read()
+            self.assertEqual("10|Näme 10", data[index.offsets[1]:].decode("utf-8").split("\n")[0])
+            self.assertEqual((index.offsets[2], 3), index.locate(23))
+            self.assertEqual((len(data), 0), index.locate(25))
+
+    def test_build_with_custom_line_break(self):
+        path = os.path.join(self.directory, "crlf.mhn")
+        with open(path, "wb") as f:
+            f.write(b"1\r\n2\r\n3")
+        index = RowIndex.build(path, every=2, dialect=Dialect(line_break="\r\n"), has_header=False, block_size=2)
+        self.assertEqual(3, index.rows)
+        self.assertEqual([0, 6], list(index.offsets))
+
+    def test_open_saves_and_reuses_sidecar(self):
+        index = RowIndex.open(self.path, every=10)
+        self.assertTrue(os.path.exists(f"{self.path}.idx"))
+        loaded = RowIndex.open(self.path, every=10)
+        self.assertEqual(list(index.offsets), list(loaded.offsets))
+        self.assertEqual(index.rows, loaded.rows)
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n25|Näme 25")
+        self.assertEqual(26, RowIndex.open(self.path, every=10).rows)
+
+    def test_seek_row(self):
+        index = RowIndex.build(self.path, every=10)
+        with open(self.path, encoding="utf-8", newline="") as f:
+            for block_size in (None, 16):
+                f.seek(0)
+                reader = DictReader(f, read_schema_from_first_row=True, block_size=block_size, index=index)
+                reader.seek_row(13)
+                self.assertEqual({"Id": "13", "Name": "Näme 13"}, next(reader))
+                self.assertEqual({"Id": "14", "Name": "Näme 14"}, next(reader))
+                reader.seek_row(-1)
+                self.assertEqual("24", next(reader)["Id"])
+
+    def test_slice_reader(self):
+        index = RowIndex.build(self.path, every=4)
+        with MmapDictReader(self.path, read_schema_from_first_row=True, index=index) as reader:
+            self.assertEqual(["3", "4", "5"], [row["Id"] for row in reader[3:6]])
+            self.assertEqual(["20", "22", "24"], [row["Id"] for row in reader[20::2]])
+            self.assertEqual({"Id": "7", "Name": "Näme 7"}, reader[7])
+            self.assertEqual("8", next(reader)["Id"])
+            self.assertEqual("24", reader[-1]["Id"])
+            self.assertEqual([], reader[30:40])
+            with self.assertRaises(IndexError):
+                reader[25]
+
+    def test_slice_reader_with_filter(self):
+        index = RowIndex.build(self.path, every=4)
+        with MmapDictReader(self.path, read_schema_from_first_row=True, index=index, where={"Name": "Näme 7"}) as reader:
+            self.assertEqual(["7"], [row["Id"] for row in reader[3:9]])
+            self.assertEqual("5", reader[5]["Id"])
+            self.assertEqual("7", next(reader)["Id"])
+            reader.seek_row(2)
+            self.assertEqual([["7"]], [[row["Id"] for row in batch] for batch in reader.iter_batches(10)])
+
+    def test_seek_without_index(self):
+        reader = DictReader(open(self.path, encoding="utf-8"), read_schema_from_first_row=True)
+        with reader, self.assertRaises(ValueError):
+            reader.seek_row(3)
+
+
+class TestKeyIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "users.mhn")
+        lines = ["Id:int|User>Name|City<|Tags[]"]
+        for i in range(50):
+            lines.append(f"{i}|>Näme {i % 10}|C\\|{i}<|t{i % 3}^x")
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            f.write("\n".join(lines))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_lookup(self):
+        index = KeyIndex.build(self.path, "Id", block_size=64)
+        self.assertEqual(50, len(index))
+        self.assertIn(7, index)
+        self.assertNotIn(50, index)
+        with MmapDictReader(self.path, read_schema_from_first_row=True, key_index=index) as reader:
+            self.assertEqual(
+                [{"Id": 7, "User": {"Name": "Näme 7", "City": "C|7"}, "Tags": ["t1", "x"]}],
+                reader.lookup(7),
+            )
+            self.assertEqual([], reader.lookup("missing"))
+
+    def test_lookup_nested_key(self):
+        index = KeyIndex.open(self.path, "User.Name")
+        with open(self.path, encoding="utf-8", newline="") as f:
+            reader = DictReader(f, read_schema_from_first_row=True, key_index=index, columns=["Id"])
+            self.assertEqual([{"Id": 3}, {"Id": 13}, {"Id": 23}, {"Id": 33}, {"Id": 43}], reader.lookup("Näme 3"))
+
+    def test_lookup_array_items(self):
+        index = KeyIndex.build(self.path, "Tags")
+        self.assertEqual(len(index.find("t0")) + len(index.find("t1")) + len(index.find("t2")), 50)
+        self.assertEqual(50, len(index.find("x")))
+
+    def test_open_saves_and_reuses_sidecar(self):
+        index = KeyIndex.open(self.path, "User.Name")
+        self.assertTrue(os.path.exists(f"{self.path}.User.Name.idx"))
+        loaded = KeyIndex.load(f"{self.path}.User.Name.idx")
+        self.assertEqual("User.Name", loaded.key)
+        self.assertEqual(index.keys, loaded.keys)
+        self.assertEqual(index.find("Näme 9"), loaded.find("Näme 9"))
+
+    def test_unknown_key(self):
+        with self.assertRaises(ValueError):
+            KeyIndex.build(self.path, "User.Missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import io
+import os
+import pickle
+import tempfile
+import unittest
+from mhn.dialect import Dialect
+from mhn.parallel import ParallelDictReader, ParallelDictWriter, split_ranges
+from mhn.schema import compile_schema
+from mhn.writer import DictWriter
+
+
+class TestParallelDictReader(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".mhn")
+        os.close(handle)
+        self.data_rows = [
+            {"Id": f"{i}", "User": {"Name": f"Name\n{i}"}, "Tags": [f"Tag|{i}", "x"]}
+            for i in range(200)
+        ]
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            writer = DictWriter(f, "Id|User>Name<|Tags[]")
+            writer.writeheader()
+            writer.writerows(self.data_rows)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_split_ranges_align_to_records(self):
+        with open(self.path, "rb") as f:
+            header = f.readline()
+            data = f.read()
+
+        ranges = split_ranges(self.path, start=len(header), chunk_size=100)
+        self.assertGreater(len(ranges), 1)
+        self.assertEqual(len(header), ranges[0][0])
+        self.assertEqual(os.path.getsize(self.path), ranges[-1][1])
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(b"\n", data[end - len(header) - 1:end - len(header)])
+
+    def test_read_in_order(self):
+        reader = ParallelDictReader(
+            self.path, read_schema_from_first_row=True, workers=2, chunk_size=256
+        )
+        self.assertEqual(self.data_rows, list(reader))
+
+    def test_read_out_of_order(self):
+        reader = ParallelDictReader(
+            self.path, read_schema_from_first_row=True, workers=2, chunk_size=256, ordered=False
+        )
+        rows = list(reader)
+        self.assertEqual(len(self.data_rows), len(rows))
+        self.assertEqual(
+            sorted(self.data_rows, key=lambda row: row["Id"]),
+            sorted(rows, key=lambda row: row["Id"]),
+        )
+
+    def test_compiled_schema_can_be_pickled(self):
+        dialect = Dialect(delimiter=";")
+        compiled = compile_schema("Id;User>Name<", dialect)
+        self.assertIs(compiled, pickle.loads(pickle.dumps(compiled)))
+
+
+class TestParallelDictWriter(unittest.TestCase):
+    def test_write_matches_dict_writer(self):
+        data_rows = [
+            {"Id": i, "User": {"Name": f"Name|{i}"}, "Tags": [f"Tag\n{i}", "x"]}
+            for i in range(95)
+        ]
+        schema = "Id|User>Name<|Tags[]"
+
+        expected = io.StringIO()
+        writer = DictWriter(expected, schema)
+        writer.writeheader()
+        writer.writerows(data_rows)
+
+        output = io.StringIO()
+        writer = ParallelDictWriter(output, schema, workers=2, batch_rows=10)
+        writer.writeheader()
+        writer.writerows(row for row in data_rows)
+
+        self.assertEqual(expected.getvalue(), output.getvalue())
+
+    def test_write_nothing(self):
+        output = io.StringIO()
+        writer = ParallelDictWriter(output, "Id", workers=2)
+        writer.writerows([])
+        self.assertEqual("", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,12 @@
+import importlib.util
+import os
+import tempfile
 import unittest
 from io import StringIO
 from mhn.dialect import Dialect, default_dialect
-from mhn.reader import DictReader
+from array import array
+from mhn.reader import BytesDictReader, DictionaryColumn, DictReader, MmapDictReader, read_columns
+from mhn.writer import DictWriter
 from mhn.utilities import unescape, parse_array, unescape_newlines, split_nested
 from mhn.schema import generate_schema
 
@@ -145,7 +150,7 @@ class TestDictReader(unittest.TestCase):
         input_data = (
             schema
             + "\n"
-            + r"Value with newline\\ninside|Value with newline\\n\\nand two newlines|>Nested value with newline\\ninside|<|Value with newline\\ninside^Value with two\\nnewlines\\nhere"
+            + r"Value with newline\ninside|Value with newline\n\nand two newlines|>Nested value with newline\ninside|<|Value with newline\ninside^Value with two\nnewlines\nhere"
         )
 
         f = StringIO(input_data)
@@ -154,6 +159,238 @@ class TestDictReader(unittest.TestCase):
 
         self.assertEqual(expected_output, output)
 
+    def test_read_array_of_nested_objects(self):
+        data_str = "1|A|>X<|1990^B|>Y<|2000|USA"
+        schema_str = "Id|Books[Title|Author>Name<|Year]|Country"
+        reader = DictReader(StringIO(data_str), schema=schema_str)
+        expected_data = [
+            {
+                "Id": "1",
+                "Books": [
+                    {"Title": "A", "Author": {"Name": "X"}, "Year": "1990"},
+                    {"Title": "B", "Author": {"Name": "Y"}, "Year": "2000"},
+                ],
+                "Country": "USA",
+            }
+        ]
+        self.assertEqual(expected_data, list(reader))
+
+    def test_read_empty_arrays(self):
+        data_str = "1|~|~|USA"
+        schema_str = "Id|Tags[]|Books[Title|Year]|Country"
+        reader = DictReader(StringIO(data_str), schema=schema_str)
+        expected_data = [{"Id": "1", "Tags": [], "Books": [], "Country": "USA"}]
+        self.assertEqual(expected_data, list(reader))
+
+    def test_read_placeholder_text_is_kept(self):
+        data_str = "___ARRAY_START___|___DELIMITER___"
+        reader = DictReader(StringIO(data_str), schema="Field1|Field2")
+        expected_data = [{"Field1": "___ARRAY_START___", "Field2": "___DELIMITER___"}]
+        self.assertEqual(expected_data, list(reader))
+
+    def test_round_trip_with_writer(self):
+        data_rows = [
+            {
+                "Id": "1",
+                "Text": "back\\slash \\n > < | [ ] ^ ~ \n end ",
+                "User": {"Name": " Alice\\", "Tags": ["~", "", "a^b\\"]},
+                "Tags": [],
+                "Books": [
+                    {"Title": "A|B", "Year": "1990"},
+                    {"Title": "~", "Year": "2000\\"},
+                ],
+                "Empty": [""],
+            },
+        ]
+        schema = generate_schema(data_rows[0])
+        output = StringIO()
+        writer = DictWriter(output, schema)
+        writer.writeheader()
+        for row in data_rows:
+            writer.writerow(row)
+
+        reader = DictReader(StringIO(output.getvalue()), read_schema_from_first_row=True)
+        self.assertEqual(data_rows, list(reader))
+
+    def test_read_in_blocks(self):
+        data_rows = [
+            {"Id": f"{i}", "User": {"Name": f"Name {i}"}, "Tags": [f"Tag|{i}", "x"]}
+            for i in range(50)
+        ]
+        schema = "Id|User>Name<|Tags[]"
+        output = StringIO()
+        writer = DictWriter(output, schema)
+        writer.writeheader()
+        writer.writerows(data_rows)
+
+        for block_size in (1, 7, 64, 1024 * 1024):
+            reader = DictReader(
+                StringIO(output.getvalue()), read_schema_from_first_row=True, block_size=block_size
+            )
+            self.assertEqual(data_rows, list(reader))
+
+    def test_read_in_blocks_skips_blank_lines(self):
+        data_str = "Id|Name\r\n1|Alice\r\n\r\n\n2|Bob\n"
+        reader = DictReader(StringIO(data_str), read_schema_from_first_row=True, block_size=4)
+        expected_data = [{"Id": "1", "Name": "Alice"}, {"Id": "2", "Name": "Bob"}]
+        self.assertEqual(expected_data, list(reader))
+
+    def test_iter_batches(self):
+        data_str = "\n".join(["Id"] + [str(i) for i in range(10)])
+        for block_size in (None, 3):
+            reader = DictReader(StringIO(data_str), read_schema_from_first_row=True, block_size=block_size)
+            batches = list(reader.iter_batches(4))
+            self.assertEqual([4, 4, 2], [len(batch) for batch in batches])
+            self.assertEqual({"Id": "9"}, batches[-1][-1])
+
+    def test_read_lazy_rows(self):
+        data_str = "1|>Alice|>Paris\\|FR|<<|[Python^Dja\\^ngo]|A|1990^B|2000|US\\|A"
+        schema_str = "Id|User>Name|Address>City|Country<<|Tags[]|Books[Title|Year]|Country"
+        expected_data = list(DictReader(StringIO(data_str), schema=schema_str))
+        reader = DictReader(StringIO(data_str), schema=schema_str, lazy=True)
+        rows = list(reader)
+
+        self.assertEqual("US|A", rows[0]["Country"])
+        self.assertEqual("Paris|FR", rows[0]["User"]["Address"]["City"])
+        self.assertEqual(["Python", "Dja^ngo"], rows[0]["Tags"])
+        self.assertIn("Books", rows[0])
+        self.assertNotIn("Missing", rows[0])
+        self.assertEqual(list(expected_data[0]), list(rows[0]))
+        self.assertEqual(expected_data, rows)
+        self.assertEqual(expected_data[0], rows[0].to_dict())
+
+    def test_lazy_rows_cache_decoded_fields(self):
+        reader = DictReader(StringIO("1|>Alice<"), schema="Id|User>Name<", lazy=True)
+        row = next(reader)
+        self.assertIs(row["User"], row["User"])
+        with self.assertRaises(KeyError):
+            row["Missing"]
+
+    def test_read_typed_fields(self):
+        data_str = "1|>9.5|true<|1^2|A|1990\n|>|0<|~||"
+        schema_str = "Id:int|User>Score:float|Active:bool<|Ranks[]:int|Books[Title|Year:int]"
+        expected_data = [
+            {"Id": 1, "User": {"Score": 9.5, "Active": True}, "Ranks": [1, 2], "Books": [{"Title": "A", "Year": 1990}]},
+            {"Id": None, "User": {"Score": None, "Active": False}, "Ranks": [], "Books": [{"Title": "", "Year": None}]},
+        ]
+        self.assertEqual(expected_data, list(DictReader(StringIO(data_str), schema=schema_str)))
+
+        rows = list(DictReader(StringIO(data_str), schema=schema_str, lazy=True))
+        self.assertEqual(1, rows[0]["Id"])
+        self.assertEqual(9.5, rows[0]["User"]["Score"])
+        self.assertEqual([1, 2], rows[0]["Ranks"])
+        self.assertEqual(expected_data, rows)
+
+    def test_typed_round_trip_with_writer(self):
+        data = [
+            {"Id": 1, "Score": 0.1, "Active": False, "Ranks": [3, 4], "Name": "A|B"},
+            {"Id": -2, "Score": 1e-20, "Active": True, "Ranks": [], "Name": ""},
+        ]
+        schema = generate_schema(data[0], infer_types=True)
+        output = StringIO()
+        writer = DictWriter(output, schema)
+        writer.writeheader()
+        writer.writerows(data)
+
+        output.seek(0)
+        self.assertEqual(data, list(DictReader(output, read_schema_from_first_row=True)))
+
+    def test_read_selected_columns(self):
+        data_str = "1|>Alice|30|>Paris<<|Python^Dja\\|ngo|A|1990^B|2000|USA"
+        schema_str = "Id|User>Name|Age|Address>City<<|Tags[]|Books[Title|Year]|Country"
+        columns = ["Country", "User.Name", "Books.Year", "Tags"]
+        expected_data = [
+            {
+                "User": {"Name": "Alice"},
+                "Tags": ["Python", "Dja|ngo"],
+                "Books": [{"Year": "1990"}, {"Year": "2000"}],
+                "Country": "USA",
+            }
+        ]
+        for lazy in (False, True):
+            reader = DictReader(StringIO(data_str), schema=schema_str, columns=columns, lazy=lazy)
+            self.assertEqual(expected_data, list(reader))
+
+    def test_read_leading_columns(self):
+        data_str = "1|>Alice|30<|Python^Django|USA"
+        reader = DictReader(StringIO(data_str), schema="Id|User>Name|Age<|Tags[]|Country", columns=["User.Age"])
+        self.assertEqual([{"User": {"Age": "30"}}], list(reader))
+
+    def test_read_unknown_column(self):
+        with self.assertRaises(ValueError):
+            DictReader(StringIO("1|Alice"), schema="Id|Name", columns=["User.Name"])
+        with self.assertRaises(ValueError):
+            DictReader(StringIO("1|Alice"), schema="Id|Name", columns=["Name.First"])
+
+    def test_read_interned_values(self):
+        data_str = "Id|Country|Tags[]|Books[Genre]\n1|USA|a^b|X^Y\n2|USA|b|Y"
+        for lazy in (False, True):
+            reader = DictReader(StringIO(data_str), read_schema_from_first_row=True, intern=True, lazy=lazy)
+            first, second = reader
+            self.assertIs(first["Country"], second["Country"])
+            self.assertIs(first["Tags"][1], second["Tags"][0])
+            self.assertIs(first["Books"][1]["Genre"], second["Books"][0]["Genre"])
+
+        reader = DictReader(StringIO(data_str), read_schema_from_first_row=True, intern=True, row_factory="record")
+        first, second = reader
+        self.assertIs(first.Country, second.Country)
+
+        reader = DictReader(StringIO(data_str), read_schema_from_first_row=True, intern=["Tags"])
+        first, second = reader
+        self.assertIsNot(first["Country"], second["Country"])
+        self.assertIs(first["Tags"][1], second["Tags"][0])
+
+    def test_read_with_filter(self):
+        data_str = "\n".join([
+            "Id|User>Name|Age<|Tags[]|Country",
+            "1|>Alice|30<|Python^Django|USA",
+            "2|>Bob|25<|Java|Canada",
+            "3|>Carol|41<|Go|USA",
+            "4|>USA|50<|Rust|Mexico",
+        ])
+        reader = DictReader(StringIO(data_str), read_schema_from_first_row=True, where={"Country": "USA"})
+        self.assertEqual(["1", "3"], [row["Id"] for row in reader])
+
+        reader = DictReader(
+            StringIO(data_str),
+            read_schema_from_first_row=True,
+            where={"Country": "USA", "User.Age": lambda age: int(age) > 35},
+            columns=["User.Name"],
+        )
+        self.assertEqual([{"User": {"Name": "Carol"}}], list(reader))
+
+        reader = DictReader(
+            StringIO(data_str), read_schema_from_first_row=True, block_size=8,
+            where={"Tags": lambda tags: "Java" in tags},
+        )
+        self.assertEqual([["2"]], [[row["Id"] for row in batch] for batch in reader.iter_batches(10)])
+
+    def test_read_with_filter_on_escaped_value(self):
+        data_str = "1|A\\|B|\n2|A|B|"
+        reader = DictReader(StringIO(data_str), schema="Id|Name|Other", where={"Name": "A|B"})
+        self.assertEqual([{"Id": "1", "Name": "A|B", "Other": ""}], list(reader))
+
+    def test_read_malformed_rows(self):
+        malformed = [
+            ("a|b|c", "1"),
+            ("a|b", "1|2|3"),
+            ("a|U>b|c<", "1|>2<"),
+            ("a|U>b<", "1|>2|3<"),
+            ("a|U>b<", "1|2"),
+            ("a|T[]|c", "1|[x^y|2"),
+            ("I[b|T[]]", "1|[x^y"),
+        ]
+        for schema_str, data_str in malformed:
+            for kwargs in ({}, {"codegen": True}, {"row_factory": "record"}):
+                with self.assertRaises(ValueError, msg=(schema_str, data_str, kwargs)):
+                    list(DictReader(StringIO(data_str), schema=schema_str, **kwargs))
+            with self.assertRaises(ValueError):
+                read_columns(StringIO(data_str), schema=schema_str)
+
+        # Trailing delimiters hold no data and are accepted
+        reader = DictReader(StringIO("1|>2|<||"), schema="a|U>b<")
+        self.assertEqual([{"a": "1", "U": {"b": "2"}}], list(reader))
+
     # def test_read_data_with_three_layers_of_arrays_containing_structs(self):
     #     data = {
     #         "Countries": [
@@ -213,37 +450,207 @@ class TestDictReader(unittest.TestCase):
         
     #     self.assertEqual(expected_output, actual_output)
 
+class TestReadColumns(unittest.TestCase):
+    data_str = "\n".join([
+        "Id|User>Name|Age<|Tags[]|Books[Title]|Score",
+        "1|>Alice|30<|Python^Django|A^B|1.5",
+        "2|>Bob|25<|~|~|2.25",
+    ])
+
+    def test_read_columns(self):
+        columns = read_columns(StringIO(self.data_str), read_schema_from_first_row=True)
+        expected_columns = {
+            "Id": ["1", "2"],
+            "User.Name": ["Alice", "Bob"],
+            "User.Age": ["30", "25"],
+            "Tags": [["Python", "Django"], []],
+            "Books": [[{"Title": "A"}, {"Title": "B"}], []],
+            "Score": ["1.5", "2.25"],
+        }
+        self.assertEqual(expected_columns, columns)
+        self.assertEqual(list(expected_columns), list(columns))
+
+    def test_read_typed_columns(self):
+        columns = read_columns(
+            StringIO(self.data_str),
+            read_schema_from_first_row=True,
+            columns=["Id", "User.Age", "Score"],
+            types={"User.Age": int, "Score": float, "Id": str},
+        )
+        self.assertEqual(array("q", [30, 25]), columns["User.Age"])
+        self.assertEqual(array("d", [1.5, 2.25]), columns["Score"])
+        self.assertEqual(["1", "2"], columns["Id"])
+        self.assertEqual(["Id", "User.Age", "Score"], list(columns))
+
+    def test_read_columns_with_type_tags(self):
+        data_str = "Id:int|Score:float|Active:bool|Ranks[]:int\n1|1.5|true|1^2\n2||false|~"
+        columns = read_columns(StringIO(data_str), read_schema_from_first_row=True, types={"Id": str})
+        self.assertEqual(["1", "2"], columns["Id"])
+        self.assertEqual([1.5, None], columns["Score"])
+        self.assertEqual([True, False], columns["Active"])
+        self.assertEqual([[1, 2], []], columns["Ranks"])
+
+        columns = read_columns(StringIO(data_str), read_schema_from_first_row=True, columns=["Id"])
+        self.assertEqual(array("q", [1, 2]), columns["Id"])
+
+    def test_read_columns_from_lines(self):
+        lines = self.data_str.split("\n")
+        columns = read_columns(lines[1:], schema=lines[0], columns=["User.Name"])
+        self.assertEqual({"User.Name": ["Alice", "Bob"]}, columns)
+
+    def test_read_columns_from_reader(self):
+        reader = DictReader(StringIO(self.data_str), read_schema_from_first_row=True, where={"Id": "2"})
+        self.assertEqual(["Bob"], reader.read_columns()["User.Name"])
+
+    def test_read_columns_with_unknown_type(self):
+        with self.assertRaises(ValueError):
+            read_columns(StringIO(self.data_str), read_schema_from_first_row=True, types={"Age": int})
+
+    def test_read_dictionary_columns(self):
+        data_str = "Id|Country|Score:int|Tags[]\n1|USA|1|a\n2|France|2|b\n3|USA|3|c"
+        columns = read_columns(StringIO(data_str), read_schema_from_first_row=True, dictionary=["Country"])
+        country = columns["Country"]
+        self.assertIsInstance(country, DictionaryColumn)
+        self.assertEqual(array("i", [0, 1, 0]), country.codes)
+        self.assertEqual(["USA", "France"], country.values)
+        self.assertEqual(["USA", "France", "USA"], list(country))
+        self.assertEqual("France", country[1])
+        self.assertEqual(3, len(country))
+        self.assertEqual(["1", "2", "3"], columns["Id"])
+
+        columns = read_columns(StringIO(data_str), read_schema_from_first_row=True, dictionary=True)
+        self.assertEqual(["Id", "Country"], [name for name, column in columns.items() if isinstance(column, DictionaryColumn)])
+        self.assertEqual(array("q", [1, 2, 3]), columns["Score"])
+
+        for dictionary in (["Score"], ["Tags"], ["Missing"]):
+            with self.assertRaises(ValueError):
+                read_columns(StringIO(data_str), read_schema_from_first_row=True, dictionary=dictionary)
+
+    def test_read_interned_columns(self):
+        data_str = "Id|Country\n1|USA\n2|USA"
+        reader = DictReader(StringIO(data_str), read_schema_from_first_row=True, intern=["Country"])
+        columns = reader.read_columns()
+        self.assertIs(columns["Country"][0], columns["Country"][1])
+        self.assertEqual(["1", "2"], columns["Id"])
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy is not installed")
+    def test_read_numpy_columns(self):
+        columns = read_columns(
+            StringIO(self.data_str), read_schema_from_first_row=True, types={"User.Age": int}, numpy=True
+        )
+        self.assertEqual("int64", str(columns["User.Age"].dtype))
+        self.assertEqual("object", str(columns["Tags"].dtype))
+        self.assertEqual(["Python", "Django"], columns["Tags"][0])
+
+
+class TestMmapDictReader(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".mhn")
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def write(self, data_str):
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            f.write(data_str)
+
+    def test_read_mapped_file(self):
+        data_rows = [
+            {"Id": f"{i}", "User": {"Name": f"Ñame {i}"}, "Tags": [f"Tag|{i}", "ü"]}
+            for i in range(20)
+        ]
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            writer = DictWriter(f, "Id|User>Name<|Tags[]")
+            writer.writeheader()
+            writer.writerows(data_rows)
+
+        with MmapDictReader(self.path, read_schema_from_first_row=True) as reader:
+            self.assertEqual("Id|User>Name<|Tags[]", reader.schema)
+            self.assertEqual(data_rows, list(reader))
+
+    def test_read_mapped_file_skips_blank_lines(self):
+        self.write("1|Alice\r\n\r\n2|Bob\n")
+        with MmapDictReader(self.path, schema="Id|Name") as reader:
+            batches = list(reader.iter_batches(10))
+        self.assertEqual([[{"Id": "1", "Name": "Alice"}, {"Id": "2", "Name": "Bob"}]], batches)
+
+    def test_carriage_returns_round_trip(self):
+        data_rows = [
+            {"Id": "1", "Text": "a\rb", "Tags": ["c\r\nd", "\r"]},
+            {"Id": "2", "Text": "end\r", "Tags": ["end\r\n"]},
+        ]
+        for dialect in (default_dialect, Dialect(line_break="\r\n")):
+            with open(self.path, "w", encoding="utf-8", newline="") as f:
+                writer = DictWriter(f, "Id|Text|Tags[]", dialect)
+                writer.writeheader()
+                writer.writerows(data_rows)
+
+            with open(self.path, encoding="utf-8", newline="") as f:
+                reader = DictReader(f, dialect=dialect, read_schema_from_first_row=True)
+                self.assertEqual(data_rows, list(reader))
+            with MmapDictReader(self.path, dialect=dialect, read_schema_from_first_row=True) as reader:
+                self.assertEqual(data_rows, list(reader))
+            for block_size in (None, 5):
+                with open(self.path, "rb") as f:
+                    reader = BytesDictReader(
+                        f, dialect=dialect, read_schema_from_first_row=True, block_size=block_size
+                    )
+                    self.assertEqual(data_rows, list(reader))
+
+    def test_read_mapped_file_with_filter(self):
+        # Lines without the literal are skipped before being decoded
+        with open(self.path, "wb") as f:
+            f.write("Id|Name\n1|A\\|B\n2|\xff\n3|A\\|B|\n4|A|B\n".encode("latin-1"))
+        where = {"Name": "A|B"}
+        with MmapDictReader(self.path, read_schema_from_first_row=True, where=where) as reader:
+            self.assertEqual([{"Id": "1", "Name": "A|B"}, {"Id": "3", "Name": "A|B"}], list(reader))
+
+    def test_read_empty_mapped_file(self):
+        with MmapDictReader(self.path, schema="Id|Name") as reader:
+            self.assertEqual([], list(reader))
+
+
 class Test_unescape(unittest.TestCase):
     def test_unescape_array_start(self):
-        escaped = f"{default_dialect.escape_mappings[default_dialect.escape_char+default_dialect.array_start]}"
+        escaped = f"{default_dialect.escape_char}{default_dialect.array_start}"
         unescaped = default_dialect.array_start
         self.assertEqual(unescape(f"___{escaped}___", default_dialect), f"___{unescaped}___")
 
     def test_unescape_array_end(self):
-        escaped = f"{default_dialect.escape_mappings[default_dialect.escape_char+default_dialect.array_end]}"
+        escaped = f"{default_dialect.escape_char}{default_dialect.array_end}"
         unescaped = default_dialect.array_end
         self.assertEqual(unescape(f"___{escaped}___", default_dialect), f"___{unescaped}___")
 
     def test_unescape_level_start(self):
-        escaped = f"{default_dialect.escape_mappings[default_dialect.escape_char+default_dialect.level_start]}"
+        escaped = f"{default_dialect.escape_char}{default_dialect.level_start}"
         unescaped = default_dialect.level_start
         self.assertEqual(unescape(f"___{escaped}___", default_dialect), f"___{unescaped}___")
 
     def test_unescape_level_end(self):
-        escaped = f"{default_dialect.escape_mappings[default_dialect.escape_char+default_dialect.level_end]}"
+        escaped = f"{default_dialect.escape_char}{default_dialect.level_end}"
         unescaped = default_dialect.level_end
         self.assertEqual(unescape(f"___{escaped}___", default_dialect), f"___{unescaped}___")
 
     def test_unescape_delimiter(self):
-        escaped = f"{default_dialect.escape_mappings[default_dialect.escape_char+default_dialect.delimiter]}"
+        escaped = f"{default_dialect.escape_char}{default_dialect.delimiter}"
         unescaped = default_dialect.delimiter
         self.assertEqual(unescape(f"___{escaped}___", default_dialect), f"___{unescaped}___")
 
     def test_unescape_array_separator(self):
-        escaped = f"{default_dialect.escape_mappings[default_dialect.escape_char+default_dialect.array_separator]}"
+        escaped = f"{default_dialect.escape_char}{default_dialect.array_separator}"
         unescaped = default_dialect.array_separator
         self.assertEqual(unescape(f"___{escaped}___", default_dialect), f"___{unescaped}___")
 
+    def test_unescape_escape_char(self):
+        escaped = f"{default_dialect.escape_char}{default_dialect.escape_char}"
+        unescaped = default_dialect.escape_char
+        self.assertEqual(unescape(f"___{escaped}n___", default_dialect), f"___{unescaped}n___")
+
+    def test_unescape_newline(self):
+        escaped = f"{default_dialect.escape_char}n"
+        self.assertEqual(unescape(f"Line 1{escaped}Line 2", default_dialect), "Line 1\nLine 2")
+
 class Test_unescape_newline(unittest.TestCase):
     def test_unescape_newlines_single_line(self):
         escaped = f"{default_dialect.escape_char}\\n"
@@ -281,6 +688,12 @@ class Test_parse_array(unittest.TestCase):
         expected_output = []
         self.assertEqual(parse_array(array_str, default_dialect), expected_output)
 
+    def test_parse_array_with_escaped_separator(self):
+        separator = default_dialect.array_separator
+        array_str = f"item{default_dialect.escape_char}{separator}1{separator}item2"
+        expected_output = [f"item{default_dialect.array_separator}1", "item2"]
+        self.assertEqual(parse_array(array_str, default_dialect), expected_output)
+
     def test_parse_array_no_start_end(self):
         array_str = f"item1{default_dialect.array_separator}item2"
         expected_output = ["item1", "item2"]
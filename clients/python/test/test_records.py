@@ -0,0 +1,107 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from dataclasses import dataclass
+from mhn import BytesDictReader, DictReader, MmapDictReader, record_type
+
+DATA = (
+    "Id:int|User>Name|Age:int<|Tags[]|Items[Sku|Qty:int]|First Name\n"
+    "1|>Ann|30<|a^b|X1|2^Y\\|2|3|Ann\n"
+    "2|>Bob|<|~|~|Bob"
+)
+
+
+@dataclass
+class Item:
+    Sku: str
+    Qty: int
+
+
+class TestRecords(unittest.TestCase):
+    def reader(self, **kwargs):
+        return DictReader(io.StringIO(DATA), read_schema_from_first_row=True, **kwargs)
+
+    def test_records_hold_the_same_values_as_dicts(self):
+        rows = list(self.reader())
+        records = list(self.reader(row_factory="record"))
+
+        self.assertEqual(len(rows), len(records))
+        for row, record in zip(rows, records):
+            self.assertEqual(row["Id"], record.Id)
+            self.assertEqual(row["User"]["Name"], record.User.Name)
+            self.assertEqual(row["User"]["Age"], record.User.Age)
+            self.assertEqual(row["Tags"], record.Tags)
+            self.assertEqual(row["Items"], [item._asdict() for item in record.Items])
+            # Field names that are not identifiers stay readable by position
+            self.assertEqual(row["First Name"], record[4])
+
+    def test_generated_classes_are_shared_and_slotted(self):
+        reader = self.reader(row_factory="record")
+        first, second = reader
+        self.assertIs(type(first), type(second))
+        self.assertIs(type(first.User), type(second.User))
+        self.assertEqual("User", type(first.User).__name__)
+        self.assertFalse(hasattr(first, "__dict__"))
+        self.assertIs(type(first), record_type(reader.compiled_schema))
+
+    def test_projected_columns(self):
+        record = next(self.reader(row_factory="record", columns=["User.Age", "Items"]))
+        self.assertEqual(("User", "Items"), record._fields)
+        self.assertEqual(("Age",), record.User._fields)
+        self.assertEqual(30, record.User.Age)
+        self.assertEqual([("X1", 2), ("Y|2", 3)], record.Items)
+
+    def test_classes_per_level(self):
+        @dataclass
+        class User:
+            Name: str
+            Age: int
+
+        records = list(self.reader(row_factory={"User": User, "Items": Item}))
+        self.assertEqual(User("Ann", 30), records[0].User)
+        self.assertEqual([Item("X1", 2), Item("Y|2", 3)], records[0].Items)
+        self.assertEqual([], records[1].Items)
+
+    @unittest.skipIf(sys.version_info < (3, 10), "dataclass slots require Python 3.10")
+    def test_slotted_dataclass_rows(self):
+        @dataclass(slots=True)
+        class Row:
+            Id: int
+            Name: str
+
+        reader = DictReader(io.StringIO("Id:int|Name\n1|Ann"), read_schema_from_first_row=True, row_factory=Row)
+        self.assertEqual([Row(1, "Ann")], list(reader))
+
+    def test_bytes_and_mmap_readers(self):
+        expected = list(self.reader(row_factory="record"))
+        reader = BytesDictReader(
+            io.BytesIO(DATA.encode()), read_schema_from_first_row=True, row_factory="record"
+        )
+        self.assertEqual(expected, list(reader))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "data.mhn")
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                f.write(DATA)
+            with MmapDictReader(path, read_schema_from_first_row=True, row_factory="record") as reader:
+                self.assertEqual(expected, list(reader))
+
+    def test_invalid_row_factories(self):
+        @dataclass
+        class Wrong:
+            Name: str
+
+        with self.assertRaises(ValueError):
+            self.reader(row_factory={"User": Wrong})
+        with self.assertRaises(ValueError):
+            self.reader(row_factory={"Tags": Item})
+        with self.assertRaises(ValueError):
+            self.reader(row_factory="dict")
+        with self.assertRaises(ValueError):
+            self.reader(row_factory="record", lazy=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
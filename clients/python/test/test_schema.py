@@ -1,6 +1,7 @@
+import pickle
 import unittest
 from mhn.dialect import Dialect
-from mhn.schema import generate_schema
+from mhn.schema import generate_schema, infer_schema, CompiledSchema, FieldKind, Interner, SchemaInferrer, compile_schema
 
 
 class TestGenerateSchema(unittest.TestCase):
@@ -108,6 +109,153 @@ class TestGenerateSchema(unittest.TestCase):
         generated_schema = generate_schema(data)
         self.assertEqual(expected_schema, generated_schema)
 
+    def test_generate_schema_with_type_tags(self):
+        data = {
+            "Id": 1,
+            "Name": "Alice",
+            "Score": 9.5,
+            "Active": True,
+            "Tags": [1, 2.5],
+            "User": {"Age": 30},
+            "Books": [{"Year": 1990}],
+        }
+        expected_schema = "Id:int|Name|Score:float|Active:bool|Tags[]:float|User>Age:int<|Books[Year:int]"
+        generated_schema = generate_schema(data, infer_types=True)
+        self.assertEqual(expected_schema, generated_schema)
+
+
+class TestInferSchema(unittest.TestCase):
+    rows = [
+        {"Id": 1, "Tags": []},
+        {"Id": 2, "User": {"Name": "Alice"}, "Tags": ["a"]},
+        {"Id": None, "Books": [{"Title": "A"}, {"Year": 1990}], "User": {"Age": 30}},
+    ]
+
+    def test_infer_field_union(self):
+        self.assertEqual("Id|Tags[]|User>Name|Age<|Books[Title|Year]", infer_schema(self.rows))
+
+    def test_infer_from_sample(self):
+        rows = iter(self.rows)
+        self.assertEqual("Id|Tags[]", infer_schema(rows, sample_size=1))
+        self.assertEqual(self.rows[1], next(rows))
+
+    def test_infer_types_across_rows(self):
+        rows = [{"A": 1, "B": [], "C": True}, {"A": 2.5, "B": [1, None], "C": "x"}, {"A": None}]
+        self.assertEqual("A:float|B[]:int|C", infer_schema(rows, infer_types=True))
+
+    def test_empty_lists_become_arrays_of_objects(self):
+        self.assertEqual("Books[Title]", infer_schema([{"Books": []}, {"Books": [{"Title": "A"}]}]))
+
+    def test_infer_incrementally(self):
+        inferrer = SchemaInferrer()
+        inferrer.add({"A": 1})
+        self.assertEqual("A", inferrer.schema())
+        inferrer.update([{"B": {"C": 1}}])
+        self.assertEqual("A|B>C<", inferrer.schema())
+        self.assertEqual(2, inferrer.rows)
+
+    def test_infer_conflicting_shapes(self):
+        with self.assertRaises(ValueError):
+            infer_schema([{"User": {"Name": "Alice"}}, {"User": "Alice"}])
+
+
+class TestCompiledSchema(unittest.TestCase):
+    def test_compile_field_kinds(self):
+        compiled = CompiledSchema("Id|User>Name|Age<|Tags[]|Books[Title|Year]")
+        self.assertEqual(("Id", "User", "Tags", "Books"), compiled.names)
+        self.assertEqual(
+            [FieldKind.SCALAR, FieldKind.OBJECT, FieldKind.ARRAY, FieldKind.OBJECT_ARRAY],
+            [field.kind for field in compiled.fields],
+        )
+        self.assertEqual(("Name", "Age"), compiled.fields[1].schema.names)
+        self.assertEqual(("Title", "Year"), compiled.fields[3].schema.names)
+
+    def test_compile_nested_arrays_inside_objects(self):
+        compiled = CompiledSchema("Level1>Value1|Array1[]|Level2>Value2<<")
+        level1 = compiled.fields[0].schema
+        self.assertEqual(FieldKind.ARRAY, level1.fields[1].kind)
+        self.assertEqual(("Value2",), level1.fields[2].schema.names)
+
+    def test_compile_with_custom_dialect(self):
+        custom_dialect = Dialect(
+            delimiter=";",
+            level_start="(",
+            level_end=")",
+            array_start="{",
+            array_end="}",
+            array_separator=",",
+        )
+        compiled = CompiledSchema("Title;Author(Name;Bio);Genres{}", dialect=custom_dialect)
+        self.assertEqual(("Title", "Author", "Genres"), compiled.names)
+        self.assertEqual(FieldKind.ARRAY, compiled.fields[2].kind)
+
+    def test_compile_schema_is_cached(self):
+        self.assertIs(compile_schema("A|B>C<"), compile_schema("A|B>C<"))
+
+    def test_project_columns(self):
+        compiled = CompiledSchema("Id|User>Name|Age<|Tags[]|Country").project(["User.Age", "User"])
+        self.assertEqual(("User",), compiled.names)
+        self.assertEqual({"User": 1}, compiled.positions)
+        self.assertEqual(2, len(compiled.scan_fields))
+        self.assertEqual(("Name", "Age"), compiled.fields[1].schema.names)
+        self.assertFalse(compiled.fields[0].selected)
+
+    def test_projected_schema_can_be_pickled(self):
+        compiled = CompiledSchema("Id|User>Name|Age<").project(["User.Age"])
+        restored = pickle.loads(pickle.dumps(compiled))
+        self.assertEqual(("User",), restored.names)
+        self.assertEqual(("Age",), restored.fields[1].schema.names)
+
+    def test_intern_columns(self):
+        compiled = CompiledSchema("Id:int|Country|User>Name|City<|Tags[]").project(["Id", "User", "Tags"])
+        interning = compiled.intern(["User.City", "Tags"], size=2)
+        self.assertEqual(compiled.names, interning.names)
+        self.assertEqual(compiled.columns, interning.columns)
+        self.assertIsNone(interning.fields[2].schema.fields[0].convert)
+        self.assertIsInstance(interning.fields[2].schema.fields[1].convert, Interner)
+        self.assertIsInstance(interning.fields[3].convert, Interner)
+        self.assertIsNone(compiled.fields[3].convert)
+
+        # Typed fields keep their converters
+        everything = compiled.intern()
+        self.assertEqual("int", everything.fields[0].type_tag)
+        self.assertEqual(5, everything.fields[0].convert("5"))
+        with self.assertRaises(ValueError):
+            compiled.intern(["Country"])
+
+    def test_interner_is_bounded(self):
+        interner = Interner(2)
+        first = "".join(["a", "b"])
+        self.assertIs(first, interner(first))
+        self.assertIs(first, interner("".join(["a", "b"])))
+        interner("c")
+        value = "".join(["d", "e"])
+        self.assertIs(value, interner(value))
+        self.assertIsNot(value, interner("".join(["d", "e"])))
+        self.assertEqual(2, len(interner))
+
+    def test_compile_type_tags(self):
+        compiled = CompiledSchema("Id:int|Name:str|User>Score:float<|Tags[]:bool|Books[Year:int]")
+        self.assertEqual(("Id", "Name", "User", "Tags", "Books"), compiled.names)
+        self.assertEqual(["int", "str", None, "bool", None], [field.type_tag for field in compiled.fields])
+        self.assertIs(int, compiled.fields[0].type)
+        self.assertIsNone(compiled.fields[1].convert)
+        self.assertEqual("float", compiled.fields[2].schema.fields[0].type_tag)
+        self.assertEqual(FieldKind.ARRAY, compiled.fields[3].kind)
+        self.assertEqual("int", compiled.fields[4].schema.fields[0].type_tag)
+        self.assertEqual("int", compiled.project(["Id"]).fields[0].type_tag)
+
+    def test_compile_unknown_type_tag_is_part_of_the_name(self):
+        self.assertEqual(("Id:decimal",), CompiledSchema("Id:decimal").names)
+
+    def test_compile_type_tag_on_nested_object(self):
+        with self.assertRaises(ValueError):
+            CompiledSchema("User>Name<:int")
+
+    def test_compile_unterminated_nested_object(self):
+        with self.assertRaises(ValueError):
+            CompiledSchema("User>Name|Age")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,80 @@
+import io
+import unittest
+from mhn.reader import DictReader
+from mhn.schema import compile_schema
+from mhn.stats import Stats, schema_shape
+from mhn.writer import DictWriter
+
+
+class TestStats(unittest.TestCase):
+    data_str = "Id|User>Name|Address>City<<|Tags[]\n1|>A\\|B|>Paris<<|x^y\n2|>Bob|>Rome<<|~\n3|>Carol|>Oslo<<|z"
+
+    def test_schema_shape(self):
+        self.assertEqual((4, 3), schema_shape(compile_schema("Id|User>Name|Address>City<<|Tags[]")))
+        self.assertEqual((2, 2), schema_shape(compile_schema("Id|Books[Title|Year]")))
+        self.assertEqual((1, 1), schema_shape(compile_schema("Id|User>Name<").project(["Id"])))
+
+    def test_reader_stats(self):
+        for block_size in (None, 8):
+            reader = DictReader(
+                io.StringIO(self.data_str), read_schema_from_first_row=True, block_size=block_size, stats=True
+            )
+            rows = list(reader)
+            self.assertEqual(3, len(rows))
+            stats = reader.stats
+            self.assertEqual(3, stats.rows)
+            self.assertEqual(3, stats.lines)
+            self.assertEqual(12, stats.fields)
+            self.assertEqual(1, stats.escapes)
+            self.assertEqual(3, stats.depth)
+            self.assertEqual(len(self.data_str.split("\n", 1)[1]) + 1, stats.chars)
+            self.assertEqual({"read", "filter", "parse"}, set(stats.timers))
+            self.assertGreater(stats.timers["parse"], 0)
+
+    def test_reader_stats_with_filter_and_columns(self):
+        reader = DictReader(
+            io.StringIO(self.data_str),
+            read_schema_from_first_row=True,
+            where={"User.Name": "Bob"},
+            columns=["Id"],
+            stats=True,
+        )
+        self.assertEqual({"Id": ["2"]}, reader.read_columns())
+        self.assertEqual(1, reader.stats.rows)
+        self.assertEqual(3, reader.stats.lines)
+        self.assertGreater(reader.stats.timers["filter"], 0)
+
+    def test_batch_hook(self):
+        reports = []
+        stats = Stats(on_batch=lambda stats: reports.append(stats.rows), batch_rows=2)
+        list(DictReader(io.StringIO(self.data_str), read_schema_from_first_row=True, stats=stats))
+        self.assertEqual([2, 3], reports)
+
+        output = io.StringIO()
+        writer = DictWriter(output, "Id", stats=stats)
+        writer.writerows({"Id": i} for i in range(5))
+        self.assertEqual([2, 3, 4, 6, 8], reports)
+        self.assertEqual({"read", "filter", "parse", "serialize", "write"}, set(stats.timers))
+
+    def test_writer_stats(self):
+        output = io.StringIO()
+        writer = DictWriter(output, "Id|User>Name<|Tags[]", stats=True)
+        writer.writeheader()
+        writer.writerow({"Id": 1, "User": {"Name": "A|B"}, "Tags": ["x"]})
+        writer.writerows([{"Id": 2, "User": {"Name": "Bob"}, "Tags": []}])
+        stats = writer.stats
+        self.assertEqual(2, stats.rows)
+        self.assertEqual(6, stats.fields)
+        self.assertEqual(1, stats.escapes)
+        self.assertEqual(len(output.getvalue()), stats.chars)
+        self.assertGreater(stats.timers["serialize"], 0)
+
+    def test_stats_are_off_by_default(self):
+        reader = DictReader(io.StringIO(self.data_str), read_schema_from_first_row=True)
+        self.assertIsNone(reader.stats)
+        self.assertIsNone(reader._blocks)
+        self.assertIsNone(DictWriter(io.StringIO(), "Id").stats)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,9 @@
 import unittest
 import io
 from mhn.dialect import Dialect
-from mhn.writer import DictWriter
-from mhn.schema import generate_schema
+from mhn.reader import DictReader
+from mhn.writer import BytesDictWriter, DictWriter, write_rows
+from mhn.schema import generate_schema, CompiledSchema
 
 
 class TestDictWriter(unittest.TestCase):
@@ -264,8 +265,8 @@ class TestDictWriter(unittest.TestCase):
         schema = generate_schema(data)
         expected_output = (
             f"{schema}\n"
-            "CountryA|CityA1|AttractionA1|Museum^AttractionA2|Park^CityA2|AttractionA3|Beach^AttractionA4|Zoo^"
-            "CountryB|CityB1|AttractionB1|Museum^AttractionB2|Park^CityB2|AttractionB3|Beach^AttractionB4|Zoo"
+            "CountryA|[CityA1|[AttractionA1|Museum^AttractionA2|Park]^CityA2|[AttractionA3|Beach^AttractionA4|Zoo]]^"
+            "CountryB|[CityB1|[AttractionB1|Museum^AttractionB2|Park]^CityB2|[AttractionB3|Beach^AttractionB4|Zoo]]"
         )
 
         output = io.StringIO()
@@ -274,6 +275,191 @@ class TestDictWriter(unittest.TestCase):
         writer.writerow(data)
 
         self.assertEqual(expected_output, output.getvalue())
+        output.seek(0)
+        self.assertEqual([data], list(DictReader(output, read_schema_from_first_row=True)))
+
+    def test_arrays_inside_arrays_of_objects_round_trip(self):
+        rows = [
+            {"Items": [{"Name": "a", "Tags": ["x", "y"]}, {"Name": "b", "Tags": ["z"]}, {"Name": "c", "Tags": []}]},
+            {"Items": [{"Name": "a", "Sub": [{"X": "1"}, {"X": "2"}]}, {"Name": "b", "Sub": [{"X": "3"}]}]},
+        ]
+        schemas = ["Items[Name|Tags[]]", "Items[Name|Sub[X]]"]
+        expected = ["a|[x^y]^b|[z]^c|[~]", "a|[1^2]^b|[3]"]
+
+        for row, schema, line in zip(rows, schemas, expected):
+            for codegen in (False, True):
+                output = io.StringIO()
+                writer = DictWriter(output, schema, codegen=codegen)
+                writer.writeheader()
+                writer.writerow(row)
+                self.assertEqual(f"{schema}\n{line}", output.getvalue())
+
+                output.seek(0)
+                self.assertEqual([row], list(DictReader(output, read_schema_from_first_row=True)))
+
+    def test_write_with_compiled_schema(self):
+        schema = CompiledSchema("Id|User>Name<|Tags[]")
+        output = io.StringIO()
+        writer = DictWriter(output, schema)
+        writer.writeheader()
+        writer.writerow({"Id": 1, "User": {"Name": "Alice"}, "Tags": ["a", 2]})
+
+        self.assertEqual("Id|User>Name<|Tags[]\n1|>Alice<|a^2", output.getvalue())
+
+    def test_write_typed_fields(self):
+        schema = "Id:int|Score:float|Active:bool|Ranks[]:int|Name:str"
+        output = io.StringIO()
+        writer = DictWriter(output, schema)
+        writer.writerow({"Id": 1, "Score": 2, "Active": True, "Ranks": [1, 2], "Name": "a|b"})
+        writer.writerow({"Id": None, "Score": 0.5, "Active": 0, "Ranks": [], "Name": ""})
+
+        self.assertEqual("\n1|2.0|true|1^2|a\\|b\n|0.5|false|~|", output.getvalue())
+
+    def test_write_bool_fields_from_text(self):
+        output = io.StringIO()
+        writer = DictWriter(output, "Active:bool|Flags[]:bool")
+        writer.writerow({"Active": "false", "Flags": ["true", "0", "False", b"1"]})
+        writer.writerow({"Active": "", "Flags": []})
+        self.assertEqual("\nfalse|true^false^false^true\n|~", output.getvalue())
+
+        with self.assertRaises(ValueError):
+            writer.writerow({"Active": "no"})
+
+    def test_write_int_fields_rejects_fractions(self):
+        for codegen in (False, True):
+            writer = DictWriter(io.StringIO(), "Id:int|Tags[]:int", codegen=codegen)
+            writer.writerow({"Id": 3.0, "Tags": [True, 2.0]})
+
+            with self.assertRaises(ValueError):
+                writer.writerow({"Id": 3.7, "Tags": []})
+            with self.assertRaises(ValueError):
+                writer.writerow({"Id": 1, "Tags": [1.9, 2]})
+
+        writer = BytesDictWriter(io.BytesIO(), "Id:int|Tags[]:int")
+        with self.assertRaises(ValueError):
+            writer.writerow({"Id": 3.7, "Tags": []})
+        with self.assertRaises(ValueError):
+            writer.writerow({"Id": 1, "Tags": [1.9, 2]})
+
+    def test_write_missing_fields_empty(self):
+        output = io.StringIO()
+        writer = DictWriter(output, "Id|User>Name|Age<|Tags[]|Books[Title]")
+        writer.writerow({"Id": 1})
+
+        self.assertEqual("\n1|>|<|~|~", output.getvalue())
+
+    def test_write_with_escape_cache(self):
+        rows = [{"Status": status, "Tags": ["a|b", "c"]} for status in ("OK", "N/A|?", "OK")] * 3
+        expected = io.StringIO()
+        DictWriter(expected, "Status|Tags[]").writerows(rows)
+        output = io.StringIO()
+        writer = DictWriter(output, "Status|Tags[]", escape_cache_size=2)
+        writer.writerows(rows)
+
+        self.assertEqual(expected.getvalue(), output.getvalue())
+        self.assertEqual(2, writer._escape.cache_info().currsize)
+        with self.assertRaises(ValueError):
+            DictWriter(output, "Status", escape_cache_size=-1)
+
+    def test_writerows_matches_writerow(self):
+        data_rows = [{"Id": i, "Tags": [f"Tag {i}", "x|y"]} for i in range(100)]
+        schema = "Id|Tags[]"
+
+        expected = io.StringIO()
+        writer = DictWriter(expected, schema)
+        writer.writeheader()
+        for row in data_rows:
+            writer.writerow(row)
+
+        output = io.StringIO()
+        writer = DictWriter(output, schema)
+        writer.writeheader()
+        writer.writerows(row for row in data_rows)
+
+        self.assertEqual(expected.getvalue(), output.getvalue())
+
+    def test_writerows_writes_in_chunks(self):
+        class CountingIO(io.StringIO):
+            writes = 0
+
+            def write(self, s):
+                self.writes += 1
+                return super().write(s)
+
+        data_rows = [{"Id": i} for i in range(10)]
+
+        output = CountingIO()
+        writer = DictWriter(output, "Id", chunk_rows=4)
+        writer.writerows(data_rows)
+        self.assertEqual(3, output.writes)
+        self.assertEqual("".join(f"\n{i}" for i in range(10)), output.getvalue())
+
+        output = CountingIO()
+        writer = DictWriter(output, "Id", chunk_size=5)
+        writer.writerows(data_rows)
+        self.assertEqual(4, output.writes)
+
+    def test_flush_writes_rows_buffered_before_an_error(self):
+        def rows():
+            yield {"Id": 1}
+            raise RuntimeError("source failed")
+
+        output = io.StringIO()
+        writer = DictWriter(output, "Id")
+        with self.assertRaises(RuntimeError):
+            writer.writerows(rows())
+        self.assertEqual("", output.getvalue())
+
+        writer.flush()
+        self.assertEqual("\n1", output.getvalue())
+
+
+class TestWriteRows(unittest.TestCase):
+    def test_write_rows_with_inferred_schema(self):
+        rows = [{"Id": 1}, {"Id": 2, "Tags": ["a", "b"]}, {"Id": 3, "Late": "dropped"}]
+        output = io.StringIO()
+        write_rows(output, iter(rows), sample_size=2, infer_types=True)
+
+        self.assertEqual("Id:int|Tags[]\n1|~\n2|a^b\n3|~", output.getvalue())
+        output.seek(0)
+        self.assertEqual(
+            [{"Id": 1, "Tags": []}, {"Id": 2, "Tags": ["a", "b"]}, {"Id": 3, "Tags": []}],
+            list(DictReader(output, read_schema_from_first_row=True)),
+        )
+
+    def test_write_rows_with_none_values(self):
+        rows = [
+            {"Id": 1, "User": {"Name": "a"}, "Items": [{"Sku": "x"}]},
+            {"Id": 2, "User": None, "Items": [None, {"Sku": None}]},
+            {"Id": None, "User": {"Name": None}, "Items": None},
+        ]
+        output = io.StringIO()
+        write_rows(output, rows)
+        self.assertEqual("Id|User>Name<|Items[Sku]\n1|>a<|x\n2|><|^\n|><|~", output.getvalue())
+
+        for codegen in (False, True):
+            writer = DictWriter(io.StringIO(), "Id|User>Name<|Items[Sku]", codegen=codegen)
+            self.assertEqual(["1|>a<|x", "2|><|^", "|><|~"], [writer.convert_dict_to_mhn(row) for row in rows])
+        writer = BytesDictWriter(io.BytesIO(), "Id|User>Name<|Items[Sku]")
+        self.assertEqual([b"1|>a<|x", b"2|><|^", b"|><|~"], [writer.convert_dict_to_mhn(row) for row in rows])
+
+    def test_write_rows_buffers_only_the_sample(self):
+        consumed = []
+
+        def rows():
+            for i in range(10):
+                consumed.append(i)
+                yield {"Id": i}
+
+        class HeaderCheckingIO(io.StringIO):
+            def write(self, s):
+                if not self.getvalue():
+                    assert consumed == [0, 1, 2], consumed
+                return super().write(s)
+
+        output = HeaderCheckingIO()
+        write_rows(output, rows(), sample_size=3, chunk_rows=1)
+        self.assertEqual(["Id"] + [str(i) for i in range(10)], output.getvalue().split("\n"))
 
 
 if __name__ == "__main__":